@@ -1,10 +1,16 @@
 import pandas as pd
 from pathlib import Path
 
-def analyze_top_occurrences(csv_path, output_md_path, top_n=10):
+from streaming_profiler import StreamingProfiler, profile_csv_parallel
+from table_cache import read_table
+
+def analyze_top_occurrences(csv_path, output_md_path, top_n=10, workers=None, use_cache=False):
     """
     Analyze a CSV file and generate a markdown report with top N occurring values for each column.
     
+    The file is profiled in parallel byte ranges (see streaming_profiler.py)
+    instead of loading it whole and running value_counts column by column.
+    
     Parameters:
     -----------
     csv_path : str
@@ -13,14 +19,23 @@ def analyze_top_occurrences(csv_path, output_md_path, top_n=10):
         Path to save the markdown output
     top_n : int
         Number of top occurrences to report (default: 10)
+    workers : int or None
+        Number of worker processes (default: all cores)
+    use_cache : bool
+        Profile the table from the binary cache (see table_cache.py) instead of
+        re-parsing the CSV; the first run parses once and writes the cache
     """
-    # Read the CSV file
-    print(f"Reading {csv_path}...")
-    df = pd.read_csv(csv_path, low_memory=False)
+    # Profile the CSV file
+    print(f"Profiling {csv_path}...")
+    if use_cache:
+        profiler = StreamingProfiler(topk_capacity=10000)
+        profiler.update(read_table(csv_path, dtype=str))
+    else:
+        profiler = profile_csv_parallel(csv_path, workers=workers, topk_capacity=10000)
     
     # Get basic statistics
-    total_rows = len(df)
-    total_columns = len(df.columns)
+    total_rows = profiler.rows
+    total_columns = len(profiler.profiles)
     
     # Start building the markdown content
     md_content = []
@@ -32,30 +47,37 @@ def analyze_top_occurrences(csv_path, output_md_path, top_n=10):
     md_content.append("\n---\n")
     
     # Analyze each column
-    for idx, column in enumerate(df.columns, 1):
-        print(f"Analyzing column {idx}/{total_columns}: {column}")
+    for idx, (column, profile) in enumerate(profiler.profiles.items(), 1):
+        print(f"Writing column {idx}/{total_columns}: {column}")
         
         md_content.append(f"\n## {idx}. {column}\n")
         
-        # Get value counts
-        value_counts = df[column].value_counts(dropna=False)
-        
         # Count null/missing values
-        null_count = df[column].isna().sum()
+        null_count = profile.nulls
         null_percentage = (null_count / total_rows) * 100
         
-        md_content.append(f"**Total Unique Values:** {len(value_counts):,}\n")
+        # Value counts including missing values as one entry (as value_counts(dropna=False))
+        value_counts = profile.topk.top(top_n)
+        if null_count > 0:
+            value_counts = sorted(value_counts + [(float('nan'), null_count)], key=lambda item: -item[1])
+        unique_count = profile.distinct_estimate() + (1 if null_count > 0 else 0)
+        approx = "" if profile.topk.exact else "~"
+        
+        md_content.append(f"**Total Unique Values:** {approx}{unique_count:,}\n")
         md_content.append(f"**Missing Values:** {null_count:,} ({null_percentage:.2f}%)\n")
-        md_content.append(f"**Non-Missing Values:** {total_rows - null_count:,}\n\n")
+        md_content.append(f"**Non-Missing Values:** {total_rows - null_count:,}\n")
+        if not profile.topk.exact:
+            md_content.append(f"**Note:** Counts below may be low by up to {profile.topk.error:,}\n")
+        md_content.append("\n")
         
         # Get top N occurrences
-        top_values = value_counts.head(top_n)
+        top_values = value_counts[:top_n]
         
         if len(top_values) > 0:
             md_content.append("| Rank | Value | Count | Percentage |\n")
             md_content.append("|------|-------|-------|------------|\n")
             
-            for rank, (value, count) in enumerate(top_values.items(), 1):
+            for rank, (value, count) in enumerate(top_values, 1):
                 percentage = (count / total_rows) * 100
                 
                 # Handle display of different value types
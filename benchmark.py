@@ -0,0 +1,262 @@
+"""
+Pipeline Benchmark Harness
+==========================
+
+Runs the pipeline stages on synthetic data (synthetic_data.py) at one or
+more scales and records wall time and peak memory per stage, so changes to
+any stage can be compared before/after on identical inputs.
+
+Each stage runs in its own Python process inside the scale's work directory
+(bench_data/x<scale>/). The scripts' hardcoded data paths are redirected to
+that directory; the scripts themselves are not modified. Peak memory is the
+stage process's maximum resident set size (VmHWM on Linux, getrusage on
+macOS); on Windows, where neither is available, the tracemalloc peak of
+Python allocations is reported instead.
+
+Two steps of the real workflow happen by hand in Excel and are emulated
+(untimed) between stages:
+    - founder_vc_final.csv is re-saved with ';' as separator before cleaning
+    - founder_vc_final_formatted_with_groups.csv adds University_Group
+      (Ivy / Top8 / Other) and converts Deal_DealDate to d.m.yyyy, the format
+      prepare_for_stata.py parses
+
+Results are appended to benchmark_results.csv (one row per scale and stage,
+with the git commit) and printed as a summary table. Stage output goes to
+bench_data/x<scale>/.bench/<stage>.log; the per-step records of the
+instrumented stages (instrumentation.py) go to bench_data/x<scale>/run_log.jsonl
+under one run id per scale.
+
+Usage:
+    python benchmark.py                     # scale 1
+    python benchmark.py 1 10 100            # several scales
+    python benchmark.py 0.1 --only=create_founder_vc_analysis,prepare_for_stata
+    python benchmark.py 10 --regenerate     # rebuild the synthetic data first
+    python benchmark.py 1 --profile         # also write per-stage profiles (profiling.py)
+
+Author: Empirical Methods Project
+"""
+
+import os
+import sys
+import json
+import time
+import subprocess
+import tracemalloc
+import pandas as pd
+from pathlib import Path
+
+from synthetic_data import generate, DEFAULT_SEED
+from instrumentation import process_peak_rss_mb
+from intermediates import read_intermediate
+from education_records import university_group
+
+REPO_DIR = Path(__file__).resolve().parent
+BENCH_DIR = REPO_DIR / 'bench_data'
+RESULTS_FILE = REPO_DIR / 'benchmark_results.csv'
+
+# Hardcoded data directories in the scripts, redirected to the work directory
+DATA_DIR_PREFIXES = [
+    r'G:\School\BOCCONI\1st semester\empirical' + '\\',
+    r'G:\\School\\BOCCONI\\1st semester\\empirical\\',
+    r'D:\School\Bocconi\Empirical' + '\\',
+]
+
+# (stage name, script, arguments) in pipeline order
+STAGES = [
+    ('create_founder_vc_analysis', 'create_founder_vc_analysis.py', []),
+    ('filter_founder_vc_final', 'filter_founder_vc_final.py', []),
+    ('clean_founder_vc_final', 'clean_founder_vc_final.py', []),
+    ('categorize_and_format', 'categorize_and_format.py', []),
+    ('prepare_for_stata', 'prepare_for_stata.py', []),
+    ('create_single_founder_dataset', 'create_single_founder_dataset.py', []),
+    ('create_elite_single_founder_dataset', 'create_elite_single_founder_dataset.py', []),
+    # Checks and supporting scripts over the raw tables
+    ('data_quality_check', 'data_quality_check.py', []),
+    ('integrity_check', 'integrity_check.py', ['core_tables']),
+    ('dependency_check', 'dependency_check.py', ['master_file.csv']),
+    ('covariate_lagging', 'covariate_lagging.py', []),
+]
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_DIR,
+                              capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return ''
+
+
+def redirect_paths(source):
+    """Point hardcoded data paths at the current directory"""
+    for prefix in DATA_DIR_PREFIXES:
+        source = source.replace(prefix, '')
+    return source
+
+
+# ============================================================================
+# Manual (Excel) steps of the real workflow
+# ============================================================================
+
+def excel_resave_semicolon(workdir):
+    """founder_vc_final.csv as saved from Excel with a European locale (';' separator)"""
+    path = workdir / 'founder_vc_final.csv'
+    df = pd.read_csv(path, low_memory=False, encoding='utf-8-sig')
+    df.to_csv(path, index=False, sep=';', encoding='utf-8-sig')
+
+
+def excel_add_university_groups(workdir):
+    """founder_vc_final_formatted_with_groups.csv: University_Group column, dates as d.m.yyyy"""
+    df = read_intermediate(workdir / 'founder_vc_final_formatted.csv')
+    if df is None:
+        df = pd.read_csv(workdir / 'founder_vc_final_formatted.csv', low_memory=False)
+    df['University_Group'] = university_group(df['Education_Institute'])
+    dates = pd.to_datetime(df['Deal_DealDate'], format='%d/%m/%Y', errors='coerce')
+    df['Deal_DealDate'] = (dates.dt.day.astype('Int64').astype(str) + '.' +
+                           dates.dt.month.astype('Int64').astype(str) + '.' +
+                           dates.dt.year.astype('Int64').astype(str)).where(dates.notna())
+    df.to_csv(workdir / 'founder_vc_final_formatted_with_groups.csv', index=False)
+
+
+HANDOFFS = {
+    'clean_founder_vc_final': excel_resave_semicolon,
+    'prepare_for_stata': excel_add_university_groups,
+}
+
+
+# ============================================================================
+# Running stages
+# ============================================================================
+
+def run_stage_child(script, result_file, args):
+    """Entry point inside the stage process: run the script and record time and peak memory"""
+    source = redirect_paths(Path(script).read_text(encoding='utf-8'))
+    code = compile(source, script, 'exec')
+    sys.argv = [script] + list(args)
+
+    tracing = process_peak_rss_mb() is None
+    if tracing:
+        tracemalloc.start()
+
+    status = 'ok'
+    start = time.perf_counter()
+    try:
+        exec(code, {'__name__': '__main__', '__file__': script})
+    except SystemExit as e:
+        if e.code not in (None, 0):
+            status = f'exit {e.code}'
+    except Exception as e:
+        status = f'error: {type(e).__name__}: {e}'
+        import traceback
+        traceback.print_exc()
+    seconds = time.perf_counter() - start
+
+    peak_mb = tracemalloc.get_traced_memory()[1] / (1 << 20) if tracing else process_peak_rss_mb()
+    Path(result_file).write_text(json.dumps({'seconds': seconds, 'peak_mb': peak_mb, 'status': status}))
+
+
+def run_stage(name, script, args, workdir, run_id=None, profile=False):
+    """Run one stage in a fresh process inside workdir; returns the result dict"""
+    bench_dir = workdir / '.bench'
+    bench_dir.mkdir(exist_ok=True)
+    result_file = bench_dir / f"{name}.json"
+    result_file.unlink(missing_ok=True)
+
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([str(REPO_DIR), os.environ.get('PYTHONPATH', '')]),
+               PYTHONIOENCODING='utf-8', MPLBACKEND='Agg', PIPELINE_RUN_ID=run_id or '',
+               PIPELINE_PROFILE='1' if profile else os.environ.get('PIPELINE_PROFILE', ''))
+    with open(bench_dir / f"{name}.log", 'w', encoding='utf-8') as log:
+        subprocess.run([sys.executable, str(REPO_DIR / 'benchmark.py'), '--stage-child',
+                        str(REPO_DIR / script), str(result_file)] + list(args),
+                       cwd=workdir, env=env, stdout=log, stderr=subprocess.STDOUT)
+
+    if result_file.exists():
+        return json.loads(result_file.read_text())
+    return {'seconds': None, 'peak_mb': None, 'status': 'crashed (see log)'}
+
+
+def prepare_data(scale, regenerate=False):
+    """Work directory for a scale, generating the synthetic data if needed"""
+    workdir = BENCH_DIR / f"x{scale:g}"
+    if regenerate or not (workdir / 'master_file.csv').exists():
+        print(f"\nGenerating synthetic data (scale {scale:g}x) in {workdir}...")
+        start = time.perf_counter()
+        generate(scale, workdir, seed=DEFAULT_SEED)
+        print(f"   [OK] Generated in {time.perf_counter() - start:.1f}s")
+    return workdir
+
+
+def run_benchmark(scales=(1,), only=None, regenerate=False, profile=False):
+    """
+    Run the stages at each scale and append the results to benchmark_results.csv.
+
+    Parameters:
+    -----------
+    scales : iterable of float
+        Multiples of the real table sizes (1, 10, 100)
+    only : list of str or None
+        Stage names to run (default: all, in pipeline order). Stages read the
+        outputs of earlier ones, so those must exist from a previous run.
+    regenerate : bool
+        Rebuild the synthetic data even if it exists
+    profile : bool
+        Profile each stage (profiling.py); files go to bench_data/x<scale>/profiles/.
+        Timings of a profiled run are inflated and not comparable.
+
+    Returns:
+    --------
+    DataFrame of results for this run
+    """
+    commit = git_commit()
+    timestamp = pd.Timestamp.now().isoformat(timespec='seconds')
+    rows = []
+    for scale in scales:
+        workdir = prepare_data(scale, regenerate)
+        print("\n" + "=" * 80)
+        print(f"SCALE {scale:g}x ({workdir})")
+        print("=" * 80)
+        for name, script, args in STAGES:
+            if only and name not in only:
+                continue
+            if name in HANDOFFS:
+                HANDOFFS[name](workdir)
+            result = run_stage(name, script, args, workdir, run_id=f"bench-{timestamp}-x{scale:g}", profile=profile)
+            seconds = f"{result['seconds']:8.2f}s" if result['seconds'] is not None else '       -'
+            peak = f"{result['peak_mb']:9.0f} MB" if result['peak_mb'] is not None else '          -'
+            marker = '[OK]' if result['status'] == 'ok' else '[CHECK]'
+            print(f"   {marker:<7} {name:<38} {seconds} {peak}  {result['status'] if result['status'] != 'ok' else ''}")
+            rows.append({'timestamp': timestamp, 'commit': commit, 'scale': scale, 'stage': name, **result})
+
+    results = pd.DataFrame(rows, columns=['timestamp', 'commit', 'scale', 'stage', 'seconds', 'peak_mb', 'status'])
+    results.to_csv(RESULTS_FILE, mode='a', header=not RESULTS_FILE.exists(), index=False)
+    return results
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == '--stage-child':
+        run_stage_child(sys.argv[2], sys.argv[3], sys.argv[4:])
+        sys.exit(0)
+
+    scales = [float(a) for a in sys.argv[1:] if not a.startswith('--')] or [1]
+    only = None
+    for arg in sys.argv[1:]:
+        if arg.startswith('--only='):
+            only = arg.split('=', 1)[1].split(',')
+    unknown = set(only or []) - {name for name, _, _ in STAGES}
+    if unknown:
+        print(f"Unknown stage(s): {', '.join(sorted(unknown))}")
+        print(f"Stages: {', '.join(name for name, _, _ in STAGES)}")
+        exit(1)
+
+    print("=" * 80)
+    print("PIPELINE BENCHMARK")
+    print("=" * 80)
+    results = run_benchmark(scales, only=only, regenerate='--regenerate' in sys.argv,
+                            profile='--profile' in sys.argv)
+
+    print("\n" + "=" * 80)
+    print("SUMMARY (seconds / peak MB)")
+    print("=" * 80)
+    summary = results.pivot_table(index='stage', columns='scale', values=['seconds', 'peak_mb'], sort=False)
+    print(summary.round(1).to_string())
+    print(f"\nResults appended to {RESULTS_FILE.name}; stage logs in {BENCH_DIR.name}/x<scale>/.bench/")
+    if (results['status'] != 'ok').any():
+        exit(1)
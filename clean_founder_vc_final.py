@@ -8,6 +8,14 @@ import pandas as pd
 import numpy as np
 import os
 from datetime import datetime
+from instrumentation import RunLog
+from lineage import LineageLog
+from intermediates import write_intermediate
+from diagnostics import Diagnostics
+
+run = RunLog('clean_founder_vc_final')
+lineage = LineageLog('clean_founder_vc_final')
+diag = Diagnostics()
 
 print("=" * 100)
 print("CLEANING AND NORMALIZING FOUNDER-VC FINAL FILE")
@@ -21,6 +29,7 @@ output_file = r'G:\School\BOCCONI\1st semester\empirical\founder_vc_cleaned.csv'
 print("\n" + "=" * 100)
 print("STEP 1: Loading founder-VC final file...")
 print("=" * 100)
+run.start("STEP 1: Loading founder-VC final file")
 
 # Load the file with proper encoding and delimiter handling
 print(f"Reading file: {input_file}")
@@ -73,14 +82,15 @@ print(f"Loaded {len(df):,} rows with {len(df.columns)} columns")
 if 'PersonID' not in df.columns:
     print(f"  Warning: PersonID column not found. Available columns: {list(df.columns[:5])}...")
 else:
-    print(f"  Unique founders: {df['PersonID'].nunique():,}")
-    print(f"  Unique companies: {df['CompanyID'].nunique():,}")
+    diag.unique(df, ['PersonID', 'CompanyID'])
+    diag.flush()
 
 initial_count = len(df)
 
 print("\n" + "=" * 100)
 print("STEP 2: Filtering out founders with blank Gender...")
 print("=" * 100)
+run.start("STEP 2: Filtering out founders with blank Gender", df)
 
 # Check Gender column
 if 'Person_Gender' not in df.columns:
@@ -93,11 +103,13 @@ print(f"Rows with blank Gender: {len(df) - gender_before:,}")
 
 # Filter for rows with gender data
 print("\nApplying filter: Removing rows with blank Gender...")
-df = df[df['Person_Gender'].notna() & (df['Person_Gender'] != '')].copy()
+keep = df['Person_Gender'].notna() & (df['Person_Gender'] != '')
+lineage.record('Gender filter', df, keep)
+df = df[keep].copy()
 
 print(f"After Gender filter: {len(df):,} rows")
-print(f"  Unique founders: {df['PersonID'].nunique():,}")
-print(f"  Unique companies: {df['CompanyID'].nunique():,}")
+print(f"  Unique founders: {lineage.after('PersonID'):,}")
+print(f"  Unique companies: {lineage.after('CompanyID'):,}")
 print(f"  Rows removed: {initial_count - len(df):,}")
 
 if len(df) == 0:
@@ -109,6 +121,7 @@ after_gender_count = len(df)
 print("\n" + "=" * 100)
 print("STEP 3: Filtering out unwanted deal types...")
 print("=" * 100)
+run.start("STEP 3: Filtering out unwanted deal types", df)
 
 # Check Deal_DealType column
 if 'Deal_DealType' not in df.columns:
@@ -134,11 +147,12 @@ unwanted_mask = pd.Series([False] * len(df), index=df.index)
 for deal_type in unwanted_deal_types:
     unwanted_mask = unwanted_mask | df['Deal_DealType'].str.contains(deal_type, case=False, na=False)
 
+lineage.record('Deal Type filter', df, ~unwanted_mask)
 df = df[~unwanted_mask].copy()
 
 print(f"After deal type filter: {len(df):,} rows")
-print(f"  Unique founders: {df['PersonID'].nunique():,}")
-print(f"  Unique companies: {df['CompanyID'].nunique():,}")
+print(f"  Unique founders: {lineage.after('PersonID'):,}")
+print(f"  Unique companies: {lineage.after('CompanyID'):,}")
 print(f"  Rows removed: {after_gender_count - len(df):,}")
 
 if len(df) == 0:
@@ -150,6 +164,7 @@ after_dealtype_count = len(df)
 print("\n" + "=" * 100)
 print("STEP 4: Normalizing date formatting to dd/mm/yyyy...")
 print("=" * 100)
+run.start("STEP 4: Normalizing date formatting to dd/mm/yyyy", df)
 
 # Find all date columns
 date_columns = [col for col in df.columns if 'date' in col.lower() or 'Date' in col]
@@ -217,6 +232,7 @@ print("\nDate normalization complete!")
 print("\n" + "=" * 100)
 print("STEP 5: Data quality validation...")
 print("=" * 100)
+run.start("STEP 5: Data quality validation", df)
 
 # Validation checks
 print("Validation checks:")
@@ -232,65 +248,32 @@ for deal_type in unwanted_deal_types:
     remaining = df['Deal_DealType'].str.contains(deal_type, case=False, na=False).sum()
     print(f"  {deal_type}: {remaining} rows (should be 0)")
 
-# Check deal types distribution
-print("\nRemaining Deal Types (top 10):")
-deal_type_counts = df['Deal_DealType'].value_counts().head(10)
-for deal_type, count in deal_type_counts.items():
-    print(f"  {deal_type:40s} : {count:4d}")
-
-# Gender distribution
-print("\nGender Distribution:")
-gender_counts = df['Person_Gender'].value_counts()
-for gender, count in gender_counts.items():
-    print(f"  {gender:20s} : {count:6,} ({count/len(df)*100:.2f}%)")
+# Deal type and gender distributions
+diag.value_counts(df, 'Deal_DealType', "Remaining Deal Types (top 10)", top=10)
+diag.value_counts(df, 'Person_Gender', "Gender Distribution", percent=True)
+diag.flush()
 
 print("\n" + "=" * 100)
 print("STEP 6: Saving cleaned file...")
 print("=" * 100)
+run.start("STEP 6: Saving cleaned file", df)
 
 # Save the file with UTF-8 encoding and comma delimiter (standard CSV)
 print(f"Saving to: {output_file}")
-df.to_csv(output_file, index=False, encoding='utf-8-sig', sep=',')
-file_size_mb = os.path.getsize(output_file) / (1024**2)
+saved_files = write_intermediate(df, output_file, index=False, encoding='utf-8-sig', sep=',')
 print(f"File saved successfully with utf-8-sig encoding and comma delimiters!")
-print(f"  File size: {file_size_mb:.2f} MB")
+for saved_file in saved_files:
+    print(f"  File size: {os.path.getsize(saved_file) / (1024**2):.2f} MB ({saved_file.name})")
 print(f"  Total rows: {len(df):,}")
 print(f"  Total columns: {len(df.columns)}")
 
 print("\n" + "=" * 100)
 print("STEP 7: Summary statistics...")
 print("=" * 100)
+run.start("STEP 7: Summary statistics", df)
 
-# Create summary
-summary_stats = {
-    'Cleaning Stage': [
-        'Initial (from founder_vc_final.csv)',
-        'After Gender filter',
-        'After Deal Type filter (FINAL)'
-    ],
-    'Total Rows': [
-        f"{initial_count:,}",
-        f"{after_gender_count:,}",
-        f"{len(df):,}"
-    ],
-    'Unique Founders': [
-        '',  # Not calculated for initial
-        f"{df['PersonID'].nunique():,}",
-        f"{df['PersonID'].nunique():,}"
-    ],
-    'Unique Companies': [
-        '',  # Not calculated for initial
-        f"{df['CompanyID'].nunique():,}",
-        f"{df['CompanyID'].nunique():,}"
-    ],
-    'Retention Rate': [
-        "100%",
-        f"{after_gender_count/initial_count*100:.2f}%",
-        f"{len(df)/initial_count*100:.2f}%"
-    ]
-}
-
-summary_df = pd.DataFrame(summary_stats)
+# Create summary (rows and unique entities after each filter, from the lineage records)
+summary_df = lineage.summary()
 print("\nCleaning Summary:")
 print(summary_df.to_string(index=False))
 
@@ -326,3 +309,5 @@ print("  - All dates normalized to dd/mm/yyyy format")
 print("  - Ready for analysis of founder backgrounds and VC funding")
 print("=" * 100)
 
+lineage.close()
+run.close(df)
@@ -0,0 +1,231 @@
+"""
+Embedded SQL Layer over the Core Tables
+=======================================
+
+Ingests the six core tables (and optionally pipeline outputs) into a local
+SQLite file with indexes on the ID columns, so ad-hoc joins and filters run
+inside the engine instead of loading whole tables into pandas.
+
+Each table is reloaded only when its source CSV changed (size or mtime),
+tracked in the _ingest_log table. SQLite ships with Python, so this works
+offline with no extra dependencies.
+
+Usage:
+    python core_db.py build [--outputs] [--force]   # ingest core_tables/ (+ pipeline outputs)
+    python core_db.py query "SELECT ..."            # run a query and print the result
+
+    from core_db import query
+    query('''
+        SELECT d.DealID, d.DealSize, c.CompanyName
+        FROM Deal d JOIN Company c ON c.CompanyID = d.CompanyID
+        WHERE d.DealType = ?
+    ''', params=('Seed Round',))
+
+Author: Empirical Methods Project
+"""
+
+import os
+import sys
+import time
+import sqlite3
+import pandas as pd
+from pathlib import Path
+
+DEFAULT_DB_PATH = 'core_tables.sqlite'
+
+CORE_TABLES = [
+    'Company.csv',
+    'Deal.csv',
+    'Investor.csv',
+    'Person.csv',
+    'PersonEducationRelation.csv',
+    'PersonPositionRelation.csv',
+]
+
+# Pipeline outputs ingested with --outputs (when present in the working directory)
+OUTPUT_FILES = [
+    'master_file.csv',
+    'founder_vc_analysis.csv',
+    'founder_vc_final.csv',
+    'founder_vc_cleaned.csv',
+    'founder_vc_final_formatted.csv',
+    'founder_vc_final_formatted_with_groups.csv',
+    'deal_level_analysis.csv',
+    'deal_level_analysis_single_founders.csv',
+]
+
+INDEX_COLUMNS = ['CompanyID', 'DealID', 'PersonID', 'EntityID', 'InvestorID', 'PrimaryCompanyID']
+
+# Candidates as in clean_founder_vc_final.py (an Excel re-save writes ';'-separated files)
+DELIMITERS = [';', ',', '\t']
+ENCODINGS = ['utf-8-sig', 'latin-1']
+
+CHUNK_SIZE = 100_000
+
+
+def connect(db_path=DEFAULT_DB_PATH):
+    """Open the database with settings suited to read-heavy analysis"""
+    conn = sqlite3.connect(db_path)
+    conn.execute('PRAGMA temp_store = MEMORY')
+    conn.execute('PRAGMA cache_size = -262144')  # 256 MB page cache
+    conn.execute('PRAGMA mmap_size = 1073741824')
+    conn.execute('''CREATE TABLE IF NOT EXISTS _ingest_log (
+        table_name TEXT PRIMARY KEY, source_path TEXT, size INTEGER,
+        mtime_ns INTEGER, rows INTEGER, ingested_at TEXT)''')
+    return conn
+
+
+def is_current(conn, table_name, csv_path):
+    """True if table_name was ingested from csv_path and the file is unchanged"""
+    stat = os.stat(csv_path)
+    row = conn.execute('SELECT source_path, size, mtime_ns FROM _ingest_log WHERE table_name = ?',
+                       (table_name,)).fetchone()
+    return row == (os.path.abspath(csv_path), stat.st_size, stat.st_mtime_ns)
+
+
+def sniff_csv(csv_path):
+    """
+    (separator, encoding) of a CSV: the candidate delimiter that splits the
+    header line most often (';' first on ties), and the first encoding that
+    decodes it.
+    """
+    with open(csv_path, 'rb') as f:
+        header = f.readline()
+    for encoding in ENCODINGS:
+        try:
+            line = header.decode(encoding)
+            break
+        except UnicodeDecodeError:
+            continue
+    sep = max(DELIMITERS, key=lambda d: (line.count(d), -DELIMITERS.index(d)))
+    return sep, encoding
+
+
+def ingest_csv(conn, csv_path, table_name=None, chunksize=CHUNK_SIZE):
+    """
+    Load a CSV into a table (replacing it) and index its ID columns.
+
+    Parameters:
+    -----------
+    conn : sqlite3.Connection
+        Open database connection
+    csv_path : str
+        Source CSV
+    table_name : str or None
+        Target table (default: file stem, e.g. Company.csv -> Company)
+
+    Returns:
+    --------
+    Number of rows ingested
+    """
+    table_name = table_name or Path(csv_path).stem
+    stat = os.stat(csv_path)
+    rows = 0
+    conn.execute('PRAGMA synchronous = OFF')
+    conn.execute('PRAGMA journal_mode = MEMORY')
+    with conn:
+        conn.execute(f'DROP TABLE IF EXISTS "{table_name}"')
+        # IDs stay text so joins compare the same way whatever a chunk's inferred type is
+        id_types = {column: str for column in INDEX_COLUMNS}
+        sep, encoding = sniff_csv(csv_path)
+        for chunk in pd.read_csv(csv_path, chunksize=chunksize, dtype=id_types, low_memory=False,
+                                 sep=sep, encoding=encoding):
+            chunk.to_sql(table_name, conn, if_exists='append', index=False)
+            rows += len(chunk)
+        columns = [row[1] for row in conn.execute(f'PRAGMA table_info("{table_name}")')]
+        for column in INDEX_COLUMNS:
+            if column in columns:
+                conn.execute(f'CREATE INDEX "ix_{table_name}_{column}" ON "{table_name}" ("{column}")')
+        conn.execute('INSERT OR REPLACE INTO _ingest_log VALUES (?, ?, ?, ?, ?, ?)',
+                     (table_name, os.path.abspath(csv_path), stat.st_size, stat.st_mtime_ns,
+                      rows, pd.Timestamp.now().isoformat(timespec='seconds')))
+    conn.execute('ANALYZE')
+    return rows
+
+
+def build_database(db_path=DEFAULT_DB_PATH, data_dir='core_tables', include_outputs=False, force=False):
+    """
+    Ingest the core tables (and optionally pipeline outputs), skipping unchanged files.
+
+    A file that cannot be read is reported and skipped; the others are still ingested.
+
+    Parameters:
+    -----------
+    db_path : str
+        SQLite database file
+    data_dir : str
+        Directory holding the core table CSVs
+    include_outputs : bool
+        Also ingest the pipeline outputs listed in OUTPUT_FILES
+    force : bool
+        Re-ingest even if the source file is unchanged
+    """
+    sources = [Path(data_dir) / name for name in CORE_TABLES]
+    if include_outputs:
+        sources += [Path(name) for name in OUTPUT_FILES]
+
+    conn = connect(db_path)
+    failed = []
+    try:
+        for csv_path in sources:
+            table_name = csv_path.stem
+            if not csv_path.exists():
+                print(f"   ⚠️  {csv_path} not found - skipped")
+                continue
+            if not force and is_current(conn, table_name, csv_path):
+                print(f"   ✅ {table_name}: up to date")
+                continue
+            start = time.perf_counter()
+            try:
+                rows = ingest_csv(conn, csv_path, table_name)
+            except (ValueError, sqlite3.Error) as e:
+                # One unreadable file (e.g. hand-edited) must not stop the other tables from loading
+                with conn:
+                    conn.execute(f'DROP TABLE IF EXISTS "{table_name}"')
+                    conn.execute('DELETE FROM _ingest_log WHERE table_name = ?', (table_name,))
+                failed.append(table_name)
+                print(f"   ⚠️  {csv_path}: could not be read ({type(e).__name__}: {str(e).strip()}) - skipped")
+                continue
+            print(f"   ✅ {table_name}: {rows:,} rows ingested in {time.perf_counter() - start:.1f}s")
+    finally:
+        conn.close()
+    if failed:
+        print(f"   [CHECK] {len(failed)} file(s) not ingested: {', '.join(failed)}")
+    return db_path
+
+
+def query(sql, params=(), db_path=DEFAULT_DB_PATH):
+    """Run a query against the database and return the result as a DataFrame"""
+    if not Path(db_path).exists():
+        raise FileNotFoundError(f"{db_path} not found - run: python core_db.py build")
+    conn = connect(db_path)
+    try:
+        return pd.read_sql_query(sql, conn, params=params)
+    finally:
+        conn.close()
+
+
+def list_tables(db_path=DEFAULT_DB_PATH):
+    """Ingested tables with row counts and load times"""
+    return query('SELECT table_name, rows, ingested_at FROM _ingest_log ORDER BY table_name', db_path=db_path)
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else 'build'
+
+    if command == 'build':
+        print("=" * 80)
+        print("BUILDING CORE TABLES DATABASE")
+        print("=" * 80)
+        build_database(include_outputs='--outputs' in sys.argv[2:], force='--force' in sys.argv[2:])
+        print(f"\nDatabase: {DEFAULT_DB_PATH}")
+        print(list_tables().to_string(index=False))
+    elif command == 'query' and len(sys.argv) > 2:
+        start = time.perf_counter()
+        result = query(sys.argv[2])
+        print(result.to_string(index=False, max_rows=50))
+        print(f"\n{len(result):,} rows in {time.perf_counter() - start:.2f}s")
+    else:
+        print("Usage: python core_db.py build [--outputs] [--force]")
+        print('       python core_db.py query "SELECT ..."')
+        exit(1)
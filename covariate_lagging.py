@@ -0,0 +1,345 @@
+"""
+Point-in-Time Covariate Lagging
+===============================
+
+Generic engine for matching time-varying covariates (employee counts,
+valuations, status fields, ...) from any history table to deal dates.
+
+A history table has an entity key, an observation date and one or more
+value columns, e.g. other_tables/CompanyEmployeeHistoryRelation.csv
+(CompanyID, Date, EmployeeCount). The history is sorted once by
+(entity, date) into a SortedHistory; every lookup is then a single
+vectorized searchsorted over all deals, with no per-deal Python loop.
+The sorted index is cached on disk and reused while the source file
+is unchanged.
+
+Usage:
+    history = load_history('other_tables/CompanyEmployeeHistoryRelation.csv',
+                           key_col='CompanyID', date_col='Date',
+                           value_cols=['EmployeeCount'])
+    lagged = lag_covariates(deals, history, key_col='CompanyID', date_col='DealDate',
+                            windows={'180d': (30, 180), '730d': (0, 730)})
+
+Author: Empirical Methods Project
+"""
+
+import os
+import hashlib
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+# Days are stored relative to DAY_BASE so that (entity, day) packs into one
+# int64 key; SPAN_DAYS covers roughly 1700-2250
+DAY_BASE = -100_000
+SPAN_DAYS = 200_000
+
+DEFAULT_CACHE_DIR = '.lag_cache'
+
+
+def to_days(dates):
+    """Convert datetime-like values to int64 days since 1970, plus a mask of non-missing dates"""
+    dates = pd.to_datetime(pd.Series(dates), errors='coerce')
+    valid = dates.notna().to_numpy().copy()
+    days = np.zeros(len(dates), dtype=np.int64)
+    days[valid] = dates[valid].values.astype('datetime64[D]').astype(np.int64)
+    return days, valid
+
+
+class SortedHistory:
+    """
+    History table presorted by (entity, date).
+
+    Attributes:
+    -----------
+    entities : Index
+        Unique entity keys; position in this index is the entity code
+    codes : ndarray of int64
+        Entity code of each observation, sorted
+    days : ndarray of int64
+        Observation day (days since 1970), sorted within entity
+    keys : ndarray of int64
+        Packed (code, day) search key, globally sorted
+    values : DataFrame
+        Value columns in the same sorted order (RangeIndex)
+    """
+
+    def __init__(self, entities, codes, days, values):
+        self.entities = pd.Index(entities)
+        self.codes = np.asarray(codes, dtype=np.int64)
+        self.days = np.asarray(days, dtype=np.int64)
+        self.values = values.reset_index(drop=True)
+        self.keys = self.codes * SPAN_DAYS + (self.days - DAY_BASE)
+
+    def __len__(self):
+        return len(self.codes)
+
+    @classmethod
+    def from_frame(cls, history, key_col, date_col, value_cols, duplicates='first'):
+        """
+        Build a SortedHistory from a history DataFrame.
+
+        Parameters:
+        -----------
+        history : DataFrame
+            History table with key, date and value columns
+        key_col, date_col : str
+            Entity key and observation date columns
+        value_cols : list of str
+            Columns to carry as point-in-time values
+        duplicates : {'first', 'last'}
+            Tie rule when an entity has several observations on the same
+            date: keep the first or last one in file order
+        """
+        if duplicates not in ('first', 'last'):
+            raise ValueError(f"duplicates must be 'first' or 'last', got {duplicates!r}")
+
+        days, valid = to_days(history[date_col])
+        valid = valid & history[key_col].notna().to_numpy()
+        frame = history.loc[valid, [key_col] + list(value_cols)].copy()
+        frame['_day'] = days[valid]
+        frame = frame.drop_duplicates(subset=[key_col, '_day'], keep=duplicates)
+
+        codes, entities = pd.factorize(frame[key_col], sort=True)
+        order = np.lexsort((frame['_day'].values, codes))
+        return cls(
+            entities,
+            codes[order],
+            frame['_day'].values[order],
+            frame[list(value_cols)].iloc[order]
+        )
+
+    def save(self, path):
+        """Write the sorted index to a pickle file"""
+        payload = {
+            'entities': self.entities,
+            'codes': self.codes,
+            'days': self.days,
+            'values': self.values
+        }
+        pd.to_pickle(payload, path)
+
+    @classmethod
+    def load(cls, path):
+        """Read a sorted index written by save()"""
+        payload = pd.read_pickle(path)
+        return cls(payload['entities'], payload['codes'], payload['days'], payload['values'])
+
+    def lookup(self, entity_keys, dates, min_lag_days=0, max_lag_days=None, same_day=False):
+        """
+        Most recent observation per (entity, date) query inside a lag window.
+
+        Parameters:
+        -----------
+        entity_keys : array-like
+            Entity key of each query (e.g. CompanyID of each deal)
+        dates : array-like of datetime
+            Query date (e.g. deal date)
+        min_lag_days : int
+            Observation must be at least this many days before the date
+        max_lag_days : int or None
+            Observation must be at most this many days before the date
+            (None = no limit)
+        same_day : bool
+            Whether an observation on the query date itself counts when
+            min_lag_days is 0. Default False (strictly before the deal).
+
+        Returns:
+        --------
+        DataFrame with the value columns plus 'lag_days', NaN where no
+        observation falls inside the window
+        """
+        days, valid = to_days(dates)
+        codes = self.entities.get_indexer(pd.Index(entity_keys))
+        valid &= codes >= 0
+
+        offset = max(min_lag_days, 0 if same_day else 1)
+        query = codes.astype(np.int64) * SPAN_DAYS + (days - offset - DAY_BASE)
+        pos = np.searchsorted(self.keys, query, side='right') - 1
+
+        found = valid & (pos >= 0)
+        found[found] &= self.codes[pos[found]] == codes[found]
+        lag_days = np.full(len(days), np.nan)
+        lag_days[found] = days[found] - self.days[pos[found]]
+        if max_lag_days is not None:
+            found &= ~(lag_days > max_lag_days)
+            lag_days[~found] = np.nan
+
+        rows = np.where(found, pos, -1)
+        result = self.values.reindex(rows).reset_index(drop=True)
+        result['lag_days'] = lag_days
+        return result
+
+    def interpolate(self, entity_keys, dates, value_col, method='linear', max_gap_days=None):
+        """
+        Value at each query date, interpolated between the bracketing
+        observations of the same entity.
+
+        An observation on the query date is returned as is. Otherwise the
+        latest observation before and the earliest observation after the date
+        are combined; note that the later one is measured after the date.
+
+        Parameters:
+        -----------
+        entity_keys : array-like
+            Entity key of each query
+        dates : array-like of datetime
+            Query date
+        value_col : str
+            Numeric value column to interpolate
+        method : {'linear', 'log'}
+            'log' interpolates log values (constant growth rate between
+            observations); it needs both values > 0
+        max_gap_days : int or None
+            Maximum distance between the two bracketing observations
+
+        Returns:
+        --------
+        ndarray of float, NaN where the date is not bracketed
+        """
+        if method not in ('linear', 'log'):
+            raise ValueError(f"method must be 'linear' or 'log', got {method!r}")
+
+        days, valid = to_days(dates)
+        codes = self.entities.get_indexer(pd.Index(entity_keys))
+        valid &= codes >= 0
+        values = self.values[value_col].to_numpy(dtype=float, na_value=np.nan)
+
+        query = codes.astype(np.int64) * SPAN_DAYS + (days - DAY_BASE)
+        prev_pos = np.searchsorted(self.keys, query, side='right') - 1
+        next_pos = prev_pos + 1
+
+        has_prev = valid & (prev_pos >= 0)
+        has_prev[has_prev] &= self.codes[prev_pos[has_prev]] == codes[has_prev]
+        has_next = valid & (next_pos < len(self.keys))
+        has_next[has_next] &= self.codes[next_pos[has_next]] == codes[has_next]
+
+        result = np.full(len(days), np.nan)
+
+        exact = has_prev.copy()
+        exact[exact] = self.days[prev_pos[exact]] == days[exact]
+        result[exact] = values[prev_pos[exact]]
+
+        bracketed = has_prev & has_next & ~exact
+        d0 = self.days[prev_pos[bracketed]]
+        d1 = self.days[next_pos[bracketed]]
+        v0 = values[prev_pos[bracketed]]
+        v1 = values[next_pos[bracketed]]
+        weight = (days[bracketed] - d0) / (d1 - d0)
+
+        if method == 'log':
+            with np.errstate(divide='ignore', invalid='ignore'):
+                v0 = np.where(v0 > 0, np.log(v0), np.nan)
+                v1 = np.where(v1 > 0, np.log(v1), np.nan)
+            interpolated = np.exp(v0 + weight * (v1 - v0))
+        else:
+            interpolated = v0 + weight * (v1 - v0)
+
+        if max_gap_days is not None:
+            interpolated = np.where(d1 - d0 <= max_gap_days, interpolated, np.nan)
+        result[bracketed] = interpolated
+        return result
+
+
+def history_cache_path(csv_path, key_col, date_col, value_cols, duplicates, cache_dir=DEFAULT_CACHE_DIR):
+    """Cache file name keyed by source path, size, mtime and the index settings"""
+    stat = os.stat(csv_path)
+    signature = '|'.join([
+        os.path.abspath(csv_path), str(stat.st_size), str(stat.st_mtime_ns),
+        key_col, date_col, ','.join(value_cols), duplicates
+    ])
+    digest = hashlib.sha1(signature.encode('utf-8')).hexdigest()[:16]
+    return Path(cache_dir) / f"{Path(csv_path).stem}_{digest}.pkl"
+
+
+def load_history(csv_path, key_col, date_col, value_cols, duplicates='first',
+                 cache_dir=DEFAULT_CACHE_DIR, use_cache=True):
+    """
+    Load a history CSV as a SortedHistory, reusing the on-disk sorted index
+    when the source file has not changed.
+
+    Parameters:
+    -----------
+    csv_path : str
+        Path to the history CSV (e.g. other_tables/CompanyEmployeeHistoryRelation.csv)
+    key_col, date_col : str
+        Entity key and observation date columns
+    value_cols : list of str
+        Value columns to keep
+    duplicates : {'first', 'last'}
+        Tie rule for same-date observations (see SortedHistory.from_frame)
+    cache_dir : str
+        Directory for cached sorted indexes
+    use_cache : bool
+        Set False to always rebuild from the CSV
+    """
+    value_cols = list(value_cols)
+    cache_path = history_cache_path(csv_path, key_col, date_col, value_cols, duplicates, cache_dir)
+    if use_cache and cache_path.exists():
+        print(f"   [OK] Using cached sorted index: {cache_path}")
+        return SortedHistory.load(cache_path)
+
+    history = pd.read_csv(csv_path, usecols=[key_col, date_col] + value_cols, low_memory=False)
+    sorted_history = SortedHistory.from_frame(history, key_col, date_col, value_cols, duplicates)
+    if use_cache:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        sorted_history.save(cache_path)
+        print(f"   [OK] Cached sorted index: {cache_path}")
+    return sorted_history
+
+
+def lag_covariates(deals, history, key_col, date_col, windows, same_day=False, prefix=''):
+    """
+    Point-in-time values for every deal and every lag window.
+
+    Parameters:
+    -----------
+    deals : DataFrame
+        Deal table with entity key and deal date columns
+    history : SortedHistory
+        Presorted history (see load_history / SortedHistory.from_frame)
+    key_col, date_col : str
+        Entity key and deal date columns in deals
+    windows : dict
+        Window name -> (min_lag_days, max_lag_days); max may be None
+    same_day : bool
+        Whether observations on the deal date count (see SortedHistory.lookup)
+    prefix : str
+        Prefix for output column names
+
+    Returns:
+    --------
+    DataFrame indexed like deals with '{prefix}{value}_{window}' and
+    '{prefix}Lag_Days_{window}' columns
+    """
+    result = pd.DataFrame(index=deals.index)
+    for name, (min_lag, max_lag) in windows.items():
+        matched = history.lookup(deals[key_col].values, deals[date_col].values,
+                                 min_lag_days=min_lag, max_lag_days=max_lag, same_day=same_day)
+        for col in history.values.columns:
+            result[f'{prefix}{col}_{name}'] = matched[col].values
+        result[f'{prefix}Lag_Days_{name}'] = matched['lag_days'].values
+    return result
+
+
+if __name__ == "__main__":
+    # Example: lag employee counts to every deal in Deal.csv
+    print("Loading deals...")
+    deals = pd.read_csv('core_tables/Deal.csv', usecols=['DealID', 'CompanyID', 'DealDate'])
+    deals['DealDate'] = pd.to_datetime(deals['DealDate'], errors='coerce')
+    print(f"   [OK] Loaded {len(deals):,} deals")
+
+    print("Loading employee history...")
+    history = load_history('other_tables/CompanyEmployeeHistoryRelation.csv',
+                           key_col='CompanyID', date_col='Date', value_cols=['EmployeeCount'])
+    print(f"   [OK] {len(history):,} observations for {len(history.entities):,} companies")
+
+    windows = {'90d': (30, 90), '180d': (30, 180), '365d': (30, 365), '730d': (30, 730)}
+    lagged = lag_covariates(deals, history, key_col='CompanyID', date_col='DealDate', windows=windows)
+    output = pd.concat([deals, lagged], axis=1)
+    output.to_csv('deal_lagged_covariates.csv', index=False)
+
+    for name in windows:
+        coverage = output[f'EmployeeCount_{name}'].notna().mean() * 100
+        print(f"   {name:>5s}: {coverage:5.1f}% of deals covered")
+    print("[OK] Saved: deal_lagged_covariates.csv")
@@ -24,6 +24,9 @@ Date: November 2024
 
 import pandas as pd
 import numpy as np
+from instrumentation import RunLog
+
+run = RunLog('create_elite_single_founder_dataset')
 
 print("="*80)
 print("CREATING ELITE SINGLE FOUNDER DATASET (IVY + TOP8 ONLY)")
@@ -36,6 +39,7 @@ print()
 
 print("Step 1: Loading single founder dataset")
 print("-" * 80)
+run.start("Step 1: Loading single founder dataset")
 
 single_df = pd.read_csv('deal_level_analysis_single_founders.csv')
 print(f"Total single founder deals: {len(single_df):,}")
@@ -51,6 +55,7 @@ print()
 
 print("Step 2: Filtering for Ivy and Top8 schools only")
 print("-" * 80)
+run.start("Step 2: Filtering for Ivy and Top8 schools only", single_df)
 
 # Keep only Ivy and Top8
 elite_df = single_df[single_df['Education_Group'].isin(['Ivy', 'Top8'])].copy()
@@ -72,6 +77,7 @@ print()
 
 print("Step 3: Creating Ivy vs Top8 binary indicator")
 print("-" * 80)
+run.start("Step 3: Creating Ivy vs Top8 binary indicator", elite_df)
 
 # Create a simple binary: 1 = Ivy, 0 = Top8
 elite_df['Ivy_vs_Top8'] = (elite_df['Education_Group'] == 'Ivy').astype(int)
@@ -87,6 +93,7 @@ print()
 
 print("Step 4: Summary Statistics for Elite Single Founder Dataset")
 print("-" * 80)
+run.start("Step 4: Summary Statistics for Elite Single Founder Dataset", elite_df)
 
 print("Deal Size Statistics (Elite Schools Only):")
 print(f"  Mean: ${elite_df['Deal_DealSize_num'].mean():,.0f}")
@@ -130,6 +137,7 @@ print()
 
 print("Step 5: Exporting files")
 print("-" * 80)
+run.start("Step 5: Exporting files", elite_df)
 
 # CSV export
 csv_filename = 'deal_level_analysis_single_founders_elite.csv'
@@ -154,6 +162,7 @@ print()
 
 print("Step 6: Creating documentation")
 print("-" * 80)
+run.start("Step 6: Creating documentation", elite_df)
 
 doc = f"""# Elite Single Founder Dataset Documentation (Ivy + Top8 Only)
 
@@ -391,4 +400,4 @@ print("  - Test if Ivy premium is vs. all others or vs. other elite")
 print("  - Check gender/industry heterogeneity within elite schools")
 print("="*80)
 
-
+run.close(elite_df)
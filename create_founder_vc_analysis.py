@@ -6,7 +6,17 @@ One row per founder
 import pandas as pd
 import numpy as np
 import os
+import sys
 from datetime import datetime
+from instrumentation import RunLog
+from lineage import LineageLog
+from intermediates import write_intermediate
+from surrogate_keys import KeyDictionary, load_key_dictionary
+from master_join import join_master, as_read_csv, missing_core_tables
+from education_records import load_education_records
+
+run = RunLog('create_founder_vc_analysis')
+lineage = LineageLog('create_founder_vc_analysis')
 
 print("=" * 100)
 print("FOUNDER-VC ANALYSIS FILE CREATION")
@@ -15,20 +25,50 @@ print(f"Started at: {datetime.now()}")
 
 # File paths
 master_file = r'G:\School\BOCCONI\1st semester\empirical\master_file.csv'
+if '--founders' in sys.argv:
+    # Founder-focused master (python create_master_file.py --founders): same output, far fewer rows
+    master_file = r'G:\School\BOCCONI\1st semester\empirical\master_file_founders.csv'
 output_file = r'G:\School\BOCCONI\1st semester\empirical\founder_vc_analysis.csv'
+education_file = r'G:\School\BOCCONI\1st semester\empirical\founder_vc_education.npz'
+core_tables_dir = r'G:\School\BOCCONI\1st semester\empirical\core_tables'
 
 print("\n" + "=" * 100)
 print("STEP 1: Loading master file...")
 print("=" * 100)
-
-# Load the master file
-print("Reading master file (this may take a few minutes due to file size)...")
-df = pd.read_csv(master_file, low_memory=False)
+run.start("STEP 1: Loading master file")
+
+if '--direct' in sys.argv:
+    # Only VC deals x founders, joined straight from the core tables (no master file needed);
+    # typed as read_csv types the master file, so every later step sees the same values
+    missing_tables = missing_core_tables(core_tables_dir)
+    if missing_tables:
+        print(f"ERROR: Core tables not found in {core_tables_dir}: {', '.join(missing_tables)}")
+        exit(1)
+    print(f"Joining founders and VC deals directly from {core_tables_dir}...")
+    df = as_read_csv(join_master(core_tables_dir, founders_only=True))
+else:
+    # Load the master file
+    print("Reading master file (this may take a few minutes due to file size)...")
+    df = pd.read_csv(master_file, low_memory=False)
 print(f"Loaded {len(df):,} rows with {len(df.columns)} columns")
 
+# Work on integer surrogate keys (same sort order as the IDs); natural IDs are restored before saving
+keys = load_key_dictionary(core_tables_dir, frame=df)
+try:
+    df = keys.encode_frame(df)
+except KeyError as error:
+    # The master file has IDs this core tables snapshot does not (e.g. built before a refresh)
+    print(f"   [CHECK] {error.args[0]}")
+    print("   [CHECK] Surrogate keys built from the loaded data instead")
+    keys = KeyDictionary.from_frame(df)
+    df = keys.encode_frame(df)
+lineage.keys = keys
+print(f"Encoded ID columns as integer surrogate keys ({len(keys):,} IDs in the key dictionary)")
+
 print("\n" + "=" * 100)
 print("STEP 2: Identifying VC-related terms and filtering...")
 print("=" * 100)
+run.start("STEP 2: Identifying VC-related terms and filtering", df)
 
 # Define VC-related terms (case insensitive matching)
 vc_terms = [
@@ -82,10 +122,12 @@ print(f"Found {founder_count:,} rows with founders")
 # Apply both filters
 print("\nApplying combined filters (VC deals + founders)...")
 filtered_df = df[(df['is_vc_deal'] == True) & (df['is_founder'] == True)].copy()
+lineage.record('VC deal filter', df, df['is_vc_deal'] == True)
+lineage.record('founder filter', df, df['is_founder'] == True, alive=df['is_vc_deal'] == True)
 print(f"After filtering: {len(filtered_df):,} rows")
-print(f"  Unique companies: {filtered_df['CompanyID'].nunique():,}")
-print(f"  Unique founders: {filtered_df['PersonID'].nunique():,}")
-print(f"  Unique deals: {filtered_df['DealID'].nunique():,}")
+print(f"  Unique companies: {lineage.after('CompanyID'):,}")
+print(f"  Unique founders: {lineage.after('PersonID'):,}")
+print(f"  Unique deals: {lineage.after('DealID'):,}")
 
 if len(filtered_df) == 0:
     print("\nWARNING: No data matches the criteria. Exiting.")
@@ -94,10 +136,20 @@ if len(filtered_df) == 0:
 print("\n" + "=" * 100)
 print("STEP 3: Finding first VC deal for each company...")
 print("=" * 100)
+run.start("STEP 3: Finding first VC deal for each company", filtered_df)
 
 # Convert deal date to datetime
 print("Parsing deal dates...")
-filtered_df['Deal_DealDate_parsed'] = pd.to_datetime(filtered_df['Deal_DealDate'], errors='coerce')
+# Each date is parsed on its own (first matching format, in the order normalize_date uses in
+# clean_founder_vc_final.py) so the result does not depend on which rows are in the frame
+deal_dates = filtered_df['Deal_DealDate'].astype('string').str.replace('.', '/', regex=False)
+filtered_df['Deal_DealDate_parsed'] = pd.to_datetime(deal_dates, format='%d/%m/%Y', errors='coerce')
+for date_format in ['%m/%d/%Y', '%Y-%m-%d', '%Y/%m/%d', '%m-%d-%Y', '%d-%m-%Y']:
+    unparsed = filtered_df['Deal_DealDate_parsed'].isna() & deal_dates.notna()
+    if not unparsed.any():
+        break
+    filtered_df.loc[unparsed, 'Deal_DealDate_parsed'] = pd.to_datetime(deal_dates[unparsed], format=date_format,
+                                                                       errors='coerce')
 
 # Sort by CompanyID and Deal Date
 print("Sorting by company and deal date...")
@@ -120,6 +172,7 @@ filtered_df = filtered_df.merge(first_vc_deals, on='CompanyID', how='left')
 print("\n" + "=" * 100)
 print("STEP 4: Handling missing Investor_DealSize...")
 print("=" * 100)
+run.start("STEP 4: Handling missing Investor_DealSize", filtered_df)
 
 # Group by company to handle deal size logic
 print("Checking for deals with missing Investor_DealSize...")
@@ -168,32 +221,51 @@ print(f"  {companies_with_size_change:,} companies had their deal adjusted to fi
 print("\n" + "=" * 100)
 print("STEP 5: Creating one row per founder with optimal VC deal...")
 print("=" * 100)
+run.start("STEP 5: Creating one row per founder with optimal VC deal", filtered_df)
 
 # Filter to keep only rows matching the optimal VC deal for each company
 print("Filtering to optimal VC deals...")
 analysis_df = filtered_df[filtered_df['DealID'] == filtered_df['OptimalVCDealID']].copy()
+lineage.record('optimal VC deal filter', filtered_df, analysis_df)
 
 print(f"After filtering to optimal deals: {len(analysis_df):,} rows")
-print(f"  Unique companies: {analysis_df['CompanyID'].nunique():,}")
-print(f"  Unique founders: {analysis_df['PersonID'].nunique():,}")
-print(f"  Unique deals: {analysis_df['DealID'].nunique():,}")
+print(f"  Unique companies: {lineage.after('CompanyID'):,}")
+print(f"  Unique founders: {lineage.after('PersonID'):,}")
+print(f"  Unique deals: {lineage.after('DealID'):,}")
 
 # Remove duplicate person-company-deal combinations
 print("\nRemoving duplicate person-company-deal combinations...")
-analysis_df = analysis_df.drop_duplicates(subset=['PersonID', 'CompanyID', 'DealID'])
+keep = ~analysis_df.duplicated(subset=['PersonID', 'CompanyID', 'DealID'])
+lineage.record('duplicate person-company-deal removal', analysis_df, keep)
+analysis_df = analysis_df[keep]
 print(f"After removing duplicates: {len(analysis_df):,} rows")
 
 # If a founder appears multiple times (multiple education records), take first occurrence
 print("\nEnsuring one row per founder (keeping first occurrence if duplicates exist)...")
 initial_count = len(analysis_df)
-analysis_df = analysis_df.drop_duplicates(subset=['PersonID'], keep='first')
+keep = ~analysis_df.duplicated(subset=['PersonID'], keep='first')
+lineage.record('one-row-per-founder filter', analysis_df, keep)
+analysis_df = analysis_df[keep]
 removed_count = initial_count - len(analysis_df)
 print(f"Removed {removed_count:,} duplicate founder records (likely due to multiple education entries)")
 print(f"Final dataset: {len(analysis_df):,} rows (one per founder)")
 
+# The row above keeps one education record per founder; all of them are kept alongside
+# (CSR arrays per founder) and summarized with segment reductions instead of extra rows
+print("\nCollecting all education records per founder...")
+founder_ids = keys.decode(analysis_df['PersonID'], 'PersonID')
+education_rows = filtered_df[['PersonID', 'CompanyID', 'DealID', 'InvestorID'] +
+                             [c for c in filtered_df.columns if c.startswith('Education_')]]
+education = load_education_records(core_tables_dir, founder_ids, frame=keys.decode_frame(education_rows.copy()))
+analysis_df = analysis_df.join(education.summary(index=analysis_df.index))
+print(f"  {education.n_records:,} education records for {len(education):,} founders "
+      f"({(education.counts() > 1).sum():,} founders with 2+ records)")
+print(f"  Founders with any Ivy degree: {analysis_df['Any_Ivy_Degree'].sum():,}")
+
 print("\n" + "=" * 100)
 print("STEP 6: Data quality validation...")
 print("=" * 100)
+run.start("STEP 6: Data quality validation", analysis_df)
 
 # Validation checks
 print("Validation checks:")
@@ -215,6 +287,7 @@ print(f"  [INFO] Rows with Deal_DealSize (alternative): {deals_with_deal_size:,}
 print("\n" + "=" * 100)
 print("STEP 7: Cleaning up and preparing final dataset...")
 print("=" * 100)
+run.start("STEP 7: Cleaning up and preparing final dataset", analysis_df)
 
 # Keep parsed date for summary before removing
 deal_date_min = analysis_df['Deal_DealDate_parsed'].min()
@@ -231,19 +304,25 @@ print(f"Final dataset has {len(analysis_df.columns)} columns")
 print("\n" + "=" * 100)
 print("STEP 8: Saving final analysis file...")
 print("=" * 100)
+run.start("STEP 8: Saving final analysis file", analysis_df)
 
-# Save the file
+# Save the file with the natural IDs
+analysis_df = keys.decode_frame(analysis_df)
 print(f"Saving to: {output_file}")
-analysis_df.to_csv(output_file, index=False)
-file_size_mb = os.path.getsize(output_file) / (1024**2)
+saved_files = write_intermediate(analysis_df, output_file, index=False)
 print(f"File saved successfully!")
-print(f"  File size: {file_size_mb:.2f} MB")
+for saved_file in saved_files:
+    print(f"  File size: {os.path.getsize(saved_file) / (1024**2):.2f} MB ({saved_file.name})")
 print(f"  Total rows: {len(analysis_df):,}")
 print(f"  Total columns: {len(analysis_df.columns)}")
 
+education.save(education_file)
+print(f"Education records saved to: {education_file}")
+
 print("\n" + "=" * 100)
 print("STEP 9: Creating summary statistics...")
 print("=" * 100)
+run.start("STEP 9: Creating summary statistics", analysis_df)
 
 # Format date range
 if pd.notna(deal_date_min) and pd.notna(deal_date_max):
@@ -302,3 +381,5 @@ print(f"Summary file: {summary_file}")
 print("\nThe file is ready for analysis of how founder backgrounds affect VC funding.")
 print("=" * 100)
 
+lineage.close()
+run.close(analysis_df)
@@ -0,0 +1,71 @@
+"""
+Script to create the master file from the core tables
+One row per deal x investor x company person x education record (60 columns)
+
+With --founders, builds only the rows create_founder_vc_analysis.py keeps
+(VC deals x founders) into master_file_founders.csv; the Person, Education,
+position and investor tables are semi-joined to founders and VC deals
+before the join.
+"""
+import os
+import sys
+from datetime import datetime
+from instrumentation import RunLog
+from master_join import join_master, missing_core_tables
+
+founders_only = '--founders' in sys.argv
+run = RunLog('create_master_file')
+
+print("=" * 100)
+print("MASTER FILE CREATION" + (" (FOUNDER-FOCUSED)" if founders_only else ""))
+print("=" * 100)
+print(f"Started at: {datetime.now()}")
+
+# File paths
+core_tables_dir = r'G:\School\BOCCONI\1st semester\empirical\core_tables'
+if founders_only:
+    output_file = r'G:\School\BOCCONI\1st semester\empirical\master_file_founders.csv'
+else:
+    output_file = r'G:\School\BOCCONI\1st semester\empirical\master_file.csv'
+
+print("\n" + "=" * 100)
+print("STEP 1: Loading and joining core tables...")
+print("=" * 100)
+run.start("STEP 1: Loading and joining core tables")
+
+missing_tables = missing_core_tables(core_tables_dir)
+if missing_tables:
+    print(f"ERROR: Core tables not found in {core_tables_dir}: {', '.join(missing_tables)}")
+    exit(1)
+
+if founders_only:
+    print("Semi-joining tables to founders (Person.PrimaryPositionLevel) and VC deals (Deal.DealClass)...")
+master_df = join_master(core_tables_dir, founders_only=founders_only)
+print(f"Joined {len(master_df):,} rows with {len(master_df.columns)} columns")
+print(f"  Unique companies: {master_df['CompanyID'].nunique():,}")
+print(f"  Unique deals: {master_df['DealID'].nunique():,}")
+print(f"  Unique people: {master_df['PersonID'].nunique():,}")
+
+print("\n" + "=" * 100)
+print("STEP 2: Saving master file...")
+print("=" * 100)
+run.start("STEP 2: Saving master file", master_df)
+
+print(f"Saving to: {output_file}")
+master_df.to_csv(output_file, index=False)
+file_size_mb = os.path.getsize(output_file) / (1024**2)
+print(f"File saved successfully!")
+print(f"  File size: {file_size_mb:.2f} MB")
+print(f"  Total rows: {len(master_df):,}")
+print(f"  Total columns: {len(master_df.columns)}")
+
+if founders_only:
+    print("\nBuild the founder analysis from it with:")
+    print("  python create_founder_vc_analysis.py --founders")
+
+print("\n" + "=" * 100)
+print("MASTER FILE CREATION COMPLETE")
+print("=" * 100)
+print(f"Completed at: {datetime.now()}")
+
+run.close(master_df)
@@ -24,6 +24,9 @@ Date: November 2024
 
 import pandas as pd
 import numpy as np
+from instrumentation import RunLog
+
+run = RunLog('create_single_founder_dataset')
 
 print("="*80)
 print("CREATING SINGLE FOUNDER DATASET WITH UNIVERSITY NAMES")
@@ -36,6 +39,7 @@ print()
 
 print("Step 1: Loading deal-level data and filtering for single founders")
 print("-" * 80)
+run.start("Step 1: Loading deal-level data and filtering for single founders")
 
 deal_df = pd.read_csv('deal_level_analysis.csv')
 print(f"Total deals in dataset: {len(deal_df):,}")
@@ -51,6 +55,7 @@ print()
 
 print("Step 2: Loading original founder-level data with university names")
 print("-" * 80)
+run.start("Step 2: Loading original founder-level data with university names", single_df)
 
 founder_df = pd.read_csv('founder_vc_final_formatted_with_groups.csv')
 print(f"Founder-level observations: {len(founder_df):,}")
@@ -67,6 +72,7 @@ print()
 
 print("Step 3: Matching university names back to single founder deals")
 print("-" * 80)
+run.start("Step 3: Matching university names back to single founder deals", single_df)
 
 # Merge on DealID (since TeamSize=1, there's only one founder per deal)
 # Use left join to keep all single founder deals
@@ -96,6 +102,7 @@ print()
 
 print("Step 4: Renaming columns and simplifying categories")
 print("-" * 80)
+run.start("Step 4: Renaming columns and simplifying categories", single_with_uni)
 
 # Rename columns to remove "Team" (since all are single founders)
 single_with_uni = single_with_uni.rename(columns={
@@ -126,6 +133,7 @@ print()
 
 print("Step 5: Creating university-specific dummy variables")
 print("-" * 80)
+run.start("Step 5: Creating university-specific dummy variables", single_with_uni)
 
 # For convenience in regression, create dummies for specific universities
 # These are the most common in the dataset
@@ -193,6 +201,7 @@ print()
 
 print("Step 6: Summary Statistics for Single Founder Dataset")
 print("-" * 80)
+run.start("Step 6: Summary Statistics for Single Founder Dataset", single_with_uni)
 
 print("Education Group Distribution (Single Founders):")
 print(single_with_uni['Education_Group'].value_counts())
@@ -217,6 +226,7 @@ print()
 
 print("Step 7: Exporting files")
 print("-" * 80)
+run.start("Step 7: Exporting files", single_with_uni)
 
 # CSV export
 csv_filename = 'deal_level_analysis_single_founders.csv'
@@ -241,6 +251,7 @@ print()
 
 print("Step 8: Creating documentation")
 print("-" * 80)
+run.start("Step 8: Creating documentation", single_with_uni)
 
 doc = f"""# Single Founder Dataset Documentation
 
@@ -441,3 +452,4 @@ print("  - Identify which specific universities drive results")
 print("  - Check for outliers at the university level")
 print("="*80)
 
+run.close(single_with_uni)
@@ -4,17 +4,82 @@ Detailed data quality and sanity check for the master file
 import pandas as pd
 import numpy as np
 
+from streaming_profiler import StreamingProfiler, read_chunks
+from dependency_check import FunctionalDependencyChecker
+
 print("=" * 80)
 print("MASTER FILE DATA QUALITY & SANITY CHECK")
 print("=" * 80)
 
-# Load the master file (with a sample for quick analysis)
-print("\nLoading master file for analysis...")
+# Stream the full master file once; every check below uses all rows
+print("\nStreaming master file for analysis (single pass over all rows)...")
 master_file = r'G:\School\BOCCONI\1st semester\empirical\master_file.csv'
+chunk_size = 100000
 
-# Read a sample first to understand the data
-sample_df = pd.read_csv(master_file, nrows=10000)
-print(f"Analyzing sample of 10,000 rows...")
+profiler = StreamingProfiler()
+
+# Relationship integrity: (child ID, parent ID) -> [rows with child, of which parent present]
+relationships = {
+    'Deals with Company association': ('DealID', 'CompanyID'),
+    'Investors with Deal association': ('InvestorID', 'DealID'),
+    'Persons with Company association': ('PersonID', 'PrimaryCompanyID'),
+}
+relationship_counts = {name: [0, 0] for name in relationships}
+
+# Completeness: entity ID -> {label: column}
+completeness_fields = {
+    'CompanyID': {
+        'CompanyName': 'CompanyName',
+        'FinancingStatus': 'Company_CompanyFinancingStatus',
+        'HQCountry': 'Company_HQCountry',
+        'YearFounded': 'Company_YearFounded',
+        'PrimaryIndustrySector': 'Company_PrimaryIndustrySector',
+    },
+    'DealID': {
+        'DealDate': 'Deal_DealDate',
+        'DealSize': 'Deal_DealSize',
+        'DealType': 'Deal_DealType',
+        'DealStatus': 'Deal_DealStatus',
+    },
+    'PersonID': {
+        'FullName': 'Person_FullName',
+        'Gender': 'Person_Gender',
+        'PrimaryPosition': 'Person_PrimaryPosition',
+    },
+}
+entity_rows = {entity: 0 for entity in completeness_fields}
+field_counts = {entity: {label: 0 for label in fields} for entity, fields in completeness_fields.items()}
+
+# Per-key value hashes for the dependency checks (CompanyID -> CompanyName, DealID -> Deal_DealDate, ...)
+dependency_checker = FunctionalDependencyChecker()
+
+# First record per entity type for the sample section
+sample_records = {}
+
+for chunk in read_chunks(master_file, chunksize=chunk_size):
+    profiler.update(chunk)
+    
+    for name, (child, parent) in relationships.items():
+        has_child = chunk[child].notna()
+        relationship_counts[name][0] += int(has_child.sum())
+        relationship_counts[name][1] += int(chunk.loc[has_child, parent].notna().sum())
+    
+    for entity, fields in completeness_fields.items():
+        entity_chunk = chunk[chunk[entity].notna()]
+        entity_rows[entity] += len(entity_chunk)
+        for label, column in fields.items():
+            field_counts[entity][label] += int(entity_chunk[column].notna().sum())
+    
+    dependency_checker.update(chunk)
+    
+    for entity in ['CompanyID', 'DealID', 'InvestorID', 'PersonID']:
+        if entity not in sample_records:
+            entity_chunk = chunk[chunk[entity].notna()]
+            if len(entity_chunk) > 0:
+                sample_records[entity] = entity_chunk.iloc[0]
+
+total_rows = profiler.rows
+print(f"Analyzed all {total_rows:,} rows")
 
 # Get basic info
 print("\n" + "=" * 80)
@@ -22,72 +87,49 @@ print("1. BASIC STATISTICS")
 print("=" * 80)
 
 # Count non-null values for key IDs
-print("\nKey ID Coverage in Sample:")
-print(f"  CompanyID:        {sample_df['CompanyID'].notna().sum():>8,} ({sample_df['CompanyID'].notna().sum()/len(sample_df)*100:>6.2f}%)")
-print(f"  DealID:           {sample_df['DealID'].notna().sum():>8,} ({sample_df['DealID'].notna().sum()/len(sample_df)*100:>6.2f}%)")
-print(f"  InvestorID:       {sample_df['InvestorID'].notna().sum():>8,} ({sample_df['InvestorID'].notna().sum()/len(sample_df)*100:>6.2f}%)")
-print(f"  PersonID:         {sample_df['PersonID'].notna().sum():>8,} ({sample_df['PersonID'].notna().sum()/len(sample_df)*100:>6.2f}%)")
+print("\nKey ID Coverage (full file):")
+print(f"  Total Rows:       {total_rows:>12,}")
+for id_column in ['CompanyID', 'DealID', 'InvestorID', 'PersonID']:
+    non_null = profiler.profiles[id_column].non_null
+    distinct = profiler.profiles[id_column].distinct_estimate()
+    approx = '' if profiler.profiles[id_column].topk.exact else '~'
+    print(f"  {id_column + ':':<17} {non_null:>12,} ({non_null/total_rows*100:>6.2f}%)  {approx}{distinct:,} unique")
 
 print("\n" + "=" * 80)
 print("2. RELATIONSHIP INTEGRITY CHECKS")
 print("=" * 80)
+print()
 
-# Check if deals always have a company
-deals_with_company = sample_df[sample_df['DealID'].notna()]['CompanyID'].notna().sum()
-total_deals = sample_df['DealID'].notna().sum()
-print(f"\nDeals with Company association: {deals_with_company}/{total_deals} ({deals_with_company/total_deals*100:.2f}%)")
-
-# Check if investors always have a deal
-investors_with_deal = sample_df[sample_df['InvestorID'].notna()]['DealID'].notna().sum()
-total_investors = sample_df['InvestorID'].notna().sum()
-print(f"Investors with Deal association: {investors_with_deal}/{total_investors} ({investors_with_deal/total_investors*100:.2f}%)")
-
-# Check if persons with company have valid company IDs
-persons_with_company = sample_df[sample_df['PersonID'].notna()]['PrimaryCompanyID'].notna().sum()
-total_persons = sample_df['PersonID'].notna().sum()
-print(f"Persons with Company association: {persons_with_company}/{total_persons} ({persons_with_company/total_persons*100:.2f}%)")
+for name, (with_child, with_parent) in relationship_counts.items():
+    pct = with_parent/with_child*100 if with_child else 0.0
+    print(f"{name}: {with_parent:,}/{with_child:,} ({pct:.2f}%)")
 
 print("\n" + "=" * 80)
 print("3. DATA COMPLETENESS FOR KEY FIELDS")
 print("=" * 80)
 
-# Company fields completeness
-print("\nCompany Fields (where CompanyID exists):")
-company_rows = sample_df[sample_df['CompanyID'].notna()]
-if len(company_rows) > 0:
-    print(f"  CompanyName:               {company_rows['CompanyName'].notna().sum()/len(company_rows)*100:>6.2f}%")
-    print(f"  FinancingStatus:           {company_rows['Company_CompanyFinancingStatus'].notna().sum()/len(company_rows)*100:>6.2f}%")
-    print(f"  HQCountry:                 {company_rows['Company_HQCountry'].notna().sum()/len(company_rows)*100:>6.2f}%")
-    print(f"  YearFounded:               {company_rows['Company_YearFounded'].notna().sum()/len(company_rows)*100:>6.2f}%")
-    print(f"  PrimaryIndustrySector:     {company_rows['Company_PrimaryIndustrySector'].notna().sum()/len(company_rows)*100:>6.2f}%")
-
-# Deal fields completeness
-print("\nDeal Fields (where DealID exists):")
-deal_rows = sample_df[sample_df['DealID'].notna()]
-if len(deal_rows) > 0:
-    print(f"  DealDate:                  {deal_rows['Deal_DealDate'].notna().sum()/len(deal_rows)*100:>6.2f}%")
-    print(f"  DealSize:                  {deal_rows['Deal_DealSize'].notna().sum()/len(deal_rows)*100:>6.2f}%")
-    print(f"  DealType:                  {deal_rows['Deal_DealType'].notna().sum()/len(deal_rows)*100:>6.2f}%")
-    print(f"  DealStatus:                {deal_rows['Deal_DealStatus'].notna().sum()/len(deal_rows)*100:>6.2f}%")
-
-# Person fields completeness
-print("\nPerson Fields (where PersonID exists):")
-person_rows = sample_df[sample_df['PersonID'].notna()]
-if len(person_rows) > 0:
-    print(f"  FullName:                  {person_rows['Person_FullName'].notna().sum()/len(person_rows)*100:>6.2f}%")
-    print(f"  Gender:                    {person_rows['Person_Gender'].notna().sum()/len(person_rows)*100:>6.2f}%")
-    print(f"  PrimaryPosition:           {person_rows['Person_PrimaryPosition'].notna().sum()/len(person_rows)*100:>6.2f}%")
+entity_titles = {'CompanyID': 'Company', 'DealID': 'Deal', 'PersonID': 'Person'}
+for entity, fields in completeness_fields.items():
+    print(f"\n{entity_titles[entity]} Fields (where {entity} exists):")
+    if entity_rows[entity] > 0:
+        for label in fields:
+            print(f"  {label + ':':<26} {field_counts[entity][label]/entity_rows[entity]*100:>6.2f}%")
 
 print("\n" + "=" * 80)
-print("4. NAME CONSISTENCY CHECK")
+print("4. CONSISTENCY CHECKS (FUNCTIONAL DEPENDENCIES)")
 print("=" * 80)
 
-# Check if CompanyNames are consistent
-print("\nChecking CompanyName consistency for same CompanyID...")
-name_check = sample_df[sample_df['CompanyID'].notna()].groupby('CompanyID')['CompanyName'].nunique()
-inconsistent = name_check[name_check > 1]
-print(f"  Companies with multiple names: {len(inconsistent)}")
-if len(inconsistent) > 0:
+# Company and deal fields must be constant per ID; downstream collapses take the first row
+print("\nChecking that company/deal fields are constant per ID...")
+dependency_summary = dependency_checker.summary()
+for _, row in dependency_summary.iterrows():
+    label = f"{row['Key']} -> {row['Dependent']}:"
+    print(f"  {label:<40} {row['Violating Keys']:>8,} of {row['Keys']:>10,} keys violate")
+    if row['Violating Keys'] > 0:
+        print(f"    Examples: {row['Example Keys']}")
+name_row = dependency_summary[dependency_summary['Dependent'] == 'CompanyName'].iloc[0]
+print(f"  Companies with multiple names: {name_row['Violating Keys']}")
+if name_row['Violating Keys'] > 0:
     print(f"  This is acceptable as companies may have name variations")
 
 print("\n" + "=" * 80)
@@ -95,61 +137,53 @@ print("5. SAMPLE RECORDS BY ENTITY TYPE")
 print("=" * 80)
 
 # Show sample records
-print("\nSample Company Record:")
-company_sample = sample_df[sample_df['CompanyID'].notna()].iloc[0]
-print(f"  CompanyID: {company_sample['CompanyID']}")
-print(f"  CompanyName: {company_sample['CompanyName']}")
-print(f"  Country: {company_sample['Company_HQCountry']}")
-print(f"  Industry: {company_sample['Company_PrimaryIndustrySector']}")
-
-print("\nSample Deal Record:")
-deal_sample = sample_df[sample_df['DealID'].notna()].iloc[0]
-print(f"  DealID: {deal_sample['DealID']}")
-print(f"  CompanyID: {deal_sample['CompanyID']}")
-print(f"  Deal Type: {deal_sample['Deal_DealType']}")
-print(f"  Deal Date: {deal_sample['Deal_DealDate']}")
-
-if sample_df['InvestorID'].notna().sum() > 0:
+if 'CompanyID' in sample_records:
+    print("\nSample Company Record:")
+    company_sample = sample_records['CompanyID']
+    print(f"  CompanyID: {company_sample['CompanyID']}")
+    print(f"  CompanyName: {company_sample['CompanyName']}")
+    print(f"  Country: {company_sample['Company_HQCountry']}")
+    print(f"  Industry: {company_sample['Company_PrimaryIndustrySector']}")
+
+if 'DealID' in sample_records:
+    print("\nSample Deal Record:")
+    deal_sample = sample_records['DealID']
+    print(f"  DealID: {deal_sample['DealID']}")
+    print(f"  CompanyID: {deal_sample['CompanyID']}")
+    print(f"  Deal Type: {deal_sample['Deal_DealType']}")
+    print(f"  Deal Date: {deal_sample['Deal_DealDate']}")
+
+if 'InvestorID' in sample_records:
     print("\nSample Investor Record:")
-    investor_sample = sample_df[sample_df['InvestorID'].notna()].iloc[0]
+    investor_sample = sample_records['InvestorID']
     print(f"  InvestorID: {investor_sample['InvestorID']}")
     print(f"  DealID: {investor_sample['DealID']}")
     print(f"  CompanyID: {investor_sample['CompanyID']}")
 
-if sample_df['PersonID'].notna().sum() > 0:
+if 'PersonID' in sample_records:
     print("\nSample Person Record:")
-    person_sample = sample_df[sample_df['PersonID'].notna()].iloc[0]
+    person_sample = sample_records['PersonID']
     print(f"  PersonID: {person_sample['PersonID']}")
     print(f"  FullName: {person_sample['Person_FullName']}")
     print(f"  PrimaryCompany: {person_sample['Person_PrimaryCompany']}")
     print(f"  Position: {person_sample['Person_PrimaryPosition']}")
 
 print("\n" + "=" * 80)
-print("6. READING FULL FILE STATISTICS")
+print("6. COLUMN PROFILES (FULL FILE)")
 print("=" * 80)
-
-print("\nReading full file metadata...")
-# Use chunksize to get accurate counts without loading entire file
-chunk_size = 100000
-total_rows = 0
-companies_count = 0
-deals_count = 0
-investors_count = 0
-persons_count = 0
-
-for chunk in pd.read_csv(master_file, chunksize=chunk_size, low_memory=False):
-    total_rows += len(chunk)
-    companies_count += chunk['CompanyID'].notna().sum()
-    deals_count += chunk['DealID'].notna().sum()
-    investors_count += chunk['InvestorID'].notna().sum()
-    persons_count += chunk['PersonID'].notna().sum()
-
-print(f"\nFull File Statistics:")
-print(f"  Total Rows:               {total_rows:>12,}")
-print(f"  Rows with CompanyID:      {companies_count:>12,} ({companies_count/total_rows*100:>6.2f}%)")
-print(f"  Rows with DealID:         {deals_count:>12,} ({deals_count/total_rows*100:>6.2f}%)")
-print(f"  Rows with InvestorID:     {investors_count:>12,} ({investors_count/total_rows*100:>6.2f}%)")
-print(f"  Rows with PersonID:       {persons_count:>12,} ({persons_count/total_rows*100:>6.2f}%)")
+print("\nNull counts are exact; unique counts are HyperLogLog estimates (marked ~)")
+print("unless exact; top values come from a Misra-Gries summary; quantiles from a t-digest.\n")
+
+print(f"  {'Column':<34} {'Non-null %':>10} {'Unique':>12}  {'Min':>12} {'Median':>12} {'Max':>12}  Top value")
+for profile in profiler.profiles.values():
+    stats = profile.summary(top_n=1)
+    unique = f"{stats['distinct']:,}" if stats['distinct_exact'] else f"~{stats['distinct']:,}"
+    if profile.is_numeric:
+        low, mid, high = f"{stats['min']:,.2f}", f"{stats['p50']:,.2f}", f"{stats['max']:,.2f}"
+    else:
+        low, mid, high = '', '', ''
+    top = str(stats['top_values'][0][0])[:30] if stats['top_values'] else ''
+    print(f"  {profile.name:<34} {100 - stats['null_pct']:>9.2f}% {unique:>12}  {low:>12} {mid:>12} {high:>12}  {top}")
 
 print("\n" + "=" * 80)
 print("7. FINAL ASSESSMENT")
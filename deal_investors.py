@@ -0,0 +1,225 @@
+"""
+Deal -> Investor Adjacency (CSR)
+================================
+
+prepare_for_stata.py used to count a deal's syndicate on the founder rows
+that reach it (group['InvestorID'].nunique()). Those rows were deduplicated
+to one per founder upstream, so the count depended on which investor rows
+happened to survive the fan-out. DealInvestorIndex is built once from the
+deal/investor relation itself, in compressed sparse row (CSR) form:
+
+    deal_ids    [n_deals]                sorted DealIDs
+    offsets     int64 [n_deals + 1]      deal i's investors are offsets[i]:offsets[i+1]
+    investor    int32 [n_edges]          code into .investor_ids
+    size        float64 [n_edges]        the investor's Investor_DealSize (NaN if unknown)
+    repeat      bool [n_edges]           the investor was already in an earlier deal of the company
+
+Each (deal, investor) pair is one edge (first relation row if listed twice).
+The per-deal metrics are weighted bincounts over the edges, one vectorized
+pass each:
+
+    SyndicateSize             distinct investors in the deal
+    Repeat_Investors          of which invested in an earlier deal of the same company (by deal date)
+    Investor_DealSize_Total   sum of the investors' Investor_DealSize (NaN if none is known)
+
+Sources, in order: core_tables/DealInvestorRelation.csv with Deal.csv
+(CompanyID, DealDate), else the master file's deal/investor columns (the
+same relation, fanned out), else the calling stage's own rows ([CHECK]:
+then only the investors on those rows are seen).
+
+Usage:
+    from deal_investors import load_deal_investor_index
+    index = load_deal_investor_index('core_tables', 'master_file.csv')
+    syndicates = index.metrics(deal_df['DealID'])
+
+Author: Empirical Methods Project
+"""
+
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+from streaming_profiler import read_chunks
+
+# Master file columns of the relation (core table columns are renamed to these)
+RELATION_COLUMNS = ['DealID', 'InvestorID', 'Investor_DealSize', 'CompanyID', 'Deal_DealDate']
+
+# Deal date formats in the order create_founder_vc_analysis.py tries them ('.' read as '/')
+DATE_FORMATS = ['%d/%m/%Y', '%m/%d/%Y', '%Y-%m-%d', '%Y/%m/%d', '%m-%d-%Y', '%d-%m-%Y']
+
+
+def parse_deal_dates(values):
+    """Each date parsed on its own with the first matching format"""
+    dates = pd.Series(values).astype('string').str.replace('.', '/', regex=False)
+    parsed = pd.to_datetime(dates, format=DATE_FORMATS[0], errors='coerce')
+    for date_format in DATE_FORMATS[1:]:
+        unparsed = parsed.isna() & dates.notna()
+        if not unparsed.any():
+            break
+        parsed[unparsed] = pd.to_datetime(dates[unparsed], format=date_format, errors='coerce')
+    return parsed
+
+
+class DealInvestorIndex:
+    """
+    Investors of every deal, in CSR form.
+
+    Parameters:
+    -----------
+    deal_ids : array
+        Sorted DealIDs (one segment each)
+    offsets : array
+        Segment boundaries (length len(deal_ids) + 1)
+    investor, size, repeat : arrays
+        Per-edge investor code, Investor_DealSize and repeat flag (see module docstring)
+    investor_ids : array
+        InvestorIDs (investor codes index into it)
+    """
+
+    def __init__(self, deal_ids, offsets, investor, size, repeat, investor_ids):
+        self.deal_ids = np.asarray(deal_ids, dtype=object)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.investor = np.asarray(investor, dtype=np.int32)
+        self.size = np.asarray(size, dtype=np.float64)
+        self.repeat = np.asarray(repeat, dtype=bool)
+        self.investor_ids = np.asarray(investor_ids, dtype=object)
+
+    @classmethod
+    def from_frame(cls, relation):
+        """
+        Index of deal/investor rows.
+
+        Parameters:
+        -----------
+        relation : DataFrame
+            RELATION_COLUMNS (master file names), one or more rows per (deal, investor)
+
+        Returns:
+        --------
+        DealInvestorIndex
+        """
+        edges = relation.dropna(subset=['DealID', 'InvestorID']).drop_duplicates(['DealID', 'InvestorID'])
+        dates = parse_deal_dates(edges['Deal_DealDate']).to_numpy()
+        # Repeat investor: the company's first deal with this investor is earlier than this deal
+        first_dates = (pd.Series(dates, index=edges.index)
+                       .groupby([edges['CompanyID'], edges['InvestorID']]).transform('min').to_numpy())
+        repeat = dates > first_dates
+
+        deal_ids, deal = np.unique(edges['DealID'].to_numpy(dtype=object).astype(str), return_inverse=True)
+        order = np.argsort(deal, kind='stable')
+        offsets = np.concatenate([[0], np.cumsum(np.bincount(deal, minlength=len(deal_ids)))])
+        investor, investor_ids = pd.factorize(edges['InvestorID'].to_numpy()[order])
+        size = pd.to_numeric(edges['Investor_DealSize'], errors='coerce').to_numpy(dtype=np.float64)
+        return cls(deal_ids.astype(object), offsets, investor, size[order], repeat[order],
+                   np.asarray(investor_ids, dtype=object))
+
+    def __len__(self):
+        return len(self.deal_ids)
+
+    @property
+    def n_edges(self):
+        return int(self.offsets[-1])
+
+    def edge_deals(self):
+        """Deal position of every edge"""
+        return np.repeat(np.arange(len(self.deal_ids)), np.diff(self.offsets))
+
+    def metrics(self, deal_ids=None):
+        """
+        Syndicate metrics per deal.
+
+        Parameters:
+        -----------
+        deal_ids : array-like or None
+            Deals to report (default: every deal in the index); deals without investors get
+            SyndicateSize 0, Repeat_Investors 0 and a missing Investor_DealSize_Total
+
+        Returns:
+        --------
+        DataFrame indexed by DealID: SyndicateSize, Repeat_Investors, Investor_DealSize_Total
+        """
+        deal = self.edge_deals()
+        n_deals = len(self.deal_ids)
+        known = ~np.isnan(self.size)
+        total = np.bincount(deal, weights=np.where(known, self.size, 0.0), minlength=n_deals)
+        metrics = pd.DataFrame({
+            'SyndicateSize': np.diff(self.offsets),
+            'Repeat_Investors': np.bincount(deal, weights=self.repeat, minlength=n_deals).astype(np.int64),
+            'Investor_DealSize_Total': np.where(np.bincount(deal, weights=known, minlength=n_deals) > 0,
+                                                total, np.nan),
+        }, index=pd.Index(self.deal_ids, name='DealID'))
+        if deal_ids is None:
+            return metrics
+        metrics = metrics.reindex(pd.Index(pd.unique(np.asarray(deal_ids, dtype=object)), name='DealID'))
+        return metrics.fillna({'SyndicateSize': 0, 'Repeat_Investors': 0}).astype(
+            {'SyndicateSize': np.int64, 'Repeat_Investors': np.int64})
+
+
+def read_relation(core_tables_dir):
+    """DealInvestorRelation.csv joined to Deal.csv's CompanyID and DealDate (master file column names)"""
+    relation = pd.concat(read_chunks(Path(core_tables_dir) / 'DealInvestorRelation.csv',
+                                     usecols=['DealID', 'InvestorID', 'DealSize']), ignore_index=True)
+    deals = pd.concat(read_chunks(Path(core_tables_dir) / 'Deal.csv', usecols=['DealID', 'CompanyID', 'DealDate']),
+                      ignore_index=True).drop_duplicates('DealID')
+    relation = relation.merge(deals, on='DealID', how='left')
+    return relation.rename(columns={'DealSize': 'Investor_DealSize', 'DealDate': 'Deal_DealDate'})
+
+
+def read_master_relation(master_file):
+    """Deal/investor columns of the master file, one row per (deal, investor) per chunk"""
+    parts = [chunk.drop_duplicates(['DealID', 'InvestorID'])
+             for chunk in read_chunks(master_file, usecols=RELATION_COLUMNS)]
+    return pd.concat(parts, ignore_index=True)
+
+
+def load_deal_investor_index(core_tables_dir='core_tables', master_file='master_file.csv', frame=None):
+    """
+    Deal -> investor index from the best available source.
+
+    Parameters:
+    -----------
+    core_tables_dir : str or Path
+        Directory with DealInvestorRelation.csv and Deal.csv
+    master_file : str or Path
+        Master file to use when the core tables are not available
+    frame : DataFrame or None
+        Rows with RELATION_COLUMNS to use when neither is available
+
+    Returns:
+    --------
+    DealInvestorIndex
+    """
+    core_tables_dir = Path(core_tables_dir)
+    if (core_tables_dir / 'DealInvestorRelation.csv').exists() and (core_tables_dir / 'Deal.csv').exists():
+        relation = read_relation(core_tables_dir)
+    elif Path(master_file).exists():
+        relation = read_master_relation(master_file)
+    elif frame is not None:
+        print(f"   [CHECK] No deal/investor relation in {core_tables_dir} or {master_file}; "
+              f"syndicates counted on the loaded rows only")
+        relation = frame[[c for c in RELATION_COLUMNS if c in frame.columns]].reindex(columns=RELATION_COLUMNS)
+    else:
+        raise FileNotFoundError(f"No DealInvestorRelation.csv in {core_tables_dir} and no {master_file}")
+    return DealInvestorIndex.from_frame(relation)
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+
+    core_tables_dir = sys.argv[1] if len(sys.argv) > 1 else 'core_tables'
+    if not Path(core_tables_dir).is_dir():
+        print(f"ERROR: {core_tables_dir} not found")
+        exit(1)
+
+    print("=" * 80)
+    print("DEAL -> INVESTOR INDEX")
+    print("=" * 80)
+    start = time.perf_counter()
+    index = load_deal_investor_index(core_tables_dir)
+    print(f"Built in {time.perf_counter() - start:.2f}s: {len(index):,} deals, {index.n_edges:,} deal-investor pairs, "
+          f"{len(index.investor_ids):,} investors")
+    start = time.perf_counter()
+    metrics = index.metrics()
+    print(f"Metrics in {time.perf_counter() - start:.3f}s\n")
+    print(metrics.describe().round(2).to_string())
@@ -0,0 +1,249 @@
+"""
+Functional Dependency Check
+===========================
+
+Verifies declared functional dependencies (key -> dependent columns) over a
+whole file in one streaming pass, e.g. every row of a CompanyID carries the
+same CompanyName. Downstream collapses take the first row per key, which
+silently picks an arbitrary value when a dependency is broken.
+
+For each dependency the checker keeps one 64-bit hash per key (the hash of
+the first value seen) in a sorted array, so memory grows with the number of
+keys rather than rows. Any later value with a different hash marks the key
+as violating; the distinct conflicting value hashes are kept only for
+violating keys.
+
+Usage:
+    python dependency_check.py [master_file.csv]
+
+Author: Empirical Methods Project
+"""
+
+import sys
+import numpy as np
+import pandas as pd
+
+from streaming_profiler import hash_values, read_chunks
+
+# Declared dependencies: key column -> columns that must be constant per key
+DEPENDENCIES = {
+    'CompanyID': ['CompanyName', 'Company_HQState_Province', 'Company_YearFounded'],
+    'DealID': ['Deal_DealDate', 'Deal_DealSize', 'Deal_DealType'],
+}
+
+MAX_EXAMPLES = 10
+
+
+class DependencyState:
+    """First-value hash per key for one dependency (key -> value), plus conflicts"""
+
+    def __init__(self, key_col, value_col, ignore_nulls=True, max_examples=MAX_EXAMPLES):
+        self.key_col = key_col
+        self.value_col = value_col
+        self.ignore_nulls = ignore_nulls
+        self.max_examples = max_examples
+        self.keys = np.empty(0, dtype=np.uint64)
+        self.values = np.empty(0, dtype=np.uint64)
+        self.rows = 0
+        self.conflicts = []
+        self.examples = {}
+
+    def update(self, chunk):
+        mask = chunk[self.key_col].notna()
+        if self.ignore_nulls:
+            mask &= chunk[self.value_col].notna()
+        if not mask.any():
+            return
+        frame = chunk.loc[mask, [self.key_col, self.value_col]]
+        self.rows += len(frame)
+
+        pairs = pd.DataFrame({
+            'key': hash_values(frame[self.key_col]),
+            'value': hash_values(frame[self.value_col]),
+            'key_text': frame[self.key_col].to_numpy(),
+            'value_text': frame[self.value_col].to_numpy()
+        }).drop_duplicates(['key', 'value'])
+
+        key_hashes = pairs['key'].to_numpy()
+        value_hashes = pairs['value'].to_numpy()
+
+        # Keys already seen in earlier chunks: compare against their first value
+        pos = np.searchsorted(self.keys, key_hashes)
+        found = pos < len(self.keys)
+        found[found] = self.keys[pos[found]] == key_hashes[found]
+        conflict = np.zeros(len(pairs), dtype=bool)
+        conflict[found] = self.values[pos[found]] != value_hashes[found]
+
+        # New keys: the first value in the chunk becomes the reference
+        new = pairs[~found]
+        first_new = ~new['key'].duplicated()
+        conflict[np.flatnonzero(~found)[~first_new.to_numpy()]] = True
+
+        if conflict.any():
+            conflicting = pairs[conflict]
+            self.conflicts.append(conflicting[['key', 'value']])
+            self._record_examples(conflicting, pairs, earlier=set(key_hashes[found & conflict]))
+
+        if first_new.any():
+            added = new[first_new.to_numpy()]
+            keys = np.concatenate([self.keys, added['key'].to_numpy()])
+            values = np.concatenate([self.values, added['value'].to_numpy()])
+            order = np.argsort(keys, kind='stable')
+            self.keys, self.values = keys[order], values[order]
+
+    def _record_examples(self, conflicting, pairs, earlier):
+        """Keep key text and the conflicting values seen, for the first few violating keys"""
+        for key_text, group in conflicting.groupby('key_text', sort=False):
+            if key_text not in self.examples:
+                if len(self.examples) >= self.max_examples:
+                    continue
+                # Only hashes are kept for earlier chunks, so the reference value may not be in this chunk
+                values = ['(earlier value)'] if group['key'].iloc[0] in earlier else []
+                values += list(pairs.loc[pairs['key_text'] == key_text, 'value_text'].unique())
+                self.examples[key_text] = values
+            else:
+                for value in group['value_text']:
+                    if value not in self.examples[key_text]:
+                        self.examples[key_text].append(value)
+
+    @property
+    def num_keys(self):
+        return len(self.keys)
+
+    def violations(self):
+        """
+        Violating keys and their number of distinct values.
+
+        Returns:
+        --------
+        Series indexed by key hash with the count of distinct values per violating key
+        """
+        if not self.conflicts:
+            return pd.Series(dtype=np.int64)
+        conflicts = pd.concat(self.conflicts).drop_duplicates()
+        return conflicts.groupby('key').size() + 1
+
+    def summary(self):
+        violations = self.violations()
+        return {
+            'Key': self.key_col,
+            'Dependent': self.value_col,
+            'Rows Checked': self.rows,
+            'Keys': self.num_keys,
+            'Violating Keys': len(violations),
+            'Violating %': round(len(violations) / self.num_keys * 100, 4) if self.num_keys else 0.0,
+            'Max Distinct Values': int(violations.max()) if len(violations) else 1,
+            'Example Keys': ', '.join(str(k) for k in self.examples)
+        }
+
+
+class FunctionalDependencyChecker:
+    """Streaming checker for a set of declared dependencies (key -> [dependent columns])"""
+
+    def __init__(self, dependencies=DEPENDENCIES, ignore_nulls=True, max_examples=MAX_EXAMPLES):
+        self.states = [
+            DependencyState(key_col, value_col, ignore_nulls, max_examples)
+            for key_col, value_cols in dependencies.items()
+            for value_col in value_cols
+        ]
+
+    @property
+    def columns(self):
+        return sorted({c for s in self.states for c in (s.key_col, s.value_col)})
+
+    def update(self, chunk):
+        for state in self.states:
+            state.update(chunk)
+        return self
+
+    def summary(self):
+        """DataFrame with one row per dependency"""
+        return pd.DataFrame([state.summary() for state in self.states])
+
+    def examples(self):
+        """Example violating keys with the values observed for them"""
+        rows = []
+        for state in self.states:
+            for key, values in state.examples.items():
+                rows.append({
+                    'Key': state.key_col,
+                    'Dependent': state.value_col,
+                    'Key Value': key,
+                    'Observed Values': ' | '.join(str(v) for v in values)
+                })
+        return pd.DataFrame(rows, columns=['Key', 'Dependent', 'Key Value', 'Observed Values'])
+
+
+def check_dependencies(df, dependencies=DEPENDENCIES, ignore_nulls=True):
+    """
+    Check dependencies on an in-memory DataFrame.
+
+    Parameters:
+    -----------
+    df : DataFrame
+        Data containing the key and dependent columns
+    dependencies : dict
+        Key column -> list of columns that must be constant per key
+    ignore_nulls : bool
+        Treat missing dependent values as compatible with any value
+
+    Returns:
+    --------
+    FunctionalDependencyChecker (use .summary() and .examples())
+    """
+    dependencies = {k: [c for c in cols if c in df.columns]
+                    for k, cols in dependencies.items() if k in df.columns}
+    checker = FunctionalDependencyChecker(dependencies, ignore_nulls)
+    return checker.update(df[checker.columns])
+
+
+def check_csv(csv_path, dependencies=DEPENDENCIES, chunksize=100_000, ignore_nulls=True):
+    """Stream a CSV (as text) through a FunctionalDependencyChecker"""
+    checker = FunctionalDependencyChecker(dependencies, ignore_nulls)
+    for chunk in read_chunks(csv_path, chunksize=chunksize, usecols=checker.columns):
+        checker.update(chunk)
+    return checker
+
+
+if __name__ == "__main__":
+    master_file = sys.argv[1] if len(sys.argv) > 1 else r'G:\School\BOCCONI\1st semester\empirical\master_file.csv'
+
+    print("=" * 80)
+    print("FUNCTIONAL DEPENDENCY CHECK (FULL FILE)")
+    print("=" * 80)
+    print(f"\nFile: {master_file}")
+    for key_col, value_cols in DEPENDENCIES.items():
+        print(f"  {key_col} -> {', '.join(value_cols)}")
+
+    checker = check_csv(master_file)
+    summary = checker.summary()
+
+    print("\n" + "=" * 80)
+    print("RESULTS")
+    print("=" * 80)
+    for _, row in summary.iterrows():
+        status = 'OK' if row['Violating Keys'] == 0 else 'VIOLATED'
+        print(f"\n[{status}] {row['Key']} -> {row['Dependent']}")
+        print(f"   Keys checked:    {row['Keys']:>12,}")
+        print(f"   Violating keys:  {row['Violating Keys']:>12,} ({row['Violating %']:.4f}%)")
+        if row['Violating Keys'] > 0:
+            print(f"   Max distinct values per key: {row['Max Distinct Values']}")
+
+    examples = checker.examples()
+    if len(examples) > 0:
+        print("\nExample violating keys:")
+        for _, row in examples.iterrows():
+            print(f"   {row['Key']}={row['Key Value']} {row['Dependent']}: {row['Observed Values']}")
+
+    summary.to_csv('dependency_report.csv', index=False, encoding='utf-8-sig')
+    examples.to_csv('dependency_violations.csv', index=False, encoding='utf-8-sig')
+    print(f"\nReports saved to: dependency_report.csv, dependency_violations.csv")
+
+    violated = summary[summary['Violating Keys'] > 0]
+    print("\n" + "=" * 80)
+    if len(violated) > 0:
+        print(f"DEPENDENCY CHECK: {len(violated)} dependency(ies) violated")
+        print("=" * 80)
+        exit(1)
+    print("DEPENDENCY CHECK: PASSED")
+    print("=" * 80)
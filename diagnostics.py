@@ -0,0 +1,150 @@
+"""
+Deferred Diagnostics
+====================
+
+Console diagnostics (distinct counts, value counts, sample rows) that are
+only computed when the verbosity level asks for them.
+
+Stages register diagnostics as they run; nothing is computed at
+registration. flush() evaluates the requested ones together and prints them
+in registration order:
+    - distinct counts on the same frame share one nunique() over all
+      requested columns
+    - repeated value counts of the same column are computed once
+    - distinct samples stop reading the frame once enough rows are found
+
+Verbosity (PIPELINE_VERBOSITY, or --quiet / --verbose on any pipeline script):
+    0  quiet    no diagnostics
+    1  normal   cheap diagnostics only (default)
+    2  verbose  everything, including value counts and samples of full frames
+
+Counts after a filter come from the lineage records (lineage.py) and are
+printed at every level.
+
+Usage:
+    diag = Diagnostics()
+    diag.unique(df, ['PersonID', 'CompanyID'])
+    diag.value_counts(df, 'Education_Degree', "Top 15 most common degrees", top=15)
+    diag.sample(df, ['Education_Degree', 'Education_Category'], "Sample categorizations", n=20, distinct=True)
+    diag.add("Non-US locations found", lambda: df.loc[~us, 'Company_HQState_Province'].value_counts().head(10))
+    diag.flush()                              # where the output belongs
+
+    PIPELINE_VERBOSITY=2 python categorize_and_format.py
+    python categorize_and_format.py --verbose
+
+Author: Empirical Methods Project
+"""
+
+import os
+import sys
+import pandas as pd
+
+QUIET, NORMAL, VERBOSE = 0, 1, 2
+
+# Labels for the entity columns in distinct counts
+ENTITY_LABELS = {
+    'PersonID': 'founders',
+    'CompanyID': 'companies',
+    'DealID': 'deals',
+}
+
+
+def verbosity():
+    """Verbosity level from the command line (--quiet / --verbose) or PIPELINE_VERBOSITY"""
+    if '--quiet' in sys.argv:
+        return QUIET
+    if '--verbose' in sys.argv:
+        return VERBOSE
+    try:
+        return int(os.environ.get('PIPELINE_VERBOSITY', NORMAL))
+    except ValueError:
+        return NORMAL
+
+
+def distinct_head(df, n):
+    """Same rows as df.drop_duplicates().head(n), reading only as much of df as needed"""
+    size = max(n * 10, 1000)
+    while True:
+        head = df.iloc[:size].drop_duplicates()
+        if len(head) >= n or size >= len(df):
+            return head.head(n)
+        size *= 8
+
+
+class Diagnostics:
+    """
+    Diagnostics registered during a stage and evaluated in batches.
+
+    Parameters:
+    -----------
+    level : int or None
+        Verbosity level (default: verbosity())
+    """
+
+    def __init__(self, level=None):
+        self.level = verbosity() if level is None else level
+        self.pending = []
+
+    def enabled(self, level=VERBOSE):
+        return self.level >= level
+
+    def _register(self, level, kind, frame, spec):
+        if self.enabled(level):
+            self.pending.append((kind, frame, spec))
+
+    def unique(self, df, columns, title=None, level=VERBOSE):
+        """Distinct non-missing values per column"""
+        self._register(level, 'unique', df, {'columns': list(columns), 'title': title})
+
+    def value_counts(self, df, column, title, top=None, percent=False, level=VERBOSE):
+        """Most common values of a column (with their share of rows if percent)"""
+        self._register(level, 'value_counts', df, {'column': column, 'title': title, 'top': top,
+                                                   'percent': percent})
+
+    def sample(self, df, columns, title, n=5, distinct=False, level=VERBOSE):
+        """First n rows (first n distinct rows if distinct) of the given columns"""
+        self._register(level, 'sample', df, {'columns': list(columns), 'title': title, 'n': n,
+                                             'distinct': distinct})
+
+    def add(self, title, compute, level=VERBOSE):
+        """Any deferred computation; its result is printed under the title"""
+        self._register(level, 'custom', None, {'title': title, 'compute': compute})
+
+    def flush(self):
+        """Evaluate and print the pending diagnostics"""
+        pending, self.pending = self.pending, []
+        if not pending:
+            return
+
+        # One nunique() per frame over every column requested for it
+        requested = {}
+        for kind, frame, spec in pending:
+            if kind == 'unique':
+                frame_columns = requested.setdefault(id(frame), (frame, {}))[1]
+                frame_columns.update(dict.fromkeys(c for c in spec['columns'] if c in frame.columns))
+        distinct = {key: frame[list(columns)].nunique() for key, (frame, columns) in requested.items()}
+        counts = {}
+
+        for kind, frame, spec in pending:
+            if spec['title']:
+                print(f"\n{spec['title']}:" if kind != 'unique' else spec['title'])
+            if kind == 'unique':
+                for column in spec['columns']:
+                    if column in frame.columns:
+                        label = ENTITY_LABELS.get(column, f"{column} values")
+                        print(f"  Unique {label}: {distinct[id(frame)][column]:,}")
+            elif kind == 'value_counts':
+                key = (id(frame), spec['column'])
+                if key not in counts:
+                    counts[key] = frame[spec['column']].value_counts()
+                values = counts[key] if spec['top'] is None else counts[key].head(spec['top'])
+                for value, count in values.items():
+                    share = f" ({count / len(frame) * 100:5.2f}%)" if spec['percent'] else ''
+                    print(f"  {str(value):50s} : {count:6,}{share}")
+            elif kind == 'sample':
+                rows = frame[spec['columns']]
+                rows = distinct_head(rows, spec['n']) if spec['distinct'] else rows.head(spec['n'])
+                print(rows.to_string(index=False))
+            else:
+                result = spec['compute']()
+                print(result.to_string() if isinstance(result, (pd.Series, pd.DataFrame)) else result)
@@ -0,0 +1,465 @@
+"""
+Per-Founder Education Records (CSR)
+===================================
+
+The master file has one row per education record, so the founder table keeps
+only one record per founder (the first). Keeping every record as rows would
+multiply the table. EducationRecords keeps them next to the founder table in
+compressed sparse row (CSR) form instead:
+
+    offsets     int64 [n_founders + 1]   founder i's records are offsets[i]:offsets[i+1]
+    institute   int32 [n_records]        code into .institutes (-1 = missing)
+    degree      int8  [n_records]        code into DEGREE_CATEGORIES (categorize_degree)
+    major       int8  [n_records]        code into MAJOR_CATEGORIES (categorize_major)
+
+Founder-level measures over all records ("any Ivy degree", highest degree,
+best pedigree) are segment reductions (np.logical_or.reduceat,
+np.maximum.reduceat) over the flat arrays, one vectorized pass each.
+The categorizers run once per distinct text value, not once per record.
+
+The degree and major categorizers (categorize_and_format.py,
+prepare_for_stata.py) and the university groups emulating the workbook step
+(benchmark.py) are defined here so every stage categorizes the same way.
+
+Usage:
+    from education_records import load_education_records
+    records = load_education_records('core_tables', founders['PersonID'])
+    founders = founders.join(records.summary())     # Education_Records, Any_Ivy_Degree, ...
+    records.save('founder_vc_education.npz')
+
+Author: Empirical Methods Project
+"""
+
+import re
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+from master_join import read_source
+
+EDUCATION_COLUMNS = ['Education_Degree', 'Education_Major_Concentration', 'Education_Institute']
+
+# Ordered by level, so a higher code is a higher degree (ranks as in prepare_for_stata.py)
+DEGREE_CATEGORIES = ['Other', 'CHA', 'ASC', 'BSC', 'MSC', 'MBA', 'JD', 'PHD']
+
+MAJOR_CATEGORIES = ['Missing', 'Other', 'CS_Engineering', 'Natural_Sciences', 'Medicine_Health',
+                    'Business_Econ', 'Social_Sciences', 'Humanities_Arts', 'Law']
+
+# University groups by partial name match (as done by hand in the workbook)
+IVY_PATTERNS = ['Harvard', 'Yale', 'Princeton', 'Columbia', 'Pennsylvania', 'Penn', 'Wharton',
+                'Brown University', 'Dartmouth', 'Cornell']
+TOP8_PATTERNS = ['Stanford', 'Massachusetts Institute of Technology', 'MIT', 'Berkeley',
+                 'California Institute of Technology', 'Caltech', 'University of Chicago',
+                 'Northwestern', 'Duke', 'Johns Hopkins']
+
+# Pedigree scores as prepare_for_stata.py's Max_Pedigree
+PEDIGREE = {'Other': 1, 'Top8': 2, 'Ivy': 3}
+
+
+def categorize_degree(degree_value):
+    """
+    Categorize degree into: ASC, BSC, MSC, JD, PHD, MBA, CHA
+    Conservative approach - when unclear, use Other
+
+    Categories:
+    - ASC: Associate degrees or equivalent
+    - BSC: Bachelor's degrees or equivalent
+    - MSC: Master's degrees or equivalent (excluding MBA and JD)
+    - JD: Juris Doctor degrees
+    - PHD: Doctoral or PhD degrees
+    - MBA: Master of Business Administration degrees
+    - CHA: Chartered/Certified professional accountant and analyst certifications
+    - Other: Everything else
+    """
+    if pd.isna(degree_value) or degree_value == '' or str(degree_value).strip() == '':
+        return 'Other'
+
+    degree_str = str(degree_value).strip().lower()
+
+    # If it just says "degree" or vague terms, put in Other
+    if degree_str in ['degree', 'graduate', 'major', 'minor', 'undergraduate studies']:
+        return 'Other'
+
+    # CHA: Chartered/Certified professional accountant and analyst certifications
+    # Check for CPA, CFA, CA, Chartered Accountant, etc.
+    cha_patterns = [
+        'cpa', 'c.p.a', 'certified public accountant',
+        'cfa', 'c.f.a', 'chartered financial analyst',
+        'chartered accountant', 'ca ', ' ca', 'c.a',
+        'cma', 'c.m.a', 'certified management accountant',
+        'acca', 'chartered certified accountant'
+    ]
+    for pattern in cha_patterns:
+        if pattern in degree_str:
+            return 'CHA'
+
+    # MBA: Master of Business Administration (check BEFORE general masters)
+    # This is critical - MBA must be checked before MSC
+    mba_patterns = [
+        'mba', 'm.b.a', 'master of business administration',
+        'emba', 'e.m.b.a', 'executive mba'
+    ]
+    for pattern in mba_patterns:
+        if pattern in degree_str:
+            return 'MBA'
+
+    # JD: Juris Doctor (check BEFORE PhDs)
+    jd_patterns = [
+        'jd', 'j.d', 'juris doctor', 'doctor of law',
+        'jd/mba', 'mba/jd'
+    ]
+    for pattern in jd_patterns:
+        if pattern in degree_str:
+            return 'JD'
+
+    # PHD: Doctoral or PhD degrees
+    phd_patterns = [
+        'ph.d', 'phd', 'ph. d', 'doctor of philosophy',
+        'doctorate', 'doctoral', 'dphil', 'd.phil',
+        'md/phd', 'phd/md',
+        'doctor of science', 'dsc', 'd.sc', 'ds (doctor',
+        'doctor of medicine', 'md (doctor', 'm.d (doctor',
+        'doctor of dental', 'dds', 'd.d.s', 'dmd', 'd.m.d',
+        'doctor of pharmacy', 'pharm.d', 'pharmd',
+        'doctor of veterinary', 'dvm', 'd.v.m',
+        'ded (doctor', 'ed.d', 'doctor of education',
+        'psyd', 'psy.d', 'doctor of psychology',
+        'postdoc', 'post doc', 'post-doc', 'postdoctoral',
+        'post doctoral', 'post-doctoral', 'post graduate studies',
+        'honorary doctorate', 'mbbs'
+    ]
+    for pattern in phd_patterns:
+        if pattern in degree_str:
+            return 'PHD'
+
+    # MSC: Master's degrees (excluding MBA and JD, which were already checked)
+    msc_patterns = [
+        'master', 'masters', "master's",
+        'msc', 'm.sc', 'ms (master', 'm.s (master',
+        'ma (master', 'm.a (master',
+        'me (master', 'm.eng', 'master of engineering',
+        'mem ', 'm.e.m', 'master of engineering management',
+        'mfa', 'm.f.a', 'master of fine arts',
+        'mpa', 'm.p.a', 'master of public',
+        'mpp', 'm.p.p', 'master of public policy',
+        'mph', 'm.p.h', 'master of public health',
+        'mps', 'm.p.s', 'master of professional studies',
+        'msw', 'm.s.w', 'master of social work',
+        'med ', 'm.ed', 'master of education',
+        'mdes', 'm.des', 'master of design',
+        'mas (master', 'm.a.s (master',
+        'mj (master', 'master of jurisprudence',
+        'llm', 'll.m', 'master of law',
+        'm.phil', 'master of philosophy',
+        'm.tech', 'master of technology',
+        'integrated masters', 'postgraduate degree',
+        'post graduate diploma', 'pgdm'
+    ]
+    for pattern in msc_patterns:
+        if pattern in degree_str:
+            return 'MSC'
+
+    # BSC: Bachelor's degrees or equivalent
+    bsc_patterns = [
+        'bachelor', 'bachelors', "bachelor's",
+        'ba (bachelor', 'b.a (bachelor',
+        'bs (bachelor', 'b.s (bachelor', 'bsc ',
+        'bba', 'b.b.a', 'bachelor of business',
+        'be (bachelor', 'b.e (bachelor', 'be/bs',
+        'b.tech', 'bachelor of technology', 'btech',
+        'bfa', 'b.f.a', 'bachelor of fine arts',
+        'b.comm', 'bachelor of commerce', 'bcomm',
+        'llb', 'll.b', 'bachelor of law',
+        'bdes', 'b.des', 'bachelor of design',
+        'bas (bachelor', 'b.a.s (bachelor',
+        'bsbe', 'bsfs',
+        'dual b.s', 'dual-degree', 'sb & sm',
+        'engineering diploma', 'business management diploma',
+        'honors business administration', 'honors degree',
+        'graduated cum laude'
+    ]
+    for pattern in bsc_patterns:
+        if pattern in degree_str:
+            return 'BSC'
+
+    # ASC: Associate degrees or equivalent
+    asc_patterns = [
+        'aa (associate', 'a.a (associate',
+        'as (associate', 'a.s (associate',
+        'aas (associate', 'a.a.s (associate',
+        'associate degree', 'associate of'
+    ]
+    for pattern in asc_patterns:
+        if pattern in degree_str:
+            return 'ASC'
+
+    # Catch-all for vague qualifications
+    # Check for standalone "diploma" (not part of a degree name like "engineering diploma")
+    if degree_str == 'diploma' or any(term in degree_str for term in ['certificate', 'fellowship', 'amp', ' cs', 'dea,', 'graduate engineer']):
+        return 'Other'
+
+    # If nothing matches, return Other
+    return 'Other'
+
+
+def categorize_major(major_str):
+    """Map major to one of 8 broad categories"""
+    if pd.isna(major_str):
+        return 'Missing'
+
+    major_lower = str(major_str).lower()
+
+    # Computer Science / Engineering
+    cs_keywords = ['computer', 'software', 'programming', 'information system',
+                   'information technology', 'data science', 'artificial intelligence',
+                   'machine learning', 'electrical engineering', 'computer engineering',
+                   'systems engineering', 'engineering', 'mechanical', 'civil',
+                   'industrial', 'aerospace', 'chemical engineering', 'bioengineering']
+    if any(kw in major_lower for kw in cs_keywords):
+        return 'CS_Engineering'
+
+    # Natural Sciences
+    science_keywords = ['mathematics', 'physics', 'chemistry', 'biology', 'math',
+                       'biochemistry', 'biophysics', 'neuroscience', 'molecular',
+                       'genetics', 'applied math', 'statistics', 'astrophysics',
+                       'geology', 'environmental science']
+    if any(kw in major_lower for kw in science_keywords):
+        return 'Natural_Sciences'
+
+    # Medicine / Health Sciences
+    med_keywords = ['medicine', 'medical', 'health', 'nursing', 'pharmacy',
+                   'biomedical', 'clinical', 'anatomy', 'physiology', 'pathology',
+                   'immunology', 'epidemiology', 'public health', 'dentistry']
+    if any(kw in major_lower for kw in med_keywords):
+        return 'Medicine_Health'
+
+    # Business / Finance / Economics
+    business_keywords = ['business', 'finance', 'economics', 'accounting', 'marketing',
+                        'management', 'mba', 'entrepreneurship', 'commerce', 'banking',
+                        'strategy', 'operations', 'real estate', 'investment']
+    if any(kw in major_lower for kw in business_keywords):
+        return 'Business_Econ'
+
+    # Social Sciences
+    social_keywords = ['psychology', 'sociology', 'anthropology', 'political science',
+                      'government', 'international relations', 'policy', 'geography',
+                      'social work', 'education', 'communications']
+    if any(kw in major_lower for kw in social_keywords):
+        return 'Social_Sciences'
+
+    # Humanities / Arts
+    humanities_keywords = ['history', 'english', 'literature', 'philosophy', 'art',
+                          'music', 'theater', 'language', 'linguistics', 'creative writing',
+                          'film', 'design', 'architecture', 'media studies']
+    if any(kw in major_lower for kw in humanities_keywords):
+        return 'Humanities_Arts'
+
+    # Law
+    if 'law' in major_lower or 'legal' in major_lower or 'jurisprudence' in major_lower:
+        return 'Law'
+
+    # Default
+    return 'Other'
+
+
+def university_group(institutes):
+    """Ivy / Top8 / Other by partial name match (as done by hand in the workbook)"""
+    names = institutes.fillna('')
+    ivy = names.str.contains('|'.join(re.escape(p) for p in IVY_PATTERNS))
+    top8 = names.str.contains('|'.join(re.escape(p) for p in TOP8_PATTERNS))
+    return pd.Series('Other', index=institutes.index).mask(top8, 'Top8').mask(ivy, 'Ivy')
+
+
+def _category_codes(values, categorize, categories, dtype=np.int8):
+    """Category codes of a text column, categorizing each distinct value once"""
+    codes, uniques = pd.factorize(values)
+    lookup = {category: code for code, category in enumerate(categories)}
+    unique_codes = np.array([lookup[categorize(u)] for u in uniques] + [lookup[categorize(np.nan)]], dtype=dtype)
+    # Missing values have code -1, i.e. the appended categorize(NaN) entry
+    return unique_codes[codes]
+
+
+def _segment_reduce(ufunc, values, offsets, empty):
+    """ufunc.reduceat over CSR segments, with `empty` for segments without records"""
+    counts = np.diff(offsets)
+    result = np.full(len(counts), empty, dtype=np.result_type(values, np.asarray(empty)))
+    nonempty = counts > 0
+    if nonempty.any():
+        # Empty segments in between have zero length, so each reduction stops at its own end
+        result[nonempty] = ufunc.reduceat(values, offsets[:-1][nonempty])
+    return result
+
+
+class EducationRecords:
+    """
+    All education records of a list of founders, in CSR form.
+
+    Parameters:
+    -----------
+    person_ids : array
+        Founder PersonIDs, in founder table order (one segment each)
+    offsets : array
+        Segment boundaries (length len(person_ids) + 1)
+    institute, degree, major : arrays
+        Per-record codes (see module docstring)
+    institutes : array
+        Institute names (institute codes index into it)
+    """
+
+    def __init__(self, person_ids, offsets, institute, degree, major, institutes):
+        self.person_ids = np.asarray(person_ids, dtype=object)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.institute = np.asarray(institute, dtype=np.int32)
+        self.degree = np.asarray(degree, dtype=np.int8)
+        self.major = np.asarray(major, dtype=np.int8)
+        self.institutes = np.asarray(institutes, dtype=object)
+
+    @classmethod
+    def from_frame(cls, education, person_ids):
+        """
+        CSR records of the founders in person_ids from one-row-per-record education data.
+
+        Parameters:
+        -----------
+        education : DataFrame
+            PersonID and EDUCATION_COLUMNS, one row per education record (any order)
+        person_ids : array-like
+            Founder PersonIDs (distinct), in the order of the founder table
+
+        Returns:
+        --------
+        EducationRecords (records of each founder in their order in `education`)
+        """
+        person_ids = pd.Index(person_ids)
+        founder = person_ids.get_indexer(education['PersonID'])
+        rows = np.flatnonzero(founder >= 0)
+        # Stable, so each founder's records keep their order
+        rows = rows[np.argsort(founder[rows], kind='stable')]
+        counts = np.bincount(founder[rows], minlength=len(person_ids))
+        offsets = np.concatenate([[0], np.cumsum(counts)])
+
+        records = education.iloc[rows]
+        institute, institutes = pd.factorize(records['Education_Institute'])
+        return cls(person_ids.to_numpy(dtype=object), offsets, institute,
+                   _category_codes(records['Education_Degree'], categorize_degree, DEGREE_CATEGORIES),
+                   _category_codes(records['Education_Major_Concentration'], categorize_major, MAJOR_CATEGORIES),
+                   np.asarray(institutes, dtype=object))
+
+    @classmethod
+    def concat(cls, parts):
+        """Records of several founder lists (e.g. shards) one after the other"""
+        institutes, institute = pd.Index([]), []
+        for part in parts:
+            # Institute codes are per part; map them into the combined name list
+            names = pd.Index(part.institutes)
+            institutes = institutes.append(names[~names.isin(institutes)])
+            codes = np.append(institutes.get_indexer(names), -1)
+            institute.append(codes[part.institute])
+        starts = np.cumsum([0] + [p.n_records for p in parts[:-1]])
+        offsets = np.concatenate([[0]] + [p.offsets[1:] + start for p, start in zip(parts, starts)])
+        return cls(np.concatenate([p.person_ids for p in parts]), offsets, np.concatenate(institute),
+                   np.concatenate([p.degree for p in parts]), np.concatenate([p.major for p in parts]),
+                   institutes.to_numpy(dtype=object))
+
+    def select(self, person_ids):
+        """Records of the given founders, in that order (founders not in these records get none)"""
+        position = pd.Index(self.person_ids).get_indexer(np.asarray(person_ids, dtype=object))
+        found = position >= 0
+        counts = np.where(found, self.counts()[np.where(found, position, 0)], 0)
+        starts = np.where(found, self.offsets[:-1][np.where(found, position, 0)], 0)
+        offsets = np.concatenate([[0], np.cumsum(counts)])
+        # Gather each selected segment: record j of founder i is starts[i] + j
+        rows = np.repeat(starts - offsets[:-1], counts) + np.arange(offsets[-1])
+        institute, institutes = pd.factorize(np.append(self.institutes, np.nan)[self.institute[rows]])
+        return EducationRecords(person_ids, offsets, institute, self.degree[rows], self.major[rows],
+                                np.asarray(institutes, dtype=object))
+
+    def __len__(self):
+        return len(self.person_ids)
+
+    @property
+    def n_records(self):
+        return int(self.offsets[-1])
+
+    def counts(self):
+        """Number of education records per founder"""
+        return np.diff(self.offsets)
+
+    def pedigree(self):
+        """Per-record pedigree score (PEDIGREE; a missing institute is Other, as in the workbook)"""
+        groups = university_group(pd.Series(self.institutes, dtype=object)).map(PEDIGREE).to_numpy(dtype=np.int8)
+        return np.append(groups, np.int8(PEDIGREE['Other']))[self.institute]
+
+    def any(self, mask):
+        """Per founder: does any record satisfy the per-record boolean mask"""
+        return _segment_reduce(np.logical_or, np.asarray(mask, dtype=bool), self.offsets, False)
+
+    def max(self, values, empty=-1):
+        """Per founder: maximum of a per-record value (`empty` for founders without records)"""
+        return _segment_reduce(np.maximum, np.asarray(values), self.offsets, empty)
+
+    def summary(self, index=None):
+        """
+        Founder-level measures over all records.
+
+        Returns:
+        --------
+        DataFrame (one row per founder, index `index` or the PersonIDs):
+            Education_Records, Any_Ivy_Degree (0/1), Highest_Degree (DEGREE_CATEGORIES),
+            Best_Pedigree (Ivy=3, Top8=2, Other=1); degree and pedigree missing without records
+        """
+        pedigree = self.pedigree()
+        highest = self.max(self.degree)
+        best = self.max(pedigree, empty=0)
+        labels = np.append(np.asarray(DEGREE_CATEGORIES, dtype=object), np.nan)
+        return pd.DataFrame({
+            'Education_Records': self.counts(),
+            'Any_Ivy_Degree': self.any(pedigree == PEDIGREE['Ivy']).astype(int),
+            'Highest_Degree': labels[highest],
+            'Best_Pedigree': pd.arrays.IntegerArray(best.astype(np.int64), best == 0),
+        }, index=self.person_ids if index is None else index)
+
+    def save(self, path):
+        np.savez(path, person_ids=self.person_ids.astype(str), offsets=self.offsets, institute=self.institute,
+                 degree=self.degree, major=self.major, institutes=self.institutes.astype(str))
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as arrays:
+            return cls(arrays['person_ids'].astype(object), arrays['offsets'], arrays['institute'],
+                       arrays['degree'], arrays['major'], arrays['institutes'].astype(object))
+
+
+def load_education_records(core_tables_dir, person_ids, frame=None):
+    """
+    Education records of the given founders, from PersonEducationRelation.csv.
+
+    Parameters:
+    -----------
+    core_tables_dir : str or Path
+        Directory with the core tables
+    person_ids : array-like
+        Founder PersonIDs (natural IDs), in founder table order
+    frame : DataFrame or None
+        Master-file rows (natural IDs, in file order) to take the records from when the
+        core tables are not available
+
+    Returns:
+    --------
+    EducationRecords
+    """
+    person_ids = pd.unique(np.asarray(person_ids, dtype=object))
+    if (Path(core_tables_dir) / 'PersonEducationRelation.csv').exists():
+        education = read_source(core_tables_dir, 'PersonEducationRelation.csv', {'PersonID': person_ids})
+    elif frame is not None:
+        print(f"   [CHECK] No PersonEducationRelation.csv in {core_tables_dir}; "
+              f"education records taken from the loaded data")
+        # A founder's records repeat once per company x deal x investor link, in table order;
+        # the rows of the founder's first link hold each record exactly once
+        links = ['PersonID'] + [c for c in ['CompanyID', 'DealID', 'InvestorID'] if c in frame.columns]
+        education = frame.merge(frame[links].drop_duplicates('PersonID'), on=links)
+        # Founders without education have a single row with every education field empty
+        education = education.dropna(subset=[c for c in frame.columns if c.startswith('Education_')], how='all')
+    else:
+        raise FileNotFoundError(f"No PersonEducationRelation.csv in {core_tables_dir}")
+    return EducationRecords.from_frame(education, person_ids)
@@ -6,6 +6,14 @@ import pandas as pd
 import numpy as np
 import os
 from datetime import datetime
+from instrumentation import RunLog
+from lineage import LineageLog
+from diagnostics import Diagnostics
+from intermediates import read_intermediate
+
+run = RunLog('filter_founder_vc_final')
+lineage = LineageLog('filter_founder_vc_final')
+diag = Diagnostics()
 
 print("=" * 100)
 print("FINAL FILTERING: FOUNDER-VC ANALYSIS WITH DEAL SIZE AND EDUCATION")
@@ -19,38 +27,43 @@ output_file = r'G:\School\BOCCONI\1st semester\empirical\founder_vc_final.csv'
 print("\n" + "=" * 100)
 print("STEP 1: Loading founder-VC analysis file...")
 print("=" * 100)
+run.start("STEP 1: Loading founder-VC analysis file")
+
+# Use the binary intermediate if the previous stage wrote one (see intermediates.py)
+df = read_intermediate(input_file)
 
-# Load the file with proper encoding handling
-print(f"Reading file: {input_file}")
-print("Trying different encodings...")
-
-# Try multiple encodings
-encodings_to_try = ['utf-8', 'latin-1', 'cp1252', 'iso-8859-1']
-df = None
-
-for encoding in encodings_to_try:
-    try:
-        print(f"  Attempting with {encoding} encoding...")
-        df = pd.read_csv(input_file, low_memory=False, encoding=encoding)
-        print(f"  Success with {encoding} encoding!")
-        break
-    except UnicodeDecodeError:
-        print(f"  Failed with {encoding}")
-        continue
-    except Exception as e:
-        print(f"  Error with {encoding}: {e}")
-        continue
+# Otherwise load the CSV with proper encoding handling
+if df is None:
+    print(f"Reading file: {input_file}")
+    print("Trying different encodings...")
+
+    # Try multiple encodings
+    encodings_to_try = ['utf-8', 'latin-1', 'cp1252', 'iso-8859-1']
+
+    for encoding in encodings_to_try:
+        try:
+            print(f"  Attempting with {encoding} encoding...")
+            df = pd.read_csv(input_file, low_memory=False, encoding=encoding)
+            print(f"  Success with {encoding} encoding!")
+            break
+        except UnicodeDecodeError:
+            print(f"  Failed with {encoding}")
+            continue
+        except Exception as e:
+            print(f"  Error with {encoding}: {e}")
+            continue
 
 if df is None:
     print("ERROR: Could not read file with any encoding!")
     exit(1)
 print(f"Loaded {len(df):,} rows with {len(df.columns)} columns")
-print(f"  Unique founders: {df['PersonID'].nunique():,}")
-print(f"  Unique companies: {df['CompanyID'].nunique():,}")
+diag.unique(df, ['PersonID', 'CompanyID'])
+diag.flush()
 
 print("\n" + "=" * 100)
 print("STEP 2: Filtering for rows with deal size...")
 print("=" * 100)
+run.start("STEP 2: Filtering for rows with deal size", df)
 
 # Check which deal size columns exist and have data
 print("Checking deal size columns...")
@@ -86,9 +99,11 @@ else:
     print("  ERROR: No deal size columns found!")
     exit(1)
 
+lineage.record('deal size filter', df, filtered_df)
+
 print(f"\nAfter deal size filter: {len(filtered_df):,} rows")
-print(f"  Unique founders: {filtered_df['PersonID'].nunique():,}")
-print(f"  Unique companies: {filtered_df['CompanyID'].nunique():,}")
+print(f"  Unique founders: {lineage.after('PersonID'):,}")
+print(f"  Unique companies: {lineage.after('CompanyID'):,}")
 print(f"  Rows removed: {len(df) - len(filtered_df):,}")
 
 if len(filtered_df) == 0:
@@ -98,6 +113,7 @@ if len(filtered_df) == 0:
 print("\n" + "=" * 100)
 print("STEP 3: Filtering for founders with education institute data...")
 print("=" * 100)
+run.start("STEP 3: Filtering for founders with education institute data", filtered_df)
 
 # Check Education_Institute column
 if 'Education_Institute' not in filtered_df.columns:
@@ -110,10 +126,11 @@ print(f"Rows with Education_Institute data: {education_count_before:,} ({educati
 # Filter for rows with education institute
 print("\nApplying filter: Keep rows with Education_Institute data...")
 final_df = filtered_df[filtered_df['Education_Institute'].notna() & (filtered_df['Education_Institute'] != '')].copy()
+lineage.record('education institute filter', filtered_df, final_df)
 
 print(f"\nAfter education filter: {len(final_df):,} rows")
-print(f"  Unique founders: {final_df['PersonID'].nunique():,}")
-print(f"  Unique companies: {final_df['CompanyID'].nunique():,}")
+print(f"  Unique founders: {lineage.after('PersonID'):,}")
+print(f"  Unique companies: {lineage.after('CompanyID'):,}")
 print(f"  Rows removed: {len(filtered_df) - len(final_df):,}")
 
 if len(final_df) == 0:
@@ -123,6 +140,7 @@ if len(final_df) == 0:
 print("\n" + "=" * 100)
 print("STEP 4: Data quality validation...")
 print("=" * 100)
+run.start("STEP 4: Data quality validation", final_df)
 
 # Validation checks
 print("Validation checks:")
@@ -143,6 +161,7 @@ if has_deal_deal_size:
 print("\n" + "=" * 100)
 print("STEP 5: Saving final filtered file...")
 print("=" * 100)
+run.start("STEP 5: Saving final filtered file", final_df)
 
 # Save the file with UTF-8 encoding
 print(f"Saving to: {output_file}")
@@ -156,37 +175,10 @@ print(f"  Total columns: {len(final_df.columns)}")
 print("\n" + "=" * 100)
 print("STEP 6: Summary statistics...")
 print("=" * 100)
+run.start("STEP 6: Summary statistics", final_df)
 
-# Create summary
-summary_stats = {
-    'Filter Stage': [
-        'Initial (from founder_vc_analysis.csv)',
-        'After deal size filter',
-        'After education institute filter (FINAL)'
-    ],
-    'Total Rows': [
-        f"{len(df):,}",
-        f"{len(filtered_df):,}",
-        f"{len(final_df):,}"
-    ],
-    'Unique Founders': [
-        f"{df['PersonID'].nunique():,}",
-        f"{filtered_df['PersonID'].nunique():,}",
-        f"{final_df['PersonID'].nunique():,}"
-    ],
-    'Unique Companies': [
-        f"{df['CompanyID'].nunique():,}",
-        f"{filtered_df['CompanyID'].nunique():,}",
-        f"{final_df['CompanyID'].nunique():,}"
-    ],
-    'Retention Rate': [
-        "100%",
-        f"{len(filtered_df)/len(df)*100:.2f}%",
-        f"{len(final_df)/len(df)*100:.2f}%"
-    ]
-}
-
-summary_df = pd.DataFrame(summary_stats)
+# Create summary (rows and unique entities after each filter, from the lineage records)
+summary_df = lineage.summary()
 print("\nFiltering Summary:")
 print(summary_df.to_string(index=False))
 
@@ -212,10 +204,8 @@ print("ADDITIONAL STATISTICS")
 print("=" * 100)
 
 # Top education institutes
-print("\nTop 10 Education Institutes:")
-top_institutes = final_df['Education_Institute'].value_counts().head(10)
-for i, (institute, count) in enumerate(top_institutes.items(), 1):
-    print(f"  {i:2d}. {institute:50s} : {count:4d} founders")
+diag.value_counts(final_df, 'Education_Institute', "Top 10 Education Institutes", top=10)
+diag.flush()
 
 # Distribution of founders per company
 print("\nFounders per Company Distribution:")
@@ -238,3 +228,5 @@ print("  - Education institute information")
 print("  - Ready for analysis of founder backgrounds and VC funding")
 print("=" * 100)
 
+lineage.close()
+run.close(final_df)
@@ -12,12 +12,25 @@ Author: Empirical Methods Project
 Date: November 15, 2024
 """
 
+import sys
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 import warnings
 warnings.filterwarnings('ignore')
 
+from covariate_lagging import SortedHistory, load_history
+from table_cache import read_table
+
+# Lookback windows (days) for the lag sensitivity table.
+# Override from the command line, e.g.: python fix_employee_endogeneity.py 90 180 365 730
+LAG_WINDOWS = [int(w) for w in sys.argv[1:]] or [90, 180, 365, 730]
+
+# Interpolated employee count at the deal date: 'log', 'linear', or None to skip
+INTERPOLATION_METHOD = 'log'
+# Bracketing observations further apart than this are not interpolated
+INTERPOLATION_MAX_GAP_DAYS = 730
+
 print("="*80)
 print("FIXING EMPLOYEE COUNT ENDOGENEITY")
 print("="*80)
@@ -43,7 +56,7 @@ print()
 # STEP 2: Load Deal Data to Get Deal Dates
 # =============================================================================
 print("Step 2: Loading deal dates...")
-deals = pd.read_csv('core_tables/Deal.csv')
+deals = read_table('core_tables/Deal.csv', columns=['DealID', 'DealDate'])
 print(f"   [OK] Loaded {len(deals):,} deals")
 
 # Get deal date
@@ -56,16 +69,16 @@ print()
 # STEP 3: Load Historical Employee Data
 # =============================================================================
 print("Step 3: Loading historical employee counts...")
-employee_history = pd.read_csv('other_tables/CompanyEmployeeHistoryRelation.csv')
-print(f"   [OK] Loaded {len(employee_history):,} employee observations")
-
-# Parse dates
-employee_history['Date'] = pd.to_datetime(employee_history['Date'], errors='coerce')
-print(f"   [OK] Parsed {employee_history['Date'].notna().sum():,} dates")
+# Sorted by (CompanyID, Date) once and cached on disk (see covariate_lagging.py)
+employee_history = load_history('other_tables/CompanyEmployeeHistoryRelation.csv',
+                                key_col='CompanyID', date_col='Date',
+                                value_cols=['EmployeeCount'])
+print(f"   [OK] Loaded {len(employee_history):,} dated employee observations")
+print(f"   [OK] Companies with history: {len(employee_history.entities):,}")
 
 # Check date range
-min_date = employee_history['Date'].min()
-max_date = employee_history['Date'].max()
+min_date = pd.Timestamp(employee_history.days.min(), unit='D')
+max_date = pd.Timestamp(employee_history.days.max(), unit='D')
 print(f"   [OK] Date range: {min_date.strftime('%Y-%m-%d')} to {max_date.strftime('%Y-%m-%d')}")
 print()
 
@@ -81,120 +94,126 @@ print()
 # STEP 5: Match Each Deal to LAGGED Employee Count
 # =============================================================================
 print("Step 5: Matching deals to lagged employee counts...")
-print("   This may take a few minutes...")
 print()
 
-def get_lagged_employee_count(company_id, deal_date, employee_df, lookback_days=180):
+def match_lagged_employee_counts(deal_df, history, windows=LAG_WINDOWS,
+                                 lookback_days=180, fallback_days=730, min_lag_days=30):
     """
-    For a given company and deal date, find the employee count
-    BEFORE the deal (ideally 1-6 months before).
+    Employee count BEFORE each deal (ideally 1-6 months before), for all
+    deals at once, plus one lagged count per lookback window for the
+    sensitivity table.
     
-    Strategy:
-    1. Look for employee count 1-6 months BEFORE deal
-    2. If not found, use closest PRIOR observation (up to 2 years back)
-    3. If still not found, return NaN
+    Strategy for Employees_Lagged:
+    1. Most recent count min_lag_days..lookback_days before the deal (1-6 months)
+    2. If none, the closest PRIOR count up to fallback_days back (2 years)
+    3. If still none, NaN
+    
+    Uses the presorted employee history from covariate_lagging: one
+    searchsorted over all deals serves every window, plus one for the
+    fallback rule.
     
     Parameters:
     -----------
-    company_id : str
-        Company ID
-    deal_date : datetime
-        Deal date
-    employee_df : DataFrame
-        Employee history data
-    lookback_days : int
-        Maximum days to look back for employee count
+    deal_df : DataFrame
+        Deals with CompanyID and DealDate (datetime) columns
+    history : SortedHistory or DataFrame
+        Employee history (CompanyID, Date, EmployeeCount)
+    windows : list of int
+        Lookback windows in days. For window W the lagged count is the most
+        recent observation between min_lag_days and W days before the deal
+        (no fallback), so coverage shrinks as the window shrinks.
+    lookback_days, fallback_days, min_lag_days : int
+        Rule for the main Employees_Lagged column (see above)
         
     Returns:
     --------
-    employee_count : float or NaN
-        Employee count before the deal, or NaN if not available
-    days_before : int or NaN
-        Days between employee measurement and deal
+    DataFrame indexed like deal_df with Employees_Lagged, Employees_Lag_Days
+    and Employees_Lagged_{W}d / Employees_Lag_Days_{W}d for every window
     """
+    if not isinstance(history, SortedHistory):
+        # Keep the first record per company-date (the earliest listed wins ties)
+        history = SortedHistory.from_frame(history, 'CompanyID', 'Date', ['EmployeeCount'],
+                                           duplicates='first')
     
-    # Handle missing deal date
-    if pd.isna(deal_date):
-        return np.nan, np.nan
-    
-    # Get all employee records for this company
-    company_records = employee_df[employee_df['CompanyID'] == company_id].copy()
-    
-    if len(company_records) == 0:
-        return np.nan, np.nan
+    company_ids = deal_df['CompanyID'].values
+    deal_dates = deal_df['DealDate'].values
     
-    # Filter to records BEFORE the deal
-    company_records = company_records[company_records['Date'] < deal_date]
+    # The most recent observation at least min_lag_days before the deal is the same for every
+    # window, so one lookup over the widest window serves them all: a window W keeps it when
+    # lag_days <= W
+    widest = history.lookup(company_ids, deal_dates, min_lag_days=min_lag_days,
+                            max_lag_days=max(list(windows) + [lookback_days]))
+    widest_counts = widest['EmployeeCount'].values
+    widest_lags = widest['lag_days'].values
     
-    if len(company_records) == 0:
-        return np.nan, np.nan
+    # Strategy 1 (min_lag_days..lookback_days), else strategy 2 (closest prior)
+    use_recent = widest_lags <= lookback_days
+    prior = history.lookup(company_ids, deal_dates, max_lag_days=fallback_days)
     
-    # Calculate days before deal
-    company_records['days_before'] = (deal_date - company_records['Date']).dt.days
+    result = pd.DataFrame(index=deal_df.index)
+    result['Employees_Lagged'] = np.where(use_recent, widest_counts, prior['EmployeeCount'])
+    result['Employees_Lag_Days'] = np.where(use_recent, widest_lags, prior['lag_days'])
     
-    # Strategy 1: Look for count 30-180 days before (1-6 months)
-    recent = company_records[
-        (company_records['days_before'] >= 30) & 
-        (company_records['days_before'] <= lookback_days)
-    ]
+    for window in windows:
+        in_window = widest_lags <= window
+        result[f'Employees_Lagged_{window}d'] = np.where(in_window, widest_counts, np.nan)
+        result[f'Employees_Lag_Days_{window}d'] = np.where(in_window, widest_lags, np.nan)
     
-    if len(recent) > 0:
-        # Use the most recent one in this window
-        best_match = recent.loc[recent['days_before'].idxmin()]
-        return best_match['EmployeeCount'], best_match['days_before']
-    
-    # Strategy 2: If no recent data, use closest prior (up to 2 years)
-    prior = company_records[company_records['days_before'] <= 730]  # 2 years
-    
-    if len(prior) > 0:
-        # Use the closest one
-        best_match = prior.loc[prior['days_before'].idxmin()]
-        return best_match['EmployeeCount'], best_match['days_before']
-    
-    # Strategy 3: No data found
-    return np.nan, np.nan
+    return result
 
 
 # Apply to all deals
 print("   Matching employee counts to deals...")
-results = []
-
-# Process in batches for progress updates
-batch_size = 500
-total_deals = len(current_data)
-
-for i in range(0, total_deals, batch_size):
-    batch = current_data.iloc[i:i+batch_size]
-    
-    for idx, row in batch.iterrows():
-        emp_count, days_before = get_lagged_employee_count(
-            row['CompanyID'], 
-            row['DealDate'], 
-            employee_history,
-            lookback_days=180
-        )
-        results.append({
-            'index': idx,
-            'Employees_Lagged': emp_count,
-            'Employees_Lag_Days': days_before
-        })
-    
-    # Progress update
-    processed = min(i + batch_size, total_deals)
-    pct = (processed / total_deals) * 100
-    print(f"   Progress: {processed:,}/{total_deals:,} ({pct:.1f}%)")
+print(f"   Lookback windows for sensitivity: {', '.join(str(w) for w in LAG_WINDOWS)} days")
+lagged = match_lagged_employee_counts(current_data, employee_history, windows=LAG_WINDOWS)
 
 print()
 print("   [OK] Matching complete!")
 print()
 
-# Convert results to DataFrame
-results_df = pd.DataFrame(results)
-results_df.set_index('index', inplace=True)
-
 # Add to current data
-current_data['Employees_Lagged'] = results_df['Employees_Lagged']
-current_data['Employees_Lag_Days'] = results_df['Employees_Lag_Days']
+for col in lagged.columns:
+    current_data[col] = lagged[col]
+
+def interpolate_employee_counts(deal_df, history, method='log', max_gap_days=730):
+    """
+    Employee count interpolated at the deal date and growth over the
+    12 months before the deal.
+    
+    Both counts come from the observations bracketing each date (see
+    SortedHistory.interpolate), so the count at the deal date may use an
+    observation measured after the deal.
+    
+    Returns:
+    --------
+    DataFrame indexed like deal_df with Employees_Interpolated,
+    Employees_Interpolated_12m_Before and Employees_Growth_12m
+    (proportional growth, e.g. 0.25 = +25%)
+    """
+    company_ids = deal_df['CompanyID'].values
+    at_deal = history.interpolate(company_ids, deal_df['DealDate'].values, 'EmployeeCount',
+                                  method=method, max_gap_days=max_gap_days)
+    year_before = history.interpolate(company_ids, (deal_df['DealDate'] - pd.Timedelta(days=365)).values,
+                                      'EmployeeCount', method=method, max_gap_days=max_gap_days)
+    
+    result = pd.DataFrame(index=deal_df.index)
+    result['Employees_Interpolated'] = at_deal
+    result['Employees_Interpolated_12m_Before'] = year_before
+    with np.errstate(divide='ignore', invalid='ignore'):
+        result['Employees_Growth_12m'] = np.where(year_before > 0, at_deal / year_before - 1, np.nan)
+    return result
+
+
+if INTERPOLATION_METHOD is not None:
+    print(f"   Interpolating employee counts at deal date ({INTERPOLATION_METHOD})...")
+    interpolated = interpolate_employee_counts(current_data, employee_history,
+                                               method=INTERPOLATION_METHOD,
+                                               max_gap_days=INTERPOLATION_MAX_GAP_DAYS)
+    for col in interpolated.columns:
+        current_data[col] = interpolated[col]
+    print(f"   [OK] Interpolated count: {current_data['Employees_Interpolated'].notna().sum():,} deals")
+    print(f"   [OK] 12-month growth: {current_data['Employees_Growth_12m'].notna().sum():,} deals")
+    print()
 
 # =============================================================================
 # STEP 6: Analyze the Results
@@ -227,6 +246,23 @@ print(f"   Min lag: {lag_stats['min']:.0f} days")
 print(f"   Max lag: {lag_stats['max']:.0f} days ({lag_stats['max']/365:.1f} years)")
 print()
 
+print("   LAG WINDOW SENSITIVITY:")
+window_coverage = {}
+for window in LAG_WINDOWS:
+    lagged_col = current_data[f'Employees_Lagged_{window}d']
+    lag_days_col = current_data[f'Employees_Lag_Days_{window}d']
+    window_coverage[str(window)] = {
+        'lagged_available': int(lagged_col.notna().sum()),
+        'coverage_pct': float(lagged_col.notna().sum()/len(current_data)*100),
+        'mean_lag_days': float(lag_days_col.mean()) if lag_days_col.notna().any() else None,
+        'median_lag_days': float(lag_days_col.median()) if lag_days_col.notna().any() else None,
+        'median_employees': float(lagged_col.median()) if lagged_col.notna().any() else None
+    }
+    stats = window_coverage[str(window)]
+    mean_lag = f"{stats['mean_lag_days']:.0f}" if stats['mean_lag_days'] is not None else "n/a"
+    print(f"   {window:>5d} days: {stats['lagged_available']:>7,} deals ({stats['coverage_pct']:5.1f}%), mean lag {mean_lag} days")
+print()
+
 print("4. HOW MUCH DID COMPANIES GROW?")
 # For companies with both measures (calculate before rename)
 both_available = current_data[
@@ -346,6 +382,10 @@ print("   - Employees_Lagged: Employee count before deal")
 print("   - ln_Employees_Lagged: Log(Employees_Lagged)")
 print("   - Employees_Missing_Lagged: Missing indicator")
 print("   - Employees_Lag_Days: Days between measurement and deal")
+print(f"   - Employees_Lagged_<W>d / Employees_Lag_Days_<W>d: Sensitivity columns for windows {LAG_WINDOWS}")
+if INTERPOLATION_METHOD is not None:
+    print("   - Employees_Interpolated: Employee count interpolated at deal date")
+    print("   - Employees_Growth_12m: Employee growth over the 12 months before the deal")
 print()
 print("   OLD variables (kept for comparison):")
 print("   - Company_Employees_2022: Employee count in 2022")
@@ -386,8 +426,18 @@ diagnostics = {
     'mean_lag_days': float(current_data['Employees_Lag_Days'].mean()),
     'median_lag_days': float(current_data['Employees_Lag_Days'].median()),
     'correlation_old_new': float(correlation_old_new) if correlation_old_new is not None else None,
-    'mean_growth_pct': float(both_available['Growth'].mean()) if len(both_available) > 0 else None
+    'mean_growth_pct': float(both_available['Growth'].mean()) if len(both_available) > 0 else None,
+    'lag_windows': window_coverage
 }
+if INTERPOLATION_METHOD is not None:
+    diagnostics['interpolation'] = {
+        'method': INTERPOLATION_METHOD,
+        'max_gap_days': INTERPOLATION_MAX_GAP_DAYS,
+        'interpolated_available': int(current_data['Employees_Interpolated'].notna().sum()),
+        'coverage_pct': float(current_data['Employees_Interpolated'].notna().sum()/len(current_data)*100),
+        'growth_12m_available': int(current_data['Employees_Growth_12m'].notna().sum()),
+        'median_growth_12m': float(current_data['Employees_Growth_12m'].median()) if current_data['Employees_Growth_12m'].notna().any() else None
+    }
 
 import json
 with open('endogeneity_fix_diagnostics.json', 'w') as f:
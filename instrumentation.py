@@ -0,0 +1,359 @@
+"""
+Per-Stage Instrumentation
+=========================
+
+Structured timing and memory records for every pipeline stage and step,
+written as JSON lines (run_log.jsonl, next to the outputs) so runs can be
+compared without reading the console banners.
+
+Each record has: run_id, stage, step, level (0 = whole stage, 1 = step,
+2+ = sub-steps), wall and CPU seconds, peak RSS during the step, RSS at the
+end, and rows/columns/memory of the DataFrame going in and coming out.
+
+Peak RSS is measured per step on Linux by resetting the kernel's high-water
+mark at every step boundary (/proc/self/clear_refs); a step's peak includes
+its sub-steps. Where the reset is unavailable the peak is the process's
+high-water mark so far (peak_scope = 'process').
+
+Three ways to mark steps:
+    run = RunLog('prepare_for_stata')
+    run.start('PHASE 2: Geography filter', df)    # ends the previous step (df = its output)
+    with run.step('Collapse loop', df) as s:      # nested sub-step
+        ...
+        s.output(deal_df)
+    @instrument                                   # function in the active run; DataFrame
+    def build(df): ...                            # argument/return value are recorded
+    run.close(final_df)                           # ends the stage and prints the slowest steps
+
+All stages of one pipeline run share a run_id when PIPELINE_RUN_ID is set
+(benchmark.py sets it); PIPELINE_RUN_LOG overrides the log file path.
+
+With PIPELINE_PROFILE=1 (or --profile) each stage is also profiled; see
+profiling.py.
+
+Usage:
+    python instrumentation.py [run_log.jsonl] [run_id]   # summary of a run (default: latest)
+
+Author: Empirical Methods Project
+"""
+
+import os
+import sys
+import json
+import time
+import atexit
+import functools
+import pandas as pd
+from contextlib import contextmanager
+
+from profiling import StageProfiler, profiling_enabled
+
+DEFAULT_LOG = 'run_log.jsonl'
+SUMMARY_TOP = 10
+MEMORY_SAMPLE_ROWS = 50_000
+
+_active_runs = []
+_process_peak_mb = 0.0
+
+
+# ============================================================================
+# Memory readings
+# ============================================================================
+
+def _proc_status_mb(field):
+    """A kB field of /proc/self/status in MB (None where /proc is unavailable)"""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith(field + ':'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def peak_rss_mb():
+    """Peak resident memory of this process in MB (since start or the last reset)"""
+    # VmHWM is reset by exec and by reset_peak_rss(), unlike ru_maxrss which keeps
+    # the parent's peak from before the fork
+    peak = _proc_status_mb('VmHWM')
+    if peak is not None:
+        return peak
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1 << 20) if sys.platform == 'darwin' else peak / 1024
+
+
+def current_rss_mb():
+    return _proc_status_mb('VmRSS')
+
+
+def process_peak_rss_mb():
+    """Peak resident memory over the whole process lifetime, across step resets"""
+    return max(_process_peak_mb, peak_rss_mb() or 0.0) or None
+
+
+def reset_peak_rss():
+    """Reset the peak RSS to the current RSS (Linux 4.0+); False if unsupported"""
+    global _process_peak_mb
+    _process_peak_mb = max(_process_peak_mb, peak_rss_mb() or 0.0)
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def frame_stats(df, deep=True):
+    """
+    rows, columns and memory (MB) of a DataFrame/Series; Nones for anything else.
+
+    With deep=True, string contents of frames over MEMORY_SAMPLE_ROWS rows are
+    estimated from an evenly spaced sample (exact deep counting of millions of
+    strings takes longer than most steps).
+    """
+    if not isinstance(df, (pd.DataFrame, pd.Series)):
+        return None, None, None
+    columns = df.shape[1] if isinstance(df, pd.DataFrame) else 1
+    if deep and len(df) > MEMORY_SAMPLE_ROWS:
+        stride = len(df) // MEMORY_SAMPLE_ROWS
+        memory = df.iloc[::stride].memory_usage(index=False, deep=True)
+        memory = memory.sum() if isinstance(df, pd.DataFrame) else memory
+        memory = memory * len(df) / len(df.iloc[::stride]) + df.index.memory_usage()
+    else:
+        memory = df.memory_usage(index=True, deep=deep)
+        memory = memory.sum() if isinstance(df, pd.DataFrame) else memory
+    return len(df), columns, memory / (1 << 20)
+
+
+# ============================================================================
+# Run log
+# ============================================================================
+
+class Step:
+    """One open step; output() records the DataFrame it produced"""
+
+    def __init__(self, run, name, level, df_in, stats=None):
+        self.run = run
+        self.name = name
+        self.level = level
+        self.rows_in, self.cols_in, self.mem_in_mb = stats or frame_stats(df_in, run.deep_memory)
+        self.rows_out = self.cols_out = self.mem_out_mb = None
+        self.started_at = pd.Timestamp.now().isoformat(timespec='seconds')
+        self.peak_mb = current_rss_mb() or 0.0
+        self.wall = time.perf_counter()
+        self.cpu = time.process_time()
+
+    def output(self, df):
+        wall, cpu = time.perf_counter(), time.process_time()
+        self.rows_out, self.cols_out, self.mem_out_mb = frame_stats(df, self.run.deep_memory)
+        # Measuring the output is not part of the step's own cost
+        self.wall += time.perf_counter() - wall
+        self.cpu += time.process_time() - cpu
+        return df
+
+
+class RunLog:
+    """
+    Instrumentation for one pipeline stage (one script run).
+
+    Parameters:
+    -----------
+    stage : str
+        Stage name (usually the script name without .py)
+    log_path : str or None
+        JSON-lines file (default: $PIPELINE_RUN_LOG or run_log.jsonl)
+    run_id : str or None
+        Shared id for all stages of one run (default: $PIPELINE_RUN_ID or a new one)
+    deep_memory : bool
+        Count string contents in DataFrame memory (sampled on large frames;
+        measured outside the step timings)
+    """
+
+    def __init__(self, stage, log_path=None, run_id=None, deep_memory=True):
+        self.stage = stage
+        self.log_path = log_path or os.environ.get('PIPELINE_RUN_LOG', DEFAULT_LOG)
+        self.run_id = run_id or os.environ.get('PIPELINE_RUN_ID') or \
+            f"{pd.Timestamp.now():%Y%m%d-%H%M%S}-{os.getpid()}"
+        self.deep_memory = deep_memory
+        self.peak_scope = 'step' if reset_peak_rss() else 'process'
+        self.records = []
+        self._stack = [Step(self, stage, 0, None)]
+        self._current = None
+        _active_runs.append(self)
+        atexit.register(self._abort)
+        self.profiler = StageProfiler(stage, self.run_id) if profiling_enabled() else None
+        if self.profiler is not None:
+            self.profiler.start()
+
+    # -- step boundaries -------------------------------------------------------
+
+    def _open(self, name, df_in, stats=None):
+        # Charge the peak so far to every open step before resetting the counter
+        peak = peak_rss_mb()
+        for step in self._stack:
+            step.peak_mb = max(step.peak_mb, peak or 0.0)
+        reset_peak_rss()
+        step = Step(self, name, len(self._stack), df_in, stats)
+        self._stack.append(step)
+        return step
+
+    def _close(self, step, status='ok'):
+        wall = time.perf_counter() - step.wall
+        cpu = time.process_time() - step.cpu
+        step.peak_mb = max(step.peak_mb, peak_rss_mb() or 0.0)
+        while self._stack and self._stack[-1] is not step:
+            self._close(self._stack[-1], status)
+        self._stack.pop()
+        for parent in self._stack:
+            parent.peak_mb = max(parent.peak_mb, step.peak_mb)
+        record = {
+            'run_id': self.run_id, 'stage': self.stage, 'step': step.name, 'level': step.level,
+            'started_at': step.started_at, 'wall_s': round(wall, 4), 'cpu_s': round(cpu, 4),
+            'peak_rss_mb': round(step.peak_mb, 1), 'rss_end_mb': round(current_rss_mb() or 0.0, 1),
+            'peak_scope': self.peak_scope,
+            'rows_in': step.rows_in, 'cols_in': step.cols_in,
+            'mem_in_mb': None if step.mem_in_mb is None else round(step.mem_in_mb, 1),
+            'rows_out': step.rows_out, 'cols_out': step.cols_out,
+            'mem_out_mb': None if step.mem_out_mb is None else round(step.mem_out_mb, 1),
+            'status': status,
+        }
+        self.records.append(record)
+        with open(self.log_path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record) + '\n')
+        return record
+
+    def _stop_profiler(self):
+        if self.profiler is not None:
+            paths = self.profiler.stop()
+            self.profiler = None
+            print(f"\nProfiles written: {', '.join(str(p) for p in paths)}")
+
+    def _abort(self):
+        # Script exited (exit(1), exception) before close(): keep the records of the open steps
+        if self._stack:
+            self._current = None
+            self._close(self._stack[0], 'aborted')
+            self._stop_profiler()
+
+    def start(self, name, df=None):
+        """End the current sequential step (df is its output) and start the next one (df is its input)"""
+        caller = sys._getframe(1)
+        stats = None
+        if self._current is not None and self._current in self._stack:
+            if self.profiler is not None:
+                self.profiler.step_ended(caller)
+            self._current.output(df)
+            stats = self._current.rows_out, self._current.cols_out, self._current.mem_out_mb
+            self._close(self._current)
+        self._current = self._open(name, df, stats)
+        if self.profiler is not None:
+            self.profiler.step_started(name, caller)
+        return self._current
+
+    @contextmanager
+    def step(self, name, df=None):
+        """Context manager for a (sub-)step; call .output(df) on the yielded step to record its result"""
+        step = self._open(name, df)
+        try:
+            yield step
+        except BaseException as e:
+            if isinstance(e, SystemExit) and e.code in (None, 0):
+                self._close(step)
+            else:
+                self._close(step, f'error: {type(e).__name__}')
+            raise
+        self._close(step)
+
+    def close(self, df=None, summary=True):
+        """End the last step and the stage; print the slowest steps"""
+        if self._current is not None and self._current in self._stack:
+            self._current.output(df)
+            self._close(self._current)
+        self._current = None
+        stage = self._stack[0]
+        stage.output(df)
+        self._close(stage)
+        if self in _active_runs:
+            _active_runs.remove(self)
+        self._stop_profiler()
+        if summary:
+            print_summary(self.records)
+        return self.records
+
+
+def current_run():
+    """The innermost active RunLog, or None"""
+    return _active_runs[-1] if _active_runs else None
+
+
+def instrument(func=None, name=None):
+    """
+    Decorator: record each call as a step of the active run (no-op without one).
+
+    The first DataFrame argument is recorded as input and a DataFrame return
+    value as output.
+    """
+    if func is None:
+        return functools.partial(instrument, name=name)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        run = current_run()
+        if run is None:
+            return func(*args, **kwargs)
+        df_in = next((a for a in list(args) + list(kwargs.values()) if isinstance(a, (pd.DataFrame, pd.Series))), None)
+        with run.step(name or func.__name__, df_in) as step:
+            result = func(*args, **kwargs)
+            step.output(result)
+        return result
+    return wrapper
+
+
+# ============================================================================
+# Summaries
+# ============================================================================
+
+def print_summary(records, top=SUMMARY_TOP):
+    """Slowest steps of a run (stage totals listed separately)"""
+    records = pd.DataFrame(records)
+    if records.empty:
+        return
+    stages = records[records['level'] == 0]
+    steps = records[records['level'] > 0].sort_values('wall_s', ascending=False).head(top)
+
+    def rows(value):
+        return '-' if pd.isna(value) else f"{int(value):,}"
+
+    print("\n" + "=" * 100)
+    print(f"RUN SUMMARY ({records['run_id'].iloc[0]})")
+    print("=" * 100)
+    for _, r in stages.iterrows():
+        print(f"  {r['stage']:<40} {r['wall_s']:9.2f}s wall {r['cpu_s']:9.2f}s cpu {r['peak_rss_mb']:9.0f} MB peak")
+    if len(steps):
+        print(f"\n  Slowest steps:")
+        print(f"  {'stage / step':<60} {'wall s':>9} {'cpu s':>9} {'peak MB':>9} {'rows in':>12} {'rows out':>12}")
+        for _, r in steps.iterrows():
+            label = f"{r['stage']} / {'  ' * (int(r['level']) - 1)}{r['step']}"
+            print(f"  {label[:60]:<60} {r['wall_s']:9.2f} {r['cpu_s']:9.2f} {r['peak_rss_mb']:9.0f} "
+                  f"{rows(r['rows_in']):>12} {rows(r['rows_out']):>12}")
+
+
+def read_log(log_path=DEFAULT_LOG, run_id=None):
+    """Records of one run from a JSON-lines log (default: the latest run)"""
+    records = pd.read_json(log_path, lines=True, dtype={'run_id': str})
+    if run_id is None:
+        run_id = records['run_id'].iloc[-1]
+    return records[records['run_id'] == run_id]
+
+
+if __name__ == "__main__":
+    log_file = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_LOG
+    if not os.path.exists(log_file):
+        print(f"ERROR: {log_file} not found")
+        exit(1)
+    print_summary(read_log(log_file, sys.argv[2] if len(sys.argv) > 2 else None))
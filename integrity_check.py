@@ -0,0 +1,292 @@
+"""
+Full-Scale Referential Integrity Check
+======================================
+
+Checks foreign keys across the core tables at full scale (every row, not a
+sample) and reports orphan counts with example keys per relationship.
+
+Parent keys are stored as a compact set of 64-bit hashes (sorted uint64
+array, 8 bytes per key, membership by binary search). A parent column whose
+distinct keys would need more than BLOOM_ABOVE_SET_BYTES that way switches
+to a Bloom filter, which bounds memory at the cost of a small false-positive
+rate (a few orphans may go unreported).
+Child tables are streamed in chunks, reading only the key column.
+
+Exit status is 1 when any gated relationship has more orphans than its
+tolerance, so the script can gate each data refresh.
+
+Usage:
+    python integrity_check.py [core_tables_dir]
+
+Author: Empirical Methods Project
+"""
+
+import os
+import sys
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+from streaming_profiler import hash_values
+
+# (name, child table, child column, parent table, parent column, max orphan %)
+# A tolerance of None reports the relationship without gating on it
+# (e.g. a person's primary company can be an investor firm, not a Company row).
+RELATIONSHIPS = [
+    ('Deal -> Company', 'Deal.csv', 'CompanyID', 'Company.csv', 'CompanyID', 0.0),
+    ('Education -> Person', 'PersonEducationRelation.csv', 'PersonID', 'Person.csv', 'PersonID', 0.0),
+    ('Position -> Person', 'PersonPositionRelation.csv', 'PersonID', 'Person.csv', 'PersonID', 0.0),
+    ('Position -> Company', 'PersonPositionRelation.csv', 'EntityID', 'Company.csv', 'CompanyID', None),
+    ('Person -> PrimaryCompany', 'Person.csv', 'PrimaryCompanyID', 'Company.csv', 'CompanyID', None),
+    ('Company -> FirstFinancingDeal', 'Company.csv', 'FirstFinancingDealID', 'Deal.csv', 'DealID', None),
+    ('Investor relation -> Deal', 'DealInvestorRelation.csv', 'DealID', 'Deal.csv', 'DealID', 0.0),
+    ('Investor relation -> Investor', 'DealInvestorRelation.csv', 'InvestorID', 'Investor.csv', 'InvestorID', 0.0),
+]
+
+BLOOM_ABOVE_SET_BYTES = 1024**3          # ~134M distinct keys
+BLOOM_ERROR_RATE = 0.001
+CHUNK_SIZE = 500_000
+EXAMPLE_KEYS = 10
+
+
+def hash_keys(series):
+    """64-bit hashes of non-null keys, compared as trimmed text"""
+    keys = series.dropna().astype(str).str.strip()
+    keys = keys[keys != '']
+    return keys, hash_values(keys)
+
+
+class HashedIdSet:
+    """Exact-up-to-hash-collision set of keys stored as sorted unique uint64 hashes"""
+
+    def __init__(self, hashes):
+        self.hashes = np.unique(hashes)
+
+    def __len__(self):
+        return len(self.hashes)
+
+    @property
+    def nbytes(self):
+        return self.hashes.nbytes
+
+    def contains(self, hashes):
+        if len(self.hashes) == 0:
+            return np.zeros(len(hashes), dtype=bool)
+        pos = np.searchsorted(self.hashes, hashes)
+        pos[pos == len(self.hashes)] = 0
+        return self.hashes[pos] == hashes
+
+
+class BloomFilter:
+    """Bloom filter over 64-bit hashes (double hashing on the two 32-bit halves)"""
+
+    def __init__(self, capacity, error_rate=BLOOM_ERROR_RATE):
+        capacity = max(int(capacity), 1)
+        self.size = int(np.ceil(-capacity * np.log(error_rate) / np.log(2) ** 2))
+        self.num_hashes = max(1, int(round(self.size / capacity * np.log(2))))
+        self.bits = np.zeros((self.size + 7) // 8, dtype=np.uint8)
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    @property
+    def nbytes(self):
+        return self.bits.nbytes
+
+    def _positions(self, hashes):
+        low = (hashes & np.uint64(0xFFFFFFFF)).astype(np.uint64)
+        high = (hashes >> np.uint64(32)) | np.uint64(1)
+        for i in range(self.num_hashes):
+            yield ((low + np.uint64(i) * high) % np.uint64(self.size)).astype(np.int64)
+
+    def add(self, hashes):
+        self.count += len(hashes)
+        for pos in self._positions(hashes):
+            np.bitwise_or.at(self.bits, pos >> 3, (1 << (pos & 7)).astype(np.uint8))
+
+    def contains(self, hashes):
+        present = np.ones(len(hashes), dtype=bool)
+        for pos in self._positions(hashes):
+            present &= ((self.bits[pos >> 3] >> (pos & 7)) & 1).astype(bool)
+        return present
+
+
+def estimate_rows(csv_path, sample_bytes=1 << 20):
+    """Rough row count from the newline density of the first megabyte"""
+    size = os.path.getsize(csv_path)
+    with open(csv_path, 'rb') as f:
+        sample = f.read(sample_bytes)
+    newlines = max(sample.count(b'\n'), 1)
+    return int(size * newlines / max(len(sample), 1)) + 1
+
+
+def read_column(csv_path, column, chunksize=CHUNK_SIZE):
+    """Stream a single column as text"""
+    return pd.read_csv(csv_path, usecols=[column], dtype=str, chunksize=chunksize,
+                       low_memory=False, encoding='utf-8-sig')
+
+
+def table_columns(csv_path):
+    return list(pd.read_csv(csv_path, nrows=0, encoding='utf-8-sig').columns)
+
+
+def build_key_set(csv_path, column, max_set_bytes=BLOOM_ABOVE_SET_BYTES):
+    """
+    Key set of a parent table column.
+
+    The distinct key hashes are collected exactly (HashedIdSet); once they take
+    more than max_set_bytes, the rest of the column goes into a BloomFilter
+    sized for the table's rows, so memory follows the number of distinct keys
+    rather than the width of the file.
+    """
+    hashes = np.empty(0, dtype=np.uint64)
+    pending, pending_keys = [], 0
+    chunks = read_column(csv_path, column)
+    for chunk in chunks:
+        part = np.unique(hash_keys(chunk[column])[1])
+        pending.append(part)
+        pending_keys += len(part)
+        # Merge once the new chunks rival the set, so each key is re-sorted a few times at most
+        if pending_keys < max(len(hashes), CHUNK_SIZE):
+            continue
+        hashes = np.unique(np.concatenate([hashes] + pending))
+        pending, pending_keys = [], 0
+        if hashes.nbytes > max_set_bytes:
+            break
+    else:
+        hashes = np.unique(np.concatenate([hashes] + pending))
+        if hashes.nbytes <= max_set_bytes:
+            return HashedIdSet(hashes)
+
+    key_set = BloomFilter(max(estimate_rows(csv_path), len(hashes)))
+    key_set.add(hashes)
+    for chunk in chunks:
+        key_set.add(hash_keys(chunk[column])[1])
+    return key_set
+
+
+def check_relationship(child_path, child_column, key_set):
+    """Orphan statistics for one foreign key"""
+    child_rows = 0
+    null_keys = 0
+    orphan_rows = 0
+    orphan_hashes = []
+    examples = []
+    for chunk in read_column(child_path, child_column):
+        keys, hashes = hash_keys(chunk[child_column])
+        child_rows += len(chunk)
+        null_keys += len(chunk) - len(keys)
+        missing = ~key_set.contains(hashes)
+        orphan_rows += int(missing.sum())
+        if missing.any():
+            orphan_hashes.append(np.unique(hashes[missing]))
+            if len(examples) < EXAMPLE_KEYS:
+                for key in keys[missing].unique():
+                    if key not in examples and len(examples) < EXAMPLE_KEYS:
+                        examples.append(key)
+    orphan_keys = len(np.unique(np.concatenate(orphan_hashes))) if orphan_hashes else 0
+    return {
+        'child_rows': child_rows,
+        'null_keys': null_keys,
+        'orphan_rows': orphan_rows,
+        'orphan_keys': orphan_keys,
+        'orphan_pct': orphan_rows / (child_rows - null_keys) * 100 if child_rows > null_keys else 0.0,
+        'examples': examples
+    }
+
+
+def run_integrity_check(data_dir='core_tables', relationships=RELATIONSHIPS):
+    """
+    Check every relationship whose tables and columns exist in data_dir.
+
+    Returns:
+    --------
+    DataFrame with one row per checked relationship
+    """
+    data_dir = Path(data_dir)
+    key_sets = {}
+    columns = {}
+    results = []
+
+    for name, child_table, child_column, parent_table, parent_column, tolerance in relationships:
+        child_path = data_dir / child_table
+        parent_path = data_dir / parent_table
+        missing_files = [str(p) for p in (child_path, parent_path) if not p.exists()]
+        if missing_files:
+            print(f"   [SKIP] {name}: {', '.join(missing_files)} not found")
+            continue
+        for path in (child_path, parent_path):
+            if path not in columns:
+                columns[path] = table_columns(path)
+        if child_column not in columns[child_path] or parent_column not in columns[parent_path]:
+            print(f"   [SKIP] {name}: {child_table}.{child_column} or {parent_table}.{parent_column} not found")
+            continue
+
+        if (parent_path, parent_column) not in key_sets:
+            key_set = build_key_set(parent_path, parent_column)
+            key_sets[(parent_path, parent_column)] = key_set
+            kind = 'Bloom filter' if isinstance(key_set, BloomFilter) else 'hashed set'
+            print(f"   [OK] {parent_table}.{parent_column}: {len(key_set):,} keys "
+                  f"({kind}, {key_set.nbytes / 1024**2:.1f} MB)")
+        key_set = key_sets[(parent_path, parent_column)]
+
+        stats = check_relationship(child_path, child_column, key_set)
+        passed = tolerance is None or stats['orphan_pct'] <= tolerance
+        results.append({
+            'Relationship': name,
+            'Child': f"{child_table}.{child_column}",
+            'Parent': f"{parent_table}.{parent_column}",
+            'Child Rows': stats['child_rows'],
+            'Null Keys': stats['null_keys'],
+            'Orphan Rows': stats['orphan_rows'],
+            'Orphan Keys': stats['orphan_keys'],
+            'Orphan %': round(stats['orphan_pct'], 4),
+            'Gated': tolerance is not None,
+            'Passed': passed,
+            'Example Orphan Keys': ', '.join(stats['examples'])
+        })
+
+    return pd.DataFrame(results)
+
+
+if __name__ == "__main__":
+    data_dir = sys.argv[1] if len(sys.argv) > 1 else 'core_tables'
+
+    print("=" * 80)
+    print("REFERENTIAL INTEGRITY CHECK (FULL SCALE)")
+    print("=" * 80)
+    print(f"\nData directory: {data_dir}\n")
+
+    report = run_integrity_check(data_dir)
+    if len(report) == 0:
+        print("\nNo relationships could be checked.")
+        exit(1)
+
+    print("\n" + "=" * 80)
+    print("RESULTS")
+    print("=" * 80)
+    for _, row in report.iterrows():
+        status = 'PASS' if row['Passed'] else 'FAIL'
+        if not row['Gated']:
+            status = 'INFO'
+        print(f"\n[{status}] {row['Relationship']} ({row['Child']} -> {row['Parent']})")
+        print(f"   Child rows:   {row['Child Rows']:>12,}")
+        print(f"   Null keys:    {row['Null Keys']:>12,}")
+        print(f"   Orphan rows:  {row['Orphan Rows']:>12,} ({row['Orphan %']:.4f}%)")
+        print(f"   Orphan keys:  {row['Orphan Keys']:>12,}")
+        if row['Example Orphan Keys']:
+            print(f"   Examples:     {row['Example Orphan Keys']}")
+
+    report_file = 'integrity_report.csv'
+    report.to_csv(report_file, index=False, encoding='utf-8-sig')
+    print(f"\nReport saved to: {report_file}")
+
+    failed = report[~report['Passed']]
+    print("\n" + "=" * 80)
+    if len(failed) > 0:
+        print(f"INTEGRITY CHECK: FAILED ({len(failed)} relationship(s) above tolerance)")
+        print("=" * 80)
+        exit(1)
+    print("INTEGRITY CHECK: PASSED")
+    print("=" * 80)
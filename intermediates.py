@@ -0,0 +1,201 @@
+"""
+Binary Intermediate Files Between Stages
+========================================
+
+Stages 2-4 hand their results to the next stage as CSV, which the next stage
+parses again in full. With binary intermediates a stage also (or instead)
+writes an Arrow IPC file (Feather v2, uncompressed) next to the CSV, and the
+next stage memory-maps it: no parsing, and only the columns read are paged in.
+
+    founder_vc_analysis.csv          create_founder_vc_analysis -> filter_founder_vc_final
+    founder_vc_cleaned.csv           clean_founder_vc_final     -> categorize_and_format
+    founder_vc_final_formatted.csv   categorize_and_format      -> University_Group step
+
+Format (PIPELINE_INTERMEDIATES, or --intermediates=<format> on any pipeline script):
+    csv    CSV only (default; the files as before)
+    arrow  Arrow IPC only; CSVs are exported on demand with `python intermediates.py export`
+    both   Arrow IPC for the next stage and the CSV export
+
+The reader uses the binary file only if it is at least as new as the CSV, so
+a CSV edited or re-saved by hand (e.g. in Excel) always wins. Arrow needs
+pyarrow; without it the binary file is a pickle (no parsing, but read in
+full, not memory-mapped). The binary file keeps the written dtypes, so the
+next stage sees the frame exactly as it was written rather than as
+read_csv would re-infer it.
+
+Usage:
+    write_intermediate(df, output_file, index=False, encoding='utf-8-sig')
+    df = read_intermediate(input_file)          # None if there is no usable binary file
+
+    PIPELINE_INTERMEDIATES=both python benchmark.py 1
+    python intermediates.py                                        # list binary intermediates
+    python intermediates.py export founder_vc_final_formatted.csv  # write the CSV from the binary file
+
+Author: Empirical Methods Project
+"""
+
+import os
+import sys
+import time
+import pandas as pd
+from pathlib import Path
+
+try:
+    import pyarrow.feather as feather
+    ARROW_AVAILABLE = True
+except ImportError:
+    ARROW_AVAILABLE = False
+
+FORMATS = ('csv', 'arrow', 'both')
+DEFAULT_FORMAT = 'csv'
+
+# CSV options of each intermediate, for exports from the binary file
+CSV_OPTIONS = {
+    'founder_vc_analysis.csv': {},
+    'founder_vc_cleaned.csv': {'encoding': 'utf-8-sig', 'sep': ','},
+    'founder_vc_final_formatted.csv': {'encoding': 'utf-8-sig', 'sep': ','},
+}
+
+
+def intermediate_format():
+    """Intermediate format from the command line (--intermediates=...) or PIPELINE_INTERMEDIATES"""
+    value = os.environ.get('PIPELINE_INTERMEDIATES', DEFAULT_FORMAT)
+    for arg in sys.argv[1:]:
+        if arg.startswith('--intermediates='):
+            value = arg.split('=', 1)[1]
+    value = value.strip().lower()
+    return value if value in FORMATS else DEFAULT_FORMAT
+
+
+def binary_paths(csv_path):
+    """Candidate binary files of an intermediate CSV, preferred first"""
+    csv_path = Path(csv_path)
+    return [csv_path.with_suffix('.arrow'), csv_path.with_suffix('.pkl')]
+
+
+def write_intermediate(df, csv_path, fmt=None, **to_csv_kwargs):
+    """
+    Write a stage output as CSV and/or a binary file for the next stage.
+
+    Parameters:
+    -----------
+    df : DataFrame
+        Stage output
+    csv_path : str
+        Path of the CSV (the binary file goes next to it as .arrow, or .pkl without pyarrow)
+    fmt : str or None
+        'csv', 'arrow' or 'both' (default: intermediate_format())
+    **to_csv_kwargs
+        DataFrame.to_csv options for the CSV
+
+    Returns:
+    --------
+    List of paths written
+    """
+    fmt = fmt or intermediate_format()
+    written = []
+    # CSV first: the binary file must not be older than the CSV written with it, or the reader skips it
+    if fmt in ('csv', 'both'):
+        df.to_csv(csv_path, **to_csv_kwargs)
+        written.append(Path(csv_path))
+    if fmt in ('arrow', 'both'):
+        arrow_path, pickle_path = binary_paths(csv_path)
+        path = pickle_path
+        if ARROW_AVAILABLE:
+            try:
+                # Uncompressed so the reader can map the buffers instead of decompressing them
+                feather.write_feather(df.reset_index(drop=True), arrow_path, compression='uncompressed')
+                path = arrow_path
+            except Exception as e:
+                # Mixed-type object columns cannot be stored as Arrow; keep a pickle instead
+                print(f"   [CHECK] Arrow write failed for {arrow_path.name} ({e}); using pickle")
+        if path == pickle_path:
+            df.to_pickle(pickle_path)
+        for other in binary_paths(csv_path):
+            if other != path and other.exists():
+                other.unlink()
+        written.append(path)
+    return written
+
+
+def current_binary(csv_path):
+    """Binary file of an intermediate that is at least as new as its CSV (None if there is none)"""
+    csv_path = Path(csv_path)
+    csv_mtime = csv_path.stat().st_mtime_ns if csv_path.exists() else None
+    for path in binary_paths(csv_path):
+        if path.suffix == '.arrow' and not ARROW_AVAILABLE:
+            continue
+        if path.exists() and (csv_mtime is None or path.stat().st_mtime_ns >= csv_mtime):
+            return path
+    return None
+
+
+def read_intermediate(csv_path, columns=None):
+    """
+    Read a stage output from its binary file (memory-mapped Arrow IPC, or pickle).
+
+    Parameters:
+    -----------
+    csv_path : str
+        Path of the intermediate CSV
+    columns : list of str or None
+        Columns to read (only these are paged in from an Arrow file)
+
+    Returns:
+    --------
+    DataFrame, or None if there is no binary file at least as new as the CSV
+    """
+    path = current_binary(csv_path)
+    if path is None:
+        return None
+    print(f"Reading binary intermediate: {path}")
+    if path.suffix == '.arrow':
+        return feather.read_table(path, columns=columns, memory_map=True).to_pandas()
+    df = pd.read_pickle(path)
+    return df[list(columns)] if columns is not None else df
+
+
+def export_csv(csv_path, **to_csv_kwargs):
+    """Write an intermediate's CSV from its binary file (options default to the stage's own)"""
+    df = read_intermediate(csv_path)
+    if df is None:
+        raise FileNotFoundError(f"No binary intermediate for {csv_path}")
+    binary = current_binary(csv_path)
+    options = {**CSV_OPTIONS.get(Path(csv_path).name, {}), **to_csv_kwargs}
+    df.to_csv(csv_path, index=False, **options)
+    # The CSV was written from the binary file, which stays current
+    os.utime(binary)
+    return df
+
+
+if __name__ == "__main__":
+    args = [a for a in sys.argv[1:] if not a.startswith('--')]
+
+    if args and args[0] == 'export':
+        if len(args) < 2:
+            print("Usage: python intermediates.py export <intermediate.csv> [...]")
+            exit(1)
+        for csv_file in args[1:]:
+            start = time.perf_counter()
+            try:
+                df = export_csv(csv_file)
+            except FileNotFoundError as e:
+                print(f"ERROR: {e}")
+                exit(1)
+            print(f"[OK] {csv_file}: {len(df):,} rows exported in {time.perf_counter() - start:.1f}s")
+        exit(0)
+
+    workdir = Path(args[0]) if args else Path('.')
+    print("=" * 80)
+    print("BINARY INTERMEDIATES")
+    print("=" * 80)
+    print(f"Format: {intermediate_format()}  "
+          f"(binary files: {'Arrow IPC, memory-mapped' if ARROW_AVAILABLE else 'pickle (pyarrow not installed)'})\n")
+    for name in CSV_OPTIONS:
+        csv_path = workdir / name
+        binary = current_binary(csv_path)
+        stale = [p.name for p in binary_paths(csv_path) if p.exists() and p != binary]
+        status = f"{binary.name} ({binary.stat().st_size / 2**20:,.1f} MB)" if binary else '-'
+        if stale:
+            status += f"  stale: {', '.join(stale)}"
+        print(f"   {name:<36} csv: {'yes' if csv_path.exists() else 'no ':<4} binary: {status}")
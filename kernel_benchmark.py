@@ -0,0 +1,359 @@
+"""
+Micro-Benchmarks for the Per-Value Classifier Kernels
+=====================================================
+
+The pipeline spends much of its time in small per-value functions applied
+row by row (contains_vc_term, normalize_date, categorize_degree, ...). This
+module times each one on realistic vocabularies at 10^5-10^7 values and
+checks every faster implementation against the reference for equality, so
+none of them can silently change a category.
+
+Reference implementations are loaded straight from the pipeline scripts
+(the function definition plus the module-level constants it uses, e.g.
+vc_terms or the region lists), so the benchmark always measures the code
+that actually runs. Implementations compared:
+    reference    - the script's function, applied the way the script does
+    map_unique   - the same function called once per distinct value, then
+                   broadcast back (pd.factorize)
+    vectorized   - a pandas string-method/array version, where one exists
+
+Throughput is reported per value and per distinct value; a kernel whose
+cost is dominated by a few hundred distinct values gains most from
+map_unique.
+
+Usage:
+    python kernel_benchmark.py                    # 10^5 values
+    python kernel_benchmark.py 1e5 1e6 1e7
+    python kernel_benchmark.py 1e6 --only=normalize_date,categorize_degree
+
+Author: Empirical Methods Project
+"""
+
+import re
+import ast
+import sys
+import time
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from datetime import datetime
+
+import synthetic_data as vocab
+from benchmark import git_commit
+
+REPO_DIR = Path(__file__).resolve().parent
+RESULTS_FILE = REPO_DIR / 'kernel_benchmark_results.csv'
+DEFAULT_SEED = 7
+
+# Patterns the single-founder script passes to create_uni_dummy
+UNI_DUMMIES = {
+    'Harvard': ['harvard'],
+    'MIT': ['massachusetts institute of technology', 'mit ', ' mit'],
+    'Penn': ['university of pennsylvania', 'upenn', 'wharton'],
+    'Brown': ['brown university', 'brown '],
+    'Berkeley': ['berkeley', 'uc berkeley', 'ucb', 'cal berkeley'],
+}
+
+
+# ============================================================================
+# Loading the reference functions from the scripts
+# ============================================================================
+
+def load_reference(script, function_name):
+    """
+    Compile a function out of a pipeline script without running the script.
+
+    The function may be nested (e.g. inside an if/else block); module-level
+    assignments of names it reads are executed first; those that depend on
+    loaded data (NameError) or files (OSError) are skipped, any other error
+    is raised with the script and line.
+    """
+    tree = ast.parse((REPO_DIR / script).read_text(encoding='utf-8'), filename=script)
+    function = next((node for node in ast.walk(tree)
+                     if isinstance(node, ast.FunctionDef) and node.name == function_name), None)
+    if function is None:
+        raise ValueError(f"{function_name} not found in {script}")
+
+    used = {node.id for node in ast.walk(function) if isinstance(node, ast.Name)}
+    namespace = {'pd': pd, 'np': np, 're': re, 'datetime': datetime}
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and any(isinstance(t, ast.Name) and t.id in used for t in node.targets):
+            try:
+                exec(compile(ast.Module(body=[node], type_ignores=[]), script, 'exec'), namespace)
+            except (NameError, OSError):
+                # Reads data the script loads at run time: not a constant the function needs
+                continue
+            except Exception as error:
+                raise RuntimeError(f"{script}:{node.lineno}: could not evaluate "
+                                   f"'{ast.unparse(node)[:80]}' for {function_name}: {error!r}") from error
+    function = ast.fix_missing_locations(ast.Module(body=[function], type_ignores=[]))
+    exec(compile(function, script, 'exec'), namespace)
+    return namespace[function_name], namespace
+
+
+# ============================================================================
+# Realistic input values
+# ============================================================================
+
+def weighted(rng, options, n):
+    """Draw from a vocabulary with a Zipf-like skew (a few values dominate, as in the real data)"""
+    options = list(options)
+    weights = 1.0 / np.arange(1, len(options) + 1) ** 1.1
+    return np.array(options, dtype=object)[rng.choice(len(options), size=n, p=weights / weights.sum())]
+
+
+def with_missing(rng, values, missing=0.2):
+    values = pd.Series(values, dtype=object)
+    return values.where(rng.random(len(values)) >= missing)
+
+
+def deal_type_values(rng, n):
+    investor_types = [f"{t} ({s})" for t in vocab.DEAL_TYPES for s in ['Series A', 'Series B', 'Series C']]
+    options = (list(vocab.DEAL_TYPES) + list(vocab.DEAL_CLASSES) + investor_types +
+               [t for t in vocab.DEAL_TYPE2 if t] + ['Buyout/LBO', 'IPO', 'Debt - General', 'Merger/Acquisition'])
+    return with_missing(rng, weighted(rng, options, n), 0.3)
+
+
+def date_values(rng, n):
+    days = pd.to_datetime(rng.integers(vocab.DAY_2000 - 3_650, vocab.DAY_2023, n), unit='D')
+    styles = rng.choice(4, size=n, p=[0.55, 0.3, 0.1, 0.05])
+    values = pd.Series(days.strftime('%d/%m/%Y'), dtype=object)
+    values[styles == 1] = pd.Series(days.day.astype(str) + '.' + days.month.astype(str) + '.' + days.year.astype(str))[styles == 1]
+    values[styles == 2] = pd.Series(days.strftime('%Y-%m-%d'))[styles == 2]
+    values[styles == 3] = 'Q' + pd.Series(days.quarter.astype(str) + ' ' + days.year.astype(str))[styles == 3]
+    return with_missing(rng, values, 0.1)
+
+
+def degree_values(rng, n):
+    extra = ['MBA', 'Executive MBA', 'JD/MBA', 'CPA', 'CFA', 'Chartered Accountant', 'B.A.', 'M.Eng.',
+             'Ph.D.', 'Graduate', 'Undergraduate Studies', 'LLM', 'BBA', 'MPA (Master of Public Administration)']
+    return with_missing(rng, weighted(rng, list(vocab.DEGREES) + extra, n), 0.15)
+
+
+def deal_size_values(rng, n):
+    sizes = np.round(rng.lognormal(1.2, 1.6, n), 2)
+    values = pd.Series(sizes, dtype=object)
+    as_text = rng.random(n) < 0.3
+    values[as_text] = pd.Series([f"${v * 1_000_000:,.2f}" for v in sizes[as_text]], index=np.flatnonzero(as_text))
+    values[rng.random(n) < 0.02] = 0.0
+    return with_missing(rng, values, 0.3)
+
+
+def currency_input_values(rng, n):
+    # Deal_DealSize as read by categorize_and_format: floats in millions, a few as text
+    values = pd.Series(np.round(rng.lognormal(1.2, 1.6, n), 2), dtype=object)
+    text = rng.random(n) < 0.05
+    values[text] = values[text].astype(str)
+    values[rng.random(n) < 0.02] = ''
+    return with_missing(rng, values, 0.3)
+
+
+def major_values(rng, n):
+    extra = ['Computer Engineering', 'Molecular Biology', 'Public Health', 'International Relations',
+             'History', 'English Literature', 'Jurisprudence', 'Design', 'Undeclared', 'Art History']
+    return with_missing(rng, weighted(rng, [m for m in vocab.MAJORS if m] + extra, n), 0.25)
+
+
+def degree_category_values(rng, n):
+    return with_missing(rng, weighted(rng, ['BSC', 'MBA', 'Other', 'MSC', 'PHD', 'JD', 'CHA', 'ASC'], n), 0.1)
+
+
+def state_values(rng, n):
+    return with_missing(rng, weighted(rng, list(vocab.US_STATES) + list(vocab.NON_US_STATES) + ['Wyoming', 'Hawaii'], n), 0.05)
+
+
+def institute_values(rng, n):
+    long_tail = [f"University No. {i}" for i in range(vocab.OTHER_INSTITUTES)]
+    return with_missing(rng, weighted(rng, list(vocab.INSTITUTES) + ['UC Berkeley', 'MIT Sloan School of Management',
+                                                                     'Wharton School'] + long_tail, n), 0.2)
+
+
+# ============================================================================
+# Faster implementations (must match the reference exactly)
+# ============================================================================
+
+def map_unique(function):
+    """Call a per-value function once per distinct value and broadcast the results back"""
+    def run(values):
+        codes, uniques = pd.factorize(values, use_na_sentinel=False)
+        results = np.empty(len(uniques), dtype=object)
+        results[:] = [function(value) for value in uniques]
+        return pd.Series(results[codes], index=values.index)
+    return run
+
+
+def contains_vc_term_vectorized(values, namespace):
+    pattern = '|'.join(re.escape(term.lower()) for term in namespace['vc_terms'])
+    text = values.astype(str).str.lower()
+    return text.str.contains(pattern, regex=True) & values.notna()
+
+
+def parse_deal_size_vectorized(values, namespace):
+    cleaned = values.astype(str).str.replace('$', '', regex=False).str.replace(',', '', regex=False)
+    numbers = pd.to_numeric(cleaned.where(values.notna()), errors='coerce')
+    return numbers.where(numbers > 0)
+
+
+def assign_region_vectorized(values, namespace):
+    regions = {}
+    for region, states in [('West', 'west'), ('Midwest', 'midwest'), ('South', 'south'), ('Northeast', 'northeast')]:
+        regions.update({state: region for state in namespace[states]})
+    return values.map(regions).fillna('Other')
+
+
+def rank_education_vectorized(values, namespace):
+    text = values.astype(str).str.upper()
+    ranks = [(7, ['PHD']), (6, ['MD', 'DOCTOR OF MEDICINE']), (5, ['JD']), (4, ['MBA']),
+             (3, ['MSC', 'MASTER']), (2, ['BSC', 'BACHELOR']), (1, ['ASC', 'ASSOCIATE'])]
+    conditions = [text.str.contains('|'.join(terms), regex=True).to_numpy() for _, terms in ranks]
+    result = np.select(conditions, [rank for rank, _ in ranks], default=0)
+    return pd.Series(np.where(values.isna().to_numpy(), 0, result), index=values.index)
+
+
+def create_uni_dummy_vectorized(patterns):
+    def run(values, namespace):
+        pattern = '|'.join(re.escape(p.lower()) for p in patterns)
+        return (values.astype(str).str.lower().str.contains(pattern, regex=True) & values.notna()).astype(int)
+    return run
+
+
+# ============================================================================
+# Kernel registry
+# ============================================================================
+
+def scalar(function, **fixed):
+    """Adapter so every kernel is a one-argument function of the value"""
+    return lambda value: function(value, **fixed) if fixed else function(value)
+
+
+KERNELS = {
+    'contains_vc_term': {'script': 'create_founder_vc_analysis.py', 'values': deal_type_values,
+                         'vectorized': contains_vc_term_vectorized},
+    'normalize_date': {'script': 'clean_founder_vc_final.py', 'values': date_values},
+    'categorize_degree': {'script': 'education_records.py', 'values': degree_values},
+    'format_as_currency': {'script': 'categorize_and_format.py', 'values': currency_input_values},
+    'parse_deal_size': {'script': 'prepare_for_stata.py', 'values': deal_size_values,
+                        'vectorized': parse_deal_size_vectorized},
+    'categorize_major': {'script': 'education_records.py', 'values': major_values},
+    'rank_education': {'script': 'prepare_for_stata.py', 'values': degree_category_values,
+                       'vectorized': rank_education_vectorized},
+    'assign_region': {'script': 'prepare_for_stata.py', 'values': state_values,
+                      'vectorized': assign_region_vectorized},
+}
+for dummy, patterns in UNI_DUMMIES.items():
+    KERNELS[f'create_uni_dummy[{dummy}]'] = {
+        'script': 'create_single_founder_dataset.py', 'function': 'create_uni_dummy', 'values': institute_values,
+        # Called row-wise (DataFrame.apply, axis=1) in the script
+        'row_args': (patterns, dummy), 'vectorized': create_uni_dummy_vectorized(patterns),
+    }
+
+
+def implementations(name, spec):
+    """Reference and candidate implementations of one kernel, each taking a Series of values"""
+    function, namespace = load_reference(spec['script'], spec.get('function', name))
+    if 'row_args' in spec:
+        args = spec['row_args']
+        per_value = lambda value: function({'University_Name': value}, *args)
+        reference = lambda values: values.to_frame('University_Name').apply(lambda row: function(row, *args), axis=1)
+    else:
+        per_value = function
+        reference = lambda values: values.apply(function)
+    impls = {'reference': reference, 'map_unique': map_unique(per_value)}
+    if 'vectorized' in spec:
+        impls['vectorized'] = lambda values: spec['vectorized'](values, namespace)
+    return impls
+
+
+def mismatches(expected, actual):
+    """Positions where two results differ (missing values compare equal to each other)"""
+    expected = pd.Series(expected, dtype=object).reset_index(drop=True)
+    actual = pd.Series(actual, dtype=object).reset_index(drop=True)
+    both_missing = expected.isna() & actual.isna()
+    equal = pd.Series([a == b for a, b in zip(expected, actual)], dtype=bool)
+    return np.flatnonzero(~(equal | both_missing).to_numpy())
+
+
+def benchmark_kernel(name, spec, n, seed=DEFAULT_SEED):
+    """Time every implementation of one kernel on n values; returns result rows"""
+    values = spec['values'](np.random.default_rng([seed, n]), n).reset_index(drop=True)
+    n_unique = values.nunique(dropna=False)
+    rows = []
+    expected = None
+    for impl, run in implementations(name, spec).items():
+        start = time.perf_counter()
+        result = run(values)
+        seconds = time.perf_counter() - start
+        if expected is None:
+            expected, bad = result, []
+        else:
+            bad = mismatches(expected, result)
+        rows.append({
+            'kernel': name, 'implementation': impl, 'values': n, 'unique_values': n_unique,
+            'seconds': seconds, 'ns_per_value': seconds / n * 1e9, 'us_per_unique': seconds / n_unique * 1e6,
+            'matches_reference': len(bad) == 0, 'mismatches': len(bad),
+            'example_mismatch': '' if len(bad) == 0 else
+                f"{values.iloc[bad[0]]!r}: {expected.iloc[bad[0]]!r} != {pd.Series(result).iloc[bad[0]]!r}",
+        })
+    return rows
+
+
+def run_benchmarks(sizes=(100_000,), only=None, seed=DEFAULT_SEED):
+    """
+    Run all (or selected) kernels at each size and append to kernel_benchmark_results.csv.
+
+    Parameters:
+    -----------
+    sizes : iterable of int
+        Number of values per run
+    only : list of str or None
+        Kernel names to run (default: all)
+
+    Returns:
+    --------
+    DataFrame with one row per kernel, size and implementation
+    """
+    rows = []
+    for n in sizes:
+        print(f"\n--- {n:,} values ---")
+        for name, spec in KERNELS.items():
+            if only and name not in only and name.split('[')[0] not in only:
+                continue
+            for row in benchmark_kernel(name, spec, n, seed):
+                marker = '[OK]' if row['matches_reference'] else '[CHECK]'
+                print(f"   {marker:<7} {name:<28} {row['implementation']:<11} {row['seconds']:8.3f}s "
+                      f"{row['ns_per_value']:9.0f} ns/value {row['us_per_unique']:10.1f} us/unique "
+                      f"({row['unique_values']:,} unique)"
+                      + (f"  {row['mismatches']:,} mismatches, e.g. {row['example_mismatch']}" if row['mismatches'] else ''))
+                rows.append(row)
+
+    results = pd.DataFrame(rows)
+    if len(results):
+        reference = results[results['implementation'] == 'reference'].set_index(['kernel', 'values'])['seconds']
+        results['speedup'] = [reference[(k, v)] / s for k, v, s in zip(results['kernel'], results['values'], results['seconds'])]
+        results.insert(0, 'commit', git_commit())
+        results.insert(0, 'timestamp', pd.Timestamp.now().isoformat(timespec='seconds'))
+        results.to_csv(RESULTS_FILE, mode='a', header=not RESULTS_FILE.exists(), index=False)
+    return results
+
+
+if __name__ == "__main__":
+    sizes = [int(float(a)) for a in sys.argv[1:] if not a.startswith('--')] or [100_000]
+    only = None
+    for arg in sys.argv[1:]:
+        if arg.startswith('--only='):
+            only = arg.split('=', 1)[1].split(',')
+
+    print("=" * 80)
+    print("KERNEL MICRO-BENCHMARKS")
+    print("=" * 80)
+    results = run_benchmarks(sizes, only=only)
+
+    print("\n" + "=" * 80)
+    print("SUMMARY (speedup over reference)")
+    print("=" * 80)
+    print(results.pivot_table(index='kernel', columns=['values', 'implementation'], values='speedup', sort=False)
+          .round(1).to_string())
+    print(f"\nResults appended to {RESULTS_FILE.name}")
+    if not results['matches_reference'].all():
+        print("\n[CHECK] Some implementations do NOT match the reference - do not use them in the pipeline")
+        exit(1)
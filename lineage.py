@@ -0,0 +1,425 @@
+"""
+Row Lineage for Pipeline Filters
+================================
+
+Records what every filter of the pipeline removed, so the fate of any
+founder, company or deal can be explained without rerunning stages.
+
+For each filter a stage records (lineage/<stage>.npz, next to the outputs):
+    - rows before and after, and unique PersonID / CompanyID / DealID after
+    - the entities that lost at least one row ("dropped")
+    - the entities that lost all their rows ("eliminated")
+    - for the stage's first filter, every entity in the stage input
+
+Entities are stored as surrogate keys: a PitchBook id "12345-67P" becomes
+1234567 (the type suffix is implied by the column), other ids a 62-bit hash
+with bit 62 set (computed for all distinct ids of a column at once). Key sets are compressed roaring-style: keys are split into
+chunks of 65,536 by their high bits and each chunk is kept as a sorted
+uint16 array, or as a 8 KB bitmap when it holds more than 4,096 keys.
+
+Recording a filter costs one factorize of each id column plus a few
+vectorized passes over the codes; the file is written once, when the stage
+closes the log (or exits), and is a few bytes per dropped entity.
+
+Usage in a stage:
+    lineage = LineageLog('clean_founder_vc_final')
+    keep = df['Person_Gender'].notna()
+    lineage.record('Blank gender', df, keep)       # mask aligned with df
+    df = df[keep].copy()
+    lineage.record('Deal type', df, filtered_df)   # or the filtered frame
+    lineage.summary()                              # retention table per filter
+    lineage.close()                                # write lineage/<stage>.npz
+
+Usage:
+    python lineage.py                              # retention table of every stage
+    python lineage.py PersonID 205980-67P          # explain one entity's fate
+    python lineage.py CompanyID 51234-02 [lineage_dir]
+
+Author: Empirical Methods Project
+"""
+
+import os
+import sys
+import json
+import atexit
+import weakref
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+from streaming_profiler import hash_values
+
+DEFAULT_LINEAGE_DIR = 'lineage'
+
+# Entity columns tracked when present, with their labels in the summary
+ENTITY_COLUMNS = {
+    'PersonID': 'Founders',
+    'CompanyID': 'Companies',
+    'DealID': 'Deals',
+}
+
+# Filtering stages in pipeline order (explain() walks them in this order)
+STAGE_ORDER = [
+    'create_founder_vc_analysis',
+    'filter_founder_vc_final',
+    'clean_founder_vc_final',
+    'prepare_for_stata',
+]
+
+DIGITS = '0123456789'
+ARRAY_MAX = 4096
+
+
+def _decimal_values(digits):
+    """Integers of a fixed-width array of ASCII digit strings (no per-string parsing)"""
+    codes = np.ascontiguousarray(digits).view(np.uint32).reshape(len(digits), -1)
+    values = np.zeros(len(digits), dtype=np.uint64)
+    for column in codes.T:
+        present = column != 0
+        values[present] = values[present] * np.uint64(10) + (column[present] - ord('0')).astype(np.uint64)
+    return values
+
+
+def surrogate_keys(entity_ids):
+    """Stable integer keys for ids: digits of a PitchBook id, else a hash with bit 62 set"""
+    text = np.char.strip(np.asarray(entity_ids, dtype=object).astype(str))
+    keys = np.zeros(len(text), dtype=np.uint64)
+    if len(text) == 0:
+        return keys
+    # PitchBook id: digits without a leading zero, '-', two digits, an optional letter
+    # ("12345-67P" -> "12345", "-", "67P"), tested on all ids at once
+    parts = np.char.partition(text, '-')
+    head, dash, tail = parts[:, 0], parts[:, 1], parts[:, 2]
+    suffix = np.char.lstrip(tail, DIGITS)
+    suffix_len = np.char.str_len(suffix)
+    pitchbook = ((dash == '-') & (np.char.str_len(head) > 0) & (np.char.str_len(np.char.lstrip(head, DIGITS)) == 0)
+                 & ~np.char.startswith(head, '0') & (np.char.str_len(tail) == 2 + suffix_len)
+                 & ((suffix_len == 0) | ((suffix_len == 1) & np.char.isalpha(suffix) & (suffix <= 'z'))))
+    if pitchbook.any():
+        keys[pitchbook] = (_decimal_values(head[pitchbook]) * np.uint64(100)
+                           + _decimal_values(tail[pitchbook].astype('U2')))
+    other = ~pitchbook
+    if other.any():
+        hashes = hash_values(pd.Series(text[other].astype(object)))
+        keys[other] = (hashes & np.uint64((1 << 62) - 1)) | np.uint64(1 << 62)
+    return keys
+
+
+def surrogate_key(entity_id):
+    """Surrogate key of a single id"""
+    return int(surrogate_keys([entity_id])[0])
+
+
+def factorize_keys(values, decode=None):
+    """(codes, keys): per-row codes (-1 = missing) into the surrogate keys of the unique ids"""
+    codes, uniques = pd.factorize(values)
+    if decode is not None:
+        # Integer-encoded ids (surrogate_keys.py): only the distinct ids are decoded
+        uniques = decode(uniques)
+    return codes, surrogate_keys(uniques)
+
+
+class RoaringBitmap:
+    """
+    Compressed set of uint64 keys (roaring layout: uint16 arrays or bitmaps per 65,536 keys).
+
+    Parameters:
+    -----------
+    highs : array of uint64
+        Sorted high bits (key >> 16) of the non-empty chunks
+    counts : array of int64
+        Keys per chunk; chunks with more than 4,096 keys are bitmaps
+    containers : list of arrays
+        Sorted uint16 low bits, or 8,192 packed bytes for bitmap chunks
+    """
+
+    def __init__(self, highs=None, counts=None, containers=None):
+        self.highs = np.asarray(highs if highs is not None else [], dtype=np.uint64)
+        self.counts = np.asarray(counts if counts is not None else [], dtype=np.int64)
+        self.containers = containers or []
+
+    @classmethod
+    def from_keys(cls, keys):
+        keys = np.unique(np.asarray(keys, dtype=np.uint64))
+        if len(keys) == 0:
+            return cls()
+        highs, starts, counts = np.unique(keys >> np.uint64(16), return_index=True, return_counts=True)
+        lows = (keys & np.uint64(0xFFFF)).astype(np.uint16)
+        containers = []
+        for start, count in zip(starts, counts):
+            chunk = lows[start:start + count]
+            if count > ARRAY_MAX:
+                bits = np.zeros(1 << 16, dtype=bool)
+                bits[chunk] = True
+                chunk = np.packbits(bits, bitorder='little')
+            containers.append(chunk)
+        return cls(highs, counts, containers)
+
+    def __len__(self):
+        return int(self.counts.sum())
+
+    def __contains__(self, key):
+        key = int(key)
+        i = np.searchsorted(self.highs, np.uint64(key >> 16))
+        if i == len(self.highs) or self.highs[i] != key >> 16:
+            return False
+        low = key & 0xFFFF
+        container = self.containers[i]
+        if self.counts[i] > ARRAY_MAX:
+            return bool(container[low >> 3] >> (low & 7) & 1)
+        j = np.searchsorted(container, low)
+        return bool(j < len(container) and container[j] == low)
+
+    def to_array(self):
+        """All keys, sorted"""
+        parts = []
+        for high, count, container in zip(self.highs, self.counts, self.containers):
+            if count > ARRAY_MAX:
+                container = np.flatnonzero(np.unpackbits(container, bitorder='little'))
+            parts.append((high << np.uint64(16)) | container.astype(np.uint64))
+        return np.concatenate(parts) if parts else np.zeros(0, dtype=np.uint64)
+
+    @property
+    def nbytes(self):
+        return self.highs.nbytes + self.counts.nbytes + sum(c.nbytes for c in self.containers)
+
+    def to_arrays(self, prefix):
+        """Flat arrays for np.savez (array containers and bitmaps concatenated separately)"""
+        dense = self.counts > ARRAY_MAX
+        arrays = {f'{prefix}/highs': self.highs, f'{prefix}/counts': self.counts}
+        arrays[f'{prefix}/lows'] = np.concatenate(
+            [c for c, d in zip(self.containers, dense) if not d] or [np.zeros(0, dtype=np.uint16)])
+        arrays[f'{prefix}/bits'] = np.concatenate(
+            [c for c, d in zip(self.containers, dense) if d] or [np.zeros(0, dtype=np.uint8)])
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays, prefix):
+        highs, counts = arrays[f'{prefix}/highs'], arrays[f'{prefix}/counts']
+        lows, bits = arrays[f'{prefix}/lows'], arrays[f'{prefix}/bits']
+        containers = []
+        low_at = bit_at = 0
+        for count in counts:
+            if count > ARRAY_MAX:
+                containers.append(bits[bit_at:bit_at + 8192])
+                bit_at += 8192
+            else:
+                containers.append(lows[low_at:low_at + count])
+                low_at += count
+        return cls(highs, counts, containers)
+
+
+class LineageLog:
+    """
+    Lineage of one stage's filters, written to <lineage_dir>/<stage>.npz on close() or exit.
+
+    Parameters:
+    -----------
+    stage : str
+        Stage name (usually the script name without .py)
+    lineage_dir : str or None
+        Output directory (default: $PIPELINE_LINEAGE_DIR or lineage/)
+    run_id : str or None
+        Run id stored with the records (default: $PIPELINE_RUN_ID)
+    keys : KeyDictionary or None
+        Set when the stage works on integer surrogate keys, so the lineage still
+        records the natural ids (can also be assigned later as .keys)
+    """
+
+    def __init__(self, stage, lineage_dir=None, run_id=None, keys=None):
+        self.stage = stage
+        self.lineage_dir = Path(lineage_dir or os.environ.get('PIPELINE_LINEAGE_DIR', DEFAULT_LINEAGE_DIR))
+        self.run_id = run_id or os.environ.get('PIPELINE_RUN_ID', '')
+        self.records = []
+        self.bitmaps = {}
+        self.keys = keys
+        self._keys = (None, {})         # (weakref to last frame, column -> (codes, keys))
+        self._saved = 0                 # records already written
+        # Stages that stop early (exit(1) on an empty sample) still leave their lineage
+        atexit.register(self.close)
+
+    def _factorized(self, frame, column):
+        # Consecutive filters on the same frame (e.g. VC then founder filter) share the factorize
+        ref, cache = self._keys
+        if ref is None or ref() is not frame:
+            cache = {}
+            self._keys = (weakref.ref(frame), cache)
+        if column not in cache:
+            values = frame[column]
+            decode = None
+            if self.keys is not None and pd.api.types.is_integer_dtype(values.dtype):
+                decode = lambda uniques: self.keys.decode(uniques, column)
+            cache[column] = factorize_keys(values, decode)
+        return cache[column]
+
+    def record(self, filter_name, before, kept, alive=None):
+        """
+        Record one filter.
+
+        Parameters:
+        -----------
+        filter_name : str
+            Name shown in the summary and in explanations
+        before : DataFrame
+            Rows the filter was applied to
+        kept : boolean mask aligned with before, or DataFrame
+            Rows that passed; a DataFrame is matched to before by index
+        alive : boolean mask or None
+            Rows of before still in the sample when filters are chained on
+            one frame (rows outside it are neither before nor after)
+        """
+        if isinstance(kept, pd.DataFrame):
+            if not before.index.is_unique:
+                raise ValueError(f"{filter_name}: index of the input frame is not unique; pass a mask")
+            kept = before.index.isin(kept.index)
+        kept = np.asarray(kept, dtype=bool)
+        alive = np.ones(len(before), dtype=bool) if alive is None else np.asarray(alive, dtype=bool)
+        kept = kept & alive
+        dropped = alive & ~kept
+
+        index = len(self.records)
+        entry = {'run_id': self.run_id, 'stage': self.stage, 'filter': filter_name,
+                 'rows_before': int(alive.sum()), 'rows_after': int(kept.sum())}
+        for column in ENTITY_COLUMNS:
+            if column not in before.columns:
+                continue
+            codes, keys = self._factorized(before, column)
+            present = {}
+            for name, rows in (('before', alive), ('after', kept), ('dropped', dropped)):
+                flags = np.zeros(len(keys), dtype=bool)
+                flags[codes[rows & (codes >= 0)]] = True
+                present[name] = flags
+            entry[f'{column}_before'] = int(present['before'].sum())
+            entry[f'{column}_after'] = int(present['after'].sum())
+            self.bitmaps[(index, 'dropped', column)] = RoaringBitmap.from_keys(keys[present['dropped']])
+            self.bitmaps[(index, 'eliminated', column)] = RoaringBitmap.from_keys(
+                keys[present['before'] & ~present['after']])
+            if index == 0:
+                self.bitmaps[(index, 'input', column)] = RoaringBitmap.from_keys(keys[present['before']])
+        self.records.append(entry)
+        return entry
+
+    def after(self, column):
+        """Unique values of an entity column after the last recorded filter"""
+        return self.records[-1][f'{column}_after']
+
+    def save(self):
+        self.lineage_dir.mkdir(parents=True, exist_ok=True)
+        arrays = {'records': np.array(json.dumps(self.records))}
+        for (index, kind, column), bitmap in self.bitmaps.items():
+            arrays.update(bitmap.to_arrays(f'{index}/{kind}/{column}'))
+        np.savez(self.lineage_dir / f'{self.stage}.npz', **arrays)
+        self._saved = len(self.records)
+
+    def close(self):
+        """Write the lineage file if filters were recorded since the last save"""
+        if self.records and self._saved != len(self.records):
+            self.save()
+
+    def summary(self):
+        """Retention table: the stage input, then the sample after each filter"""
+        return summary_table(self.records)
+
+
+def summary_table(records):
+    """Retention table from lineage records (one stage)"""
+    if not records:
+        return pd.DataFrame()
+    columns = [c for c in ENTITY_COLUMNS if f'{c}_before' in records[0]]
+    initial = records[0]['rows_before']
+    rows = [{'Filter Stage': 'Initial', 'Total Rows': initial,
+             **{f'Unique {ENTITY_COLUMNS[c]}': records[0][f'{c}_before'] for c in columns}}]
+    for entry in records:
+        rows.append({'Filter Stage': f"After {entry['filter']}", 'Total Rows': entry['rows_after'],
+                     **{f'Unique {ENTITY_COLUMNS[c]}': entry.get(f'{c}_after') for c in columns},
+                     'Rows Removed': entry['rows_before'] - entry['rows_after']})
+    table = pd.DataFrame(rows)
+    table['Rows Removed'] = table['Rows Removed'].fillna(0).astype(int)
+    table['Retention Rate'] = [f"{n / initial * 100:.2f}%" if initial else '' for n in table['Total Rows']]
+    return table
+
+
+def load_stage(stage, lineage_dir=DEFAULT_LINEAGE_DIR):
+    """(records, bitmaps) of a stage's lineage file, or None if the stage has none"""
+    path = Path(lineage_dir) / f'{stage}.npz'
+    if not path.exists():
+        return None
+    with np.load(path) as arrays:
+        data = {name: arrays[name] for name in arrays.files}
+    records = json.loads(str(data.pop('records')))
+    prefixes = {name.rsplit('/', 1)[0] for name in data}
+    bitmaps = {}
+    for prefix in prefixes:
+        index, kind, column = prefix.split('/')
+        bitmaps[(int(index), kind, column)] = RoaringBitmap.from_arrays(data, prefix)
+    return records, bitmaps
+
+
+def stages_in(lineage_dir=DEFAULT_LINEAGE_DIR):
+    """Stages with lineage files, pipeline stages first"""
+    found = sorted(p.stem for p in Path(lineage_dir).glob('*.npz'))
+    return [s for s in STAGE_ORDER if s in found] + [s for s in found if s not in STAGE_ORDER]
+
+
+def explain(column, entity_id, lineage_dir=DEFAULT_LINEAGE_DIR):
+    """
+    Fate of one entity through the recorded filters.
+
+    Parameters:
+    -----------
+    column : str
+        Entity column ('PersonID', 'CompanyID' or 'DealID')
+    entity_id : str
+        The id as it appears in the data
+    lineage_dir : str
+        Directory with the stages' lineage files
+
+    Returns:
+    --------
+    DataFrame with one row per event (Stage, Filter, Event), ending with the
+    filter that eliminated the entity or with its presence in the last stage
+    """
+    key = surrogate_key(entity_id)
+    events = []
+    for stage in stages_in(lineage_dir):
+        records, bitmaps = load_stage(stage, lineage_dir)
+        if (0, 'input', column) not in bitmaps:
+            continue
+        if key not in bitmaps[(0, 'input', column)]:
+            events.append((stage, '', 'not in stage input'))
+            break
+        for index, entry in enumerate(records):
+            if key in bitmaps[(index, 'eliminated', column)]:
+                events.append((stage, entry['filter'], 'eliminated (all rows removed)'))
+                return pd.DataFrame(events, columns=['Stage', 'Filter', 'Event'])
+            if key in bitmaps[(index, 'dropped', column)]:
+                events.append((stage, entry['filter'], 'some rows removed'))
+        events.append((stage, '', 'kept'))
+    return pd.DataFrame(events, columns=['Stage', 'Filter', 'Event'])
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    if len(args) in (0, 1):
+        lineage_dir = args[0] if args else DEFAULT_LINEAGE_DIR
+        stages = stages_in(lineage_dir)
+        if not stages:
+            print(f"ERROR: no lineage files in {lineage_dir}")
+            exit(1)
+        for stage in stages:
+            print("\n" + "=" * 100)
+            print(stage)
+            print("=" * 100)
+            print(summary_table(load_stage(stage, lineage_dir)[0]).to_string(index=False))
+    else:
+        column, entity_id = args[0], args[1]
+        lineage_dir = args[2] if len(args) > 2 else DEFAULT_LINEAGE_DIR
+        if column not in ENTITY_COLUMNS:
+            print(f"ERROR: column must be one of {', '.join(ENTITY_COLUMNS)}")
+            exit(1)
+        events = explain(column, entity_id, lineage_dir)
+        if events.empty:
+            print(f"ERROR: no lineage for {column} in {lineage_dir}")
+            exit(1)
+        print(f"{column} {entity_id}:")
+        print(events.to_string(index=False))
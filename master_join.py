@@ -0,0 +1,254 @@
+"""
+Master File Join over the Core Tables
+=====================================
+
+Builds master-file rows from the core tables:
+
+    Deal -> Company (CompanyID) -> DealInvestorRelation (DealID)
+         -> PersonPositionRelation (CompanyID = EntityID) -> Person (PersonID)
+         -> PersonEducationRelation (PersonID)
+
+i.e. one row per deal x investor x company person x education record, with
+the 60 master columns (MASTER_COLUMNS). All joins are left joins, so deals
+without investors, people or education still appear.
+
+Founder-focused mode keeps only what create_founder_vc_analysis.py can use:
+VC deals (Deal.DealClass contains a VC term; the stage's VC-deal test
+reduces to this) and founders (Person.PrimaryPositionLevel contains
+"founder", the stage's founder test). The founder PersonIDs and the VC
+DealIDs/CompanyIDs are collected first from narrow reads of Person.csv and
+Deal.csv; every other table is then streamed in chunks and semi-joined on
+those key sets (64-bit hashed ID sets as in integrity_check.py, confirmed
+exactly on the survivors) before the join. Its rows are exactly the
+master rows that pass the stage's VC and founder filters, in the same order.
+
+Values are read and written as text, exactly as in the core tables;
+as_read_csv() types a joined frame the way read_csv types the written file
+(create_founder_vc_analysis.py --direct uses this instead of a master file).
+
+Usage:
+    from master_join import join_master, as_read_csv
+    master = join_master('core_tables')                      # full master file
+    founders = as_read_csv(join_master('core_tables', founders_only=True))
+
+Author: Empirical Methods Project
+"""
+
+import re
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+from streaming_profiler import hash_values, read_chunks
+from integrity_check import HashedIdSet
+
+CHUNK_SIZE = 500_000
+
+# Same terms as create_founder_vc_analysis.py (case-insensitive substring match)
+VC_TERMS = [
+    'VC', 'Venture Capital', 'Early Stage VC', 'Later Stage VC',
+    'Seed Round', 'Series A', 'Series B', 'Series C', 'Series D',
+    'Series E', 'Series F', 'Series G', 'Series H',
+    'venture capital-backed', 'vc-backed'
+]
+
+# Master file column order (see column_frequency_analysis.md)
+MASTER_COLUMNS = [
+    'CompanyID', 'CompanyName', 'Company_CompanyFinancingStatus', 'Company_Employees',
+    'Company_YearFounded', 'Company_PrimaryIndustrySector', 'Company_PrimaryIndustryGroup',
+    'Company_HQCity', 'Company_HQState_Province', 'Company_HQCountry', 'Company_PrimaryContactPBId',
+    'Company_Revenue', 'Company_NetIncome', 'Company_FirstFinancingDealID',
+    'Company_FirstFinancingDealType', 'Company_FirstFinancingDealType2', 'Company_FirstFinancingDealType3',
+    'Company_FirstFinancingStatus', 'Deal_DealNo', 'DealID', 'Deal_DealDate', 'Deal_DealSize',
+    'Deal_DealStatus', 'Deal_VCRound', 'Deal_DealType', 'Deal_DealType2', 'Deal_DealClass',
+    'Deal_DealSynopsis', 'Deal_Employees', 'Deal_BusinessStatus', 'Deal_FinancingStatus',
+    'Deal_SiteLocation', 'Deal_OriginalRegistrationDate', 'Deal_Revenue', 'Deal_GrossProfit',
+    'Deal_NetIncome', 'InvestorID', 'Investor_DealType', 'Investor_DealSize', 'Investor_DealDate',
+    'PersonID', 'Person_FullName', 'Person_LastName', 'Person_FirstName', 'Person_MiddleName',
+    'Person_Gender', 'Person_Prefix', 'Person_University_Institution', 'PrimaryCompanyID',
+    'Person_PrimaryCompany', 'Person_PrimaryCompanyType', 'Person_PrimaryPosition',
+    'Person_PrimaryPositionLevel', 'Person_Biography', 'Person_Location', 'Person_City',
+    'Education_Degree', 'Education_Major_Concentration', 'Education_Institute', 'Education_GraduatingYear',
+]
+
+
+def _prefixed(prefix):
+    return {c[len(prefix):]: c for c in MASTER_COLUMNS if c.startswith(prefix)}
+
+
+# Master columns read from each table: source column -> master column
+MASTER_SOURCES = {
+    'Deal.csv': {'DealID': 'DealID', 'CompanyID': 'CompanyID', **_prefixed('Deal_')},
+    'Company.csv': {'CompanyID': 'CompanyID', 'CompanyName': 'CompanyName', **_prefixed('Company_')},
+    'DealInvestorRelation.csv': {'DealID': 'DealID', 'InvestorID': 'InvestorID', **_prefixed('Investor_')},
+    'PersonPositionRelation.csv': {'PersonID': 'PersonID', 'EntityID': 'CompanyID'},
+    'Person.csv': {'PersonID': 'PersonID', 'PrimaryCompanyID': 'PrimaryCompanyID', **_prefixed('Person_')},
+    'PersonEducationRelation.csv': {'PersonID': 'PersonID', **_prefixed('Education_')},
+}
+
+
+def missing_core_tables(core_tables_dir):
+    """Tables of MASTER_SOURCES not found in core_tables_dir"""
+    return [table for table in MASTER_SOURCES if not (Path(core_tables_dir) / table).exists()]
+
+
+def contains_vc_term(values):
+    """Vectorized create_founder_vc_analysis.contains_vc_term: any VC term in the lowercased text"""
+    pattern = '|'.join(re.escape(term.lower()) for term in VC_TERMS)
+    return values.fillna('').str.lower().str.contains(pattern, regex=True).to_numpy(dtype=bool)
+
+
+def is_founder_level(values):
+    """create_founder_vc_analysis.py's founder test on Person_PrimaryPositionLevel"""
+    return values.fillna('').str.lower().str.contains('founder', regex=False).to_numpy(dtype=bool)
+
+
+def read_source(core_tables_dir, table, semi_join=None, chunksize=CHUNK_SIZE):
+    """
+    Master columns of one core table, streamed in chunks and optionally semi-joined.
+
+    Parameters:
+    -----------
+    core_tables_dir : str or Path
+        Directory with the core tables
+    table : str
+        Table file name (a key of MASTER_SOURCES)
+    semi_join : dict or None
+        Master column -> keys (array-like); a row is kept only if its value is in every key set
+    chunksize : int
+        Rows per chunk
+
+    Returns:
+    --------
+    DataFrame with the table's master columns (text)
+    """
+    path = Path(core_tables_dir) / table
+    sources = MASTER_SOURCES[table]
+    header = pd.read_csv(path, nrows=0).columns
+    usecols = [c for c in sources if c in header]
+    key_sets = {column: (HashedIdSet(hash_values(pd.Series(np.asarray(keys, dtype=object)))), pd.Index(keys))
+                for column, keys in (semi_join or {}).items()}
+
+    parts = []
+    for chunk in read_chunks(path, chunksize=chunksize, usecols=usecols):
+        chunk = chunk[usecols].rename(columns=sources)
+        for column, (hashed, keys) in key_sets.items():
+            chunk = chunk[hashed.contains(hash_values(chunk[column]))]
+            # Hash matches are confirmed on the (few) surviving rows
+            chunk = chunk[chunk[column].isin(keys)]
+        parts.append(chunk)
+    if not parts:
+        return pd.DataFrame(columns=[sources[c] for c in usecols])
+    return pd.concat(parts, ignore_index=True)
+
+
+def vc_deal_keys(core_tables_dir, chunksize=CHUNK_SIZE):
+    """(DealIDs, CompanyIDs) of the VC deals in Deal.csv"""
+    deal_ids, company_ids = [], []
+    for chunk in read_chunks(Path(core_tables_dir) / 'Deal.csv', chunksize=chunksize,
+                             usecols=['DealID', 'CompanyID', 'DealClass']):
+        vc = chunk[contains_vc_term(chunk['DealClass'])]
+        deal_ids.append(vc['DealID'].dropna())
+        company_ids.append(vc['CompanyID'].dropna())
+    return pd.unique(pd.concat(deal_ids)), pd.unique(pd.concat(company_ids))
+
+
+def founder_person_ids(core_tables_dir, chunksize=CHUNK_SIZE):
+    """PersonIDs whose PrimaryPositionLevel marks them as founders"""
+    founders = []
+    for chunk in read_chunks(Path(core_tables_dir) / 'Person.csv', chunksize=chunksize,
+                             usecols=['PersonID', 'PrimaryPositionLevel']):
+        founders.append(chunk.loc[is_founder_level(chunk['PrimaryPositionLevel']), 'PersonID'].dropna())
+    return pd.unique(pd.concat(founders))
+
+
+# Text read_csv parses as booleans (its default true_values/false_values)
+BOOL_VALUES = {'True': True, 'TRUE': True, 'true': True, 'False': False, 'FALSE': False, 'false': False}
+
+
+def read_csv_typed(values):
+    """
+    One text column typed as read_csv infers it: all missing -> float64 NaN,
+    all booleans -> bool (object if any are missing), all numbers -> int64
+    (float64 if any are missing or any is fractional), else text unchanged.
+    """
+    present = values.dropna()
+    complete = len(present) == len(values)
+    if present.empty:
+        return pd.Series(np.nan, index=values.index, name=values.name, dtype=np.float64)
+    if present.isin(BOOL_VALUES).all():
+        flags = values.map(BOOL_VALUES)
+        return flags.astype(bool) if complete else flags.astype(object)
+    try:
+        numbers = pd.to_numeric(present)  # raises on the first non-number
+    except (ValueError, TypeError):
+        return values
+    if complete:
+        return numbers
+    return pd.to_numeric(values).astype(np.float64)
+
+
+def as_read_csv(df):
+    """
+    A text frame typed as pd.read_csv types it when read back from a written file.
+
+    Stages written against the master file rely on read_csv's type inference
+    (numbers as int/float, empty cells as NaN); each joined column is typed by
+    the same rules in place of writing and re-parsing the frame, so they see
+    identical values.
+    """
+    return pd.DataFrame({column: read_csv_typed(df[column]) for column in df.columns}, index=df.index)
+
+
+def join_master(core_tables_dir='core_tables', founders_only=False, log=print):
+    """
+    Master file rows from the core tables.
+
+    Parameters:
+    -----------
+    core_tables_dir : str or Path
+        Directory with the core tables
+    founders_only : bool
+        Keep only VC deals and their founders (semi-joins before the join)
+    log : callable
+        Progress messages
+
+    Returns:
+    --------
+    DataFrame with MASTER_COLUMNS (text values)
+    """
+    missing = missing_core_tables(core_tables_dir)
+    if missing:
+        raise FileNotFoundError(f"Core tables missing in {core_tables_dir}: {', '.join(missing)} "
+                                f"(the master file joins {', '.join(MASTER_SOURCES)})")
+
+    semi = {table: None for table in MASTER_SOURCES}
+    if founders_only:
+        deal_ids, company_ids = vc_deal_keys(core_tables_dir)
+        founders = founder_person_ids(core_tables_dir)
+        log(f"  VC deals: {len(deal_ids):,} (companies: {len(company_ids):,}); founders: {len(founders):,}")
+        semi['Deal.csv'] = {'DealID': deal_ids}
+        semi['Company.csv'] = {'CompanyID': company_ids}
+        semi['DealInvestorRelation.csv'] = {'DealID': deal_ids}
+        semi['PersonPositionRelation.csv'] = {'CompanyID': company_ids, 'PersonID': founders}
+
+    tables = {}
+    for table in ['Deal.csv', 'Company.csv', 'DealInvestorRelation.csv', 'PersonPositionRelation.csv']:
+        tables[table] = read_source(core_tables_dir, table, semi[table])
+        log(f"  {table}: {len(tables[table]):,} rows")
+    if founders_only:
+        # Only people linked to a VC company as founders
+        linked = pd.unique(tables['PersonPositionRelation.csv']['PersonID'])
+        semi['Person.csv'] = {'PersonID': linked}
+        semi['PersonEducationRelation.csv'] = {'PersonID': linked}
+    for table in ['Person.csv', 'PersonEducationRelation.csv']:
+        tables[table] = read_source(core_tables_dir, table, semi[table])
+        log(f"  {table}: {len(tables[table]):,} rows")
+
+    # Rows without a founder are dropped by the stage anyway, so founder links are an inner join
+    master = (tables['Deal.csv'].merge(tables['Company.csv'], on='CompanyID', how='left')
+              .merge(tables['DealInvestorRelation.csv'], on='DealID', how='left')
+              .merge(tables['PersonPositionRelation.csv'], on='CompanyID', how='inner' if founders_only else 'left')
+              .merge(tables['Person.csv'], on='PersonID', how='left')
+              .merge(tables['PersonEducationRelation.csv'], on='PersonID', how='left'))
+    return master.reindex(columns=MASTER_COLUMNS)
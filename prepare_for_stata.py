@@ -20,6 +20,17 @@ import numpy as np
 import re
 from datetime import datetime
 
+from dependency_check import check_dependencies
+from instrumentation import RunLog
+from lineage import LineageLog
+from diagnostics import Diagnostics
+from education_records import categorize_major
+from deal_investors import load_deal_investor_index
+
+run = RunLog('prepare_for_stata')
+lineage = LineageLog('prepare_for_stata')
+diag = Diagnostics()
+
 print("="*80)
 print("FOUNDER-VC DATA PREPARATION FOR STATA ANALYSIS")
 print("="*80)
@@ -31,6 +42,7 @@ print()
 
 print("PHASE 1: Loading and Initial Filtering")
 print("-" * 80)
+run.start("PHASE 1: Loading and Initial Filtering")
 
 # Load founder-level data
 df = pd.read_csv('founder_vc_final_formatted_with_groups.csv')
@@ -48,6 +60,7 @@ print()
 
 print("PHASE 2: Geography Filter - US Only")
 print("-" * 80)
+run.start("PHASE 2: Geography Filter - US Only", df)
 
 # Define US states (50 states + DC)
 us_states = [
@@ -64,15 +77,14 @@ us_states = [
 ]
 
 # Check current states
-print(f"Unique states/provinces before filter: {df['Company_HQState_Province'].nunique()}")
-non_us = df[~df['Company_HQState_Province'].isin(us_states)]['Company_HQState_Province'].value_counts()
-if len(non_us) > 0:
-    print(f"Non-US locations found: {len(non_us)}")
-    print(non_us.head(10))
-
 # Filter to US only
-df = df[df['Company_HQState_Province'].isin(us_states)].copy()
-print(f"After US filter: {len(df):,} rows ({df['CompanyID'].nunique():,} companies)")
+keep = df['Company_HQState_Province'].isin(us_states)
+diag.unique(df, ['Company_HQState_Province'], "States/provinces before filter:")
+diag.add("Non-US locations (top 10)", lambda: df.loc[~keep, 'Company_HQState_Province'].value_counts().head(10))
+diag.flush()
+lineage.record('US filter', df, keep)
+df = df[keep].copy()
+print(f"After US filter: {len(df):,} rows ({lineage.after('CompanyID'):,} companies)")
 print()
 
 # ============================================================================
@@ -81,6 +93,7 @@ print()
 
 print("PHASE 3: Parsing Deal Dates and Filtering Missing Years")
 print("-" * 80)
+run.start("PHASE 3: Parsing Deal Dates and Filtering Missing Years", df)
 
 def parse_deal_date(date_str):
     """Parse DD.MM.YYYY format"""
@@ -101,7 +114,9 @@ print(f"  Missing dates: {df['Deal_Date_Parsed'].isna().sum():,}")
 
 # Filter out deals with missing Deal_Year
 before_year_filter = len(df)
-df = df[df['Deal_Year'].notna()].copy()
+keep = df['Deal_Year'].notna()
+lineage.record('Deal_Year filter', df, keep)
+df = df[keep].copy()
 print(f"After excluding missing Deal_Year: {len(df):,} rows (dropped {before_year_filter - len(df):,})")
 print(f"  Year range: {df['Deal_Year'].min():.0f} - {df['Deal_Year'].max():.0f}")
 print()
@@ -112,6 +127,7 @@ print()
 
 print("PHASE 4: Parsing Deal Amounts")
 print("-" * 80)
+run.start("PHASE 4: Parsing Deal Amounts", df)
 
 def parse_deal_size(amount_str):
     """Parse $X,XXX,XXX.XX format"""
@@ -135,7 +151,9 @@ print(f"  Median: ${df['Deal_DealSize_num'].median():,.0f}")
 
 # Exclude rows with missing deal size
 before_filter = len(df)
-df = df[df['Deal_DealSize_num'].notna()].copy()
+keep = df['Deal_DealSize_num'].notna()
+lineage.record('deal size filter', df, keep)
+df = df[keep].copy()
 print(f"After excluding missing deal size: {len(df):,} rows (dropped {before_filter - len(df):,})")
 print()
 
@@ -148,6 +166,7 @@ df['log_DealSize'] = np.log(df['Deal_DealSize_num'])
 
 print("PHASE 5: Creating Company Controls")
 print("-" * 80)
+run.start("PHASE 5: Creating Company Controls", df)
 
 # Log employees with missing indicator
 df['Employees_Missing'] = df['Company_Employees'].isna().astype(int)
@@ -167,70 +186,13 @@ print()
 
 print("PHASE 6: Mapping Majors to Broad Categories")
 print("-" * 80)
+run.start("PHASE 6: Mapping Majors to Broad Categories", df)
 
-def categorize_major(major_str):
-    """Map major to one of 8 broad categories"""
-    if pd.isna(major_str):
-        return 'Missing'
-    
-    major_lower = str(major_str).lower()
-    
-    # Computer Science / Engineering
-    cs_keywords = ['computer', 'software', 'programming', 'information system', 
-                   'information technology', 'data science', 'artificial intelligence',
-                   'machine learning', 'electrical engineering', 'computer engineering',
-                   'systems engineering', 'engineering', 'mechanical', 'civil',
-                   'industrial', 'aerospace', 'chemical engineering', 'bioengineering']
-    if any(kw in major_lower for kw in cs_keywords):
-        return 'CS_Engineering'
-    
-    # Natural Sciences
-    science_keywords = ['mathematics', 'physics', 'chemistry', 'biology', 'math',
-                       'biochemistry', 'biophysics', 'neuroscience', 'molecular',
-                       'genetics', 'applied math', 'statistics', 'astrophysics',
-                       'geology', 'environmental science']
-    if any(kw in major_lower for kw in science_keywords):
-        return 'Natural_Sciences'
-    
-    # Medicine / Health Sciences
-    med_keywords = ['medicine', 'medical', 'health', 'nursing', 'pharmacy',
-                   'biomedical', 'clinical', 'anatomy', 'physiology', 'pathology',
-                   'immunology', 'epidemiology', 'public health', 'dentistry']
-    if any(kw in major_lower for kw in med_keywords):
-        return 'Medicine_Health'
-    
-    # Business / Finance / Economics
-    business_keywords = ['business', 'finance', 'economics', 'accounting', 'marketing',
-                        'management', 'mba', 'entrepreneurship', 'commerce', 'banking',
-                        'strategy', 'operations', 'real estate', 'investment']
-    if any(kw in major_lower for kw in business_keywords):
-        return 'Business_Econ'
-    
-    # Social Sciences
-    social_keywords = ['psychology', 'sociology', 'anthropology', 'political science',
-                      'government', 'international relations', 'policy', 'geography',
-                      'social work', 'education', 'communications']
-    if any(kw in major_lower for kw in social_keywords):
-        return 'Social_Sciences'
-    
-    # Humanities / Arts
-    humanities_keywords = ['history', 'english', 'literature', 'philosophy', 'art',
-                          'music', 'theater', 'language', 'linguistics', 'creative writing',
-                          'film', 'design', 'architecture', 'media studies']
-    if any(kw in major_lower for kw in humanities_keywords):
-        return 'Humanities_Arts'
-    
-    # Law
-    if 'law' in major_lower or 'legal' in major_lower or 'jurisprudence' in major_lower:
-        return 'Law'
-    
-    # Default
-    return 'Other'
-
+# categorize_major (education_records.py): 8 broad categories by keyword, Missing if no major
 df['Major_Category'] = df['Education_Major_Concentration'].apply(categorize_major)
 
-print("Major categories distribution:")
-print(df['Major_Category'].value_counts())
+diag.value_counts(df, 'Major_Category', "Major categories distribution")
+diag.flush()
 print()
 
 # ============================================================================
@@ -239,6 +201,7 @@ print()
 
 print("PHASE 7: Education Level Ranking")
 print("-" * 80)
+run.start("PHASE 7: Education Level Ranking", df)
 
 def rank_education(degree_cat):
     """Rank education levels"""
@@ -272,6 +235,25 @@ print()
 
 print("PHASE 8: Collapsing to Deal Level with Team Composition")
 print("-" * 80)
+run.start("PHASE 8: Collapsing to Deal Level with Team Composition", df)
+
+# Deal/company fields below are taken from the first row of each deal,
+# so verify they really are constant within DealID and CompanyID
+dependency_summary = check_dependencies(df).summary()
+violated = dependency_summary[dependency_summary['Violating Keys'] > 0]
+if len(violated) > 0:
+    print("WARNING: fields not constant per key (first row will be used):")
+    for _, row in violated.iterrows():
+        print(f"  {row['Key']} -> {row['Dependent']}: {row['Violating Keys']:,} keys "
+              f"(e.g. {row['Example Keys']})")
+else:
+    print("Company/deal fields constant within CompanyID and DealID")
+
+# Syndicate metrics over every investor of the deal (deal -> investor index), not over the
+# founder rows, which keep only the investor rows that survived the one-row-per-founder dedup
+investor_index = load_deal_investor_index('core_tables', 'master_file.csv', frame=df)
+syndicates = investor_index.metrics(df['DealID']).to_dict('index')
+print(f"Deal -> investor index: {len(investor_index):,} deals, {investor_index.n_edges:,} deal-investor pairs")
 
 # Group by DealID and compute team composition
 deal_teams = []
@@ -356,13 +338,12 @@ for deal_id, group in df.groupby('DealID'):
     rank_to_label = {7: 'PhD', 6: 'MD', 5: 'JD', 4: 'MBA', 3: 'MSC', 2: 'BSC', 1: 'ASC', 0: 'Other'}
     team_dict['Max_Education'] = rank_to_label.get(team_dict['Max_Education_Rank'], 'Other')
     
-    # Investor syndicate size
-    investor_count = group['InvestorID'].nunique()
-    # Subtract 1 if all are NaN (nunique counts NaN as 1)
-    if group['InvestorID'].isna().all():
-        investor_count = 0
-    team_dict['SyndicateSize'] = investor_count
-    team_dict['Investor_Missing'] = int(group['InvestorID'].isna().all())
+    # Investor syndicate (all investors of the deal)
+    syndicate = syndicates[deal_id]
+    team_dict['SyndicateSize'] = syndicate['SyndicateSize']
+    team_dict['Investor_Missing'] = int(syndicate['SyndicateSize'] == 0)
+    team_dict['Repeat_Investors'] = syndicate['Repeat_Investors']
+    team_dict['Investor_DealSize_Total'] = syndicate['Investor_DealSize_Total']
     
     # Keep first occurrence of deal/company variables (they're the same within deal)
     first_row = group.iloc[0]
@@ -408,6 +389,7 @@ print()
 
 print("PHASE 9: Creating Stage Variables")
 print("-" * 80)
+run.start("PHASE 9: Creating Stage Variables", deal_df)
 
 deal_df['Stage_Seed'] = (deal_df['Deal_DealType'] == 'Seed Round').astype(int)
 deal_df['Stage_Early'] = (deal_df['Deal_DealType'] == 'Early Stage VC').astype(int)
@@ -431,6 +413,7 @@ print()
 
 print("PHASE 10: Creating Region Categories")
 print("-" * 80)
+run.start("PHASE 10: Creating Region Categories", deal_df)
 
 # Define US regions
 northeast = ['Connecticut', 'Maine', 'Massachusetts', 'New Hampshire', 'Rhode Island',
@@ -467,6 +450,7 @@ print()
 
 print("PHASE 11: Validation Checks")
 print("-" * 80)
+run.start("PHASE 11: Validation Checks", deal_df)
 
 # Check 1: Share variables sum to 1
 deal_df['Share_Sum'] = deal_df['Share_Ivy'] + deal_df['Share_Top8'] + deal_df['Share_Other']
@@ -493,6 +477,7 @@ print()
 
 print("PHASE 12: Summary Statistics")
 print("-" * 80)
+run.start("PHASE 12: Summary Statistics", deal_df)
 
 print("Deal Size:")
 print(f"  Mean: ${deal_df['Deal_DealSize_num'].mean():,.0f}")
@@ -522,6 +507,7 @@ print()
 
 print("PHASE 13: Exporting Files")
 print("-" * 80)
+run.start("PHASE 13: Exporting Files", deal_df)
 
 # CSV export
 csv_filename = 'deal_level_analysis.csv'
@@ -546,6 +532,7 @@ print()
 
 print("PHASE 14: Creating Documentation")
 print("-" * 80)
+run.start("PHASE 14: Creating Documentation", deal_df)
 
 # Create comprehensive documentation
 doc = f"""# Data Preparation Log
@@ -626,3 +613,5 @@ print("  3. Estimate baseline model with reghdfe")
 print("  4. Test heterogeneity specifications")
 print("="*80)
 
+lineage.close()
+run.close(deal_df)
@@ -1,19 +1,27 @@
 """
 Quick preview of the master file with sample records
+
+Uses the sidecar row index (row_index.py) to pick records uniformly at
+random from the whole file instead of the first 1000 rows.
 """
 import pandas as pd
 
+from row_index import RowIndex
+
 print("=" * 100)
 print("MASTER FILE PREVIEW")
 print("=" * 100)
 
-# Load a sample
+# Load a uniform random sample through the row index (built once, then reused)
 master_file = r'G:\School\BOCCONI\1st semester\empirical\master_file.csv'
-print("\nLoading first 1000 rows...")
-df = pd.read_csv(master_file, nrows=1000, low_memory=False)
+sample_size = 1000
+seed = 42
+index = RowIndex.open(master_file)
+print(f"\nLoading {sample_size} random rows of {len(index):,}...")
+df = index.read_rows(index.sample(sample_size, seed=seed))
 
 print(f"\nDataset Info:")
-print(f"  Shape: {df.shape}")
+print(f"  Total rows: {len(index):,}")
 print(f"  Columns: {df.shape[1]}")
 print(f"  Sample rows: {df.shape[0]}")
 
@@ -27,11 +35,10 @@ print("\n" + "=" * 100)
 print("SAMPLE RECORD #1: Complete Company-Deal-Investor-Person Record")
 print("=" * 100)
 
-# Find a row with all IDs populated
-complete_row = df[(df['CompanyID'].notna()) & 
-                  (df['DealID'].notna()) & 
-                  (df['InvestorID'].notna()) & 
-                  (df['PersonID'].notna())].iloc[0]
+# Random row (over the whole file) with all IDs populated
+complete_row_number = index.sample(1, require=['CompanyID', 'DealID', 'InvestorID', 'PersonID'], seed=seed)[0]
+complete_row = index.row(complete_row_number)
+print(f"\n(Row {complete_row_number:,} of {len(index):,})")
 
 print("\nCOMPANY INFORMATION:")
 print(f"  CompanyID:         {complete_row['CompanyID']}")
@@ -71,13 +78,13 @@ if pd.notna(complete_row['Education_Degree']):
     print(f"  Graduating Year:   {complete_row['Education_GraduatingYear']}")
 
 print("\n" + "=" * 100)
-print("BASIC STATISTICS (from first 1000 rows)")
+print(f"BASIC STATISTICS (availability: full file; top values: random sample of {len(df)} rows)")
 print("=" * 100)
 
 print("\nData Availability:")
-print(f"  Rows with all 4 IDs (Company, Deal, Investor, Person): {len(df[(df['CompanyID'].notna()) & (df['DealID'].notna()) & (df['InvestorID'].notna()) & (df['PersonID'].notna())])}")
-print(f"  Rows with Company & Deal:                              {len(df[(df['CompanyID'].notna()) & (df['DealID'].notna())])}")
-print(f"  Rows with Company, Deal & Investor:                    {len(df[(df['CompanyID'].notna()) & (df['DealID'].notna()) & (df['InvestorID'].notna())])}")
+print(f"  Rows with all 4 IDs (Company, Deal, Investor, Person): {index.count(['CompanyID', 'DealID', 'InvestorID', 'PersonID']):,}")
+print(f"  Rows with Company & Deal:                              {index.count(['CompanyID', 'DealID']):,}")
+print(f"  Rows with Company, Deal & Investor:                    {index.count(['CompanyID', 'DealID', 'InvestorID']):,}")
 
 print("\nTop 10 Industries (where available):")
 if df['Company_PrimaryIndustrySector'].notna().sum() > 0:
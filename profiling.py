@@ -0,0 +1,188 @@
+"""
+Opt-In Profiling for Pipeline Stages
+====================================
+
+Standard cProfile and line-timing output for any instrumented stage, so a
+regression can be profiled without editing the script.
+
+Enable with PIPELINE_PROFILE=1 (or --profile on the command line of any
+pipeline script, or `python benchmark.py 1 --profile`). Each stage then
+writes into profiles/ (PIPELINE_PROFILE_DIR overrides):
+    <stage>_<run_id>.prof          cProfile stats (snakeviz, pstats)
+    <stage>_<run_id>.txt           top functions by cumulative time
+    <stage>_<run_id>_lines.txt     per-line hits and time for the hot targets
+
+Line timing targets are function names (timed on every call) or step names
+starting with STEP/PHASE/Step (the script's own lines while that step runs,
+for top-level loops such as the Phase 8 collapse). Defaults are in
+LINE_TARGETS; PIPELINE_PROFILE_LINES replaces them with a comma-separated
+list, e.g.
+    PIPELINE_PROFILE_LINES="get_best_vc_deal,PHASE 8"
+
+Line timing uses sys.settrace, so the timed code runs several times slower;
+compare lines with each other, not with unprofiled runs.
+
+Usage:
+    PIPELINE_PROFILE=1 python prepare_for_stata.py
+    python -m pstats profiles/prepare_for_stata_<run_id>.prof
+
+Author: Empirical Methods Project
+"""
+
+import io
+import os
+import sys
+import time
+import pstats
+import cProfile
+import linecache
+from pathlib import Path
+
+DEFAULT_PROFILE_DIR = 'profiles'
+TOP_FUNCTIONS = 40
+
+# Hot spots timed line by line when profiling is on (function or step name prefixes)
+LINE_TARGETS = {
+    'create_founder_vc_analysis': ['get_best_vc_deal'],
+    'prepare_for_stata': ['PHASE 8'],
+    'clean_founder_vc_final': ['normalize_date'],
+    'categorize_and_format': ['categorize_degree'],
+}
+
+
+def profiling_enabled():
+    return os.environ.get('PIPELINE_PROFILE', '') not in ('', '0') or '--profile' in sys.argv
+
+
+def line_targets(stage):
+    if os.environ.get('PIPELINE_PROFILE_LINES'):
+        return [t.strip() for t in os.environ['PIPELINE_PROFILE_LINES'].split(',') if t.strip()]
+    return LINE_TARGETS.get(stage, [])
+
+
+class LineTimer:
+    """
+    Per-line hit counts and wall time for selected functions and script regions.
+
+    A line's time runs from its line event to the next event in the same
+    frame, so it includes everything the line calls.
+    """
+
+    def __init__(self, functions=()):
+        self.functions = set(functions)
+        self.timings = {}           # (filename, first line, name) -> {line: [hits, seconds]}
+        self._last = {}             # frame -> (timing dict, line, time)
+        self._regions = {}          # frame -> timing dict
+
+    def _record(self, frame, event, arg):
+        now = time.perf_counter()
+        last = self._last.get(frame)
+        if last is not None:
+            timing, line, then = last
+            timing[line][1] += now - then
+        if event == 'line':
+            timing = last[0] if last is not None else self._timing_for(frame)
+            entry = timing.setdefault(frame.f_lineno, [0, 0.0])
+            entry[0] += 1
+            self._last[frame] = (timing, frame.f_lineno, time.perf_counter())
+        elif event == 'return':
+            self._last.pop(frame, None)
+        elif last is not None:
+            self._last[frame] = (last[0], last[1], time.perf_counter())
+        return self._record
+
+    def _timing_for(self, frame):
+        if frame in self._regions:
+            return self._regions[frame]
+        code = frame.f_code
+        return self.timings.setdefault((code.co_filename, code.co_firstlineno, code.co_name), {})
+
+    def _global(self, frame, event, arg):
+        if event == 'call' and frame.f_code.co_name in self.functions:
+            return self._record
+        return None
+
+    def start(self):
+        if self.functions:
+            sys.settrace(self._global)
+
+    def stop(self):
+        sys.settrace(None)
+        for frame in list(self._regions):
+            self.end_region(frame)
+
+    def begin_region(self, frame, name):
+        """Time the lines of a running frame (e.g. the script's module frame) until end_region"""
+        timing = self.timings.setdefault((frame.f_code.co_filename, frame.f_code.co_firstlineno, name), {})
+        self._regions[frame] = timing
+        frame.f_trace_lines = True
+        frame.f_trace = self._record
+        if sys.gettrace() is None:
+            sys.settrace(self._global)
+
+    def end_region(self, frame):
+        if frame in self._regions:
+            self._record(frame, 'return', None)
+            del self._regions[frame]
+            frame.f_trace = None
+            if not self.functions and not self._regions:
+                sys.settrace(None)
+
+    def report(self):
+        """Text report: per target, lines in source order with hits, seconds, per hit and share"""
+        out = io.StringIO()
+        for (filename, _, name), timing in self.timings.items():
+            if not timing:
+                continue
+            total = sum(seconds for _, seconds in timing.values())
+            out.write(f"{'=' * 100}\n{name}  ({filename})\nTotal: {total:.3f}s\n\n")
+            out.write(f"{'Line':>6} {'Hits':>10} {'Time (s)':>10} {'Per hit (us)':>13} {'% Time':>7}  Source\n")
+            for line in sorted(timing):
+                hits, seconds = timing[line]
+                source = linecache.getline(filename, line).rstrip()
+                out.write(f"{line:>6} {hits:>10,} {seconds:>10.4f} {seconds / hits * 1e6:>13.1f} "
+                          f"{seconds / total * 100 if total else 0:>6.1f}%  {source}\n")
+            out.write('\n')
+        return out.getvalue()
+
+
+class StageProfiler:
+    """cProfile over a whole stage plus line timing of its targets"""
+
+    def __init__(self, stage, run_id, profile_dir=None, targets=None):
+        self.stage = stage
+        self.run_id = run_id
+        self.profile_dir = Path(profile_dir or os.environ.get('PIPELINE_PROFILE_DIR', DEFAULT_PROFILE_DIR))
+        targets = line_targets(stage) if targets is None else targets
+        # Targets that name steps are regions of the script; the rest are functions
+        self.step_targets = [t for t in targets if t.split()[0].isupper() or t.split()[0] == 'Step']
+        self.lines = LineTimer([t for t in targets if t not in self.step_targets])
+        self.profile = cProfile.Profile()
+
+    def start(self):
+        self.lines.start()
+        self.profile.enable()
+
+    def step_started(self, name, frame):
+        if frame is not None and any(name.startswith(t) for t in self.step_targets):
+            self.lines.begin_region(frame, f"{self.stage}: {name}")
+
+    def step_ended(self, frame):
+        if frame is not None:
+            self.lines.end_region(frame)
+
+    def stop(self):
+        """Stop profiling and write the profile files; returns their paths"""
+        self.profile.disable()
+        self.lines.stop()
+        self.profile_dir.mkdir(parents=True, exist_ok=True)
+        base = f"{self.stage}_{self.run_id}".replace(':', '-')
+        paths = [self.profile_dir / f"{base}.prof", self.profile_dir / f"{base}.txt"]
+        self.profile.dump_stats(paths[0])
+        with open(paths[1], 'w', encoding='utf-8') as f:
+            pstats.Stats(self.profile, stream=f).sort_stats('cumulative').print_stats(TOP_FUNCTIONS)
+        report = self.lines.report()
+        if report:
+            paths.append(self.profile_dir / f"{base}_lines.txt")
+            paths[-1].write_text(report, encoding='utf-8')
+        return paths
@@ -0,0 +1,198 @@
+"""
+Byte-Offset Row Index for Large CSVs
+====================================
+
+A sidecar index (<file>.rowidx.npz) with the byte offset of every record
+and one bit per ID column saying whether it is populated. With it, previews
+can seek straight to any row, take uniform random samples or the first N
+complete rows without scanning the file, and report exact ID coverage for
+the whole file.
+
+Record starts are found with the same quote-aware scan as the parallel
+profiler (a newline inside a quoted field does not end a record), so
+multi-line biographies are handled. The index is rebuilt automatically when
+the CSV's size or mtime changes.
+
+reservoir_sample() is the one-pass alternative when no index is wanted:
+a uniform sample of n rows in bounded memory.
+
+Usage:
+    from row_index import RowIndex
+    index = RowIndex.open('master_file.csv')
+    index.read_rows(index.sample(5, require=['CompanyID', 'DealID']))
+    index.read_rows(index.first_complete(10))
+
+    python row_index.py master_file.csv        # build (or refresh) the sidecar index
+
+Author: Empirical Methods Project
+"""
+
+import io
+import os
+import sys
+import json
+import numpy as np
+import pandas as pd
+
+from streaming_profiler import read_chunks
+
+ID_COLUMNS = ['CompanyID', 'DealID', 'InvestorID', 'PersonID']
+BLOCK_SIZE = 16 << 20
+
+
+def record_offsets(csv_path, block_size=BLOCK_SIZE):
+    """Byte offset of every record start (header included), plus the file size as end sentinel"""
+    starts = [np.zeros(1, dtype=np.int64)]
+    position = 0
+    in_quotes = np.uint8(0)
+    with open(csv_path, 'rb') as f:
+        while True:
+            block = f.read(block_size)
+            if not block:
+                break
+            data = np.frombuffer(block, dtype=np.uint8)
+            quoted = np.bitwise_xor.accumulate((data == ord('"')).astype(np.uint8)) ^ in_quotes
+            starts.append(np.flatnonzero((data == ord('\n')) & (quoted == 0)).astype(np.int64) + position + 1)
+            in_quotes = quoted[-1]
+            position += len(data)
+    offsets = np.concatenate(starts)
+    # A trailing newline produces a "record" starting at EOF; keep exactly one end sentinel
+    offsets = offsets[offsets < position]
+    return np.append(offsets, position)
+
+
+def index_path(csv_path):
+    return f"{csv_path}.rowidx.npz"
+
+
+class RowIndex:
+    """Record offsets and ID-population bit flags for one CSV"""
+
+    def __init__(self, csv_path, offsets, flags, id_columns, size, mtime_ns, encoding='utf-8'):
+        self.csv_path = csv_path
+        self.offsets = offsets          # header start, row starts..., end of file
+        self.flags = flags              # uint8, bit i set if id_columns[i] is populated
+        self.id_columns = list(id_columns)
+        self.size = size
+        self.mtime_ns = mtime_ns
+        self.encoding = encoding
+        with open(csv_path, 'rb') as f:
+            self.header = f.read(int(offsets[1] - offsets[0]))
+
+    def __len__(self):
+        return len(self.offsets) - 2
+
+    @classmethod
+    def build(cls, csv_path, id_columns=ID_COLUMNS, chunksize=500_000, encoding='utf-8'):
+        """Scan the file once for record offsets and once (ID columns only) for flags"""
+        stat = os.stat(csv_path)
+        offsets = record_offsets(csv_path)
+        flags = []
+        for chunk in read_chunks(csv_path, chunksize=chunksize, usecols=id_columns, encoding=encoding):
+            bits = np.zeros(len(chunk), dtype=np.uint8)
+            for bit, column in enumerate(id_columns):
+                bits |= chunk[column].notna().to_numpy().astype(np.uint8) << bit
+            flags.append(bits)
+        flags = np.concatenate(flags) if flags else np.empty(0, dtype=np.uint8)
+        if len(flags) != len(offsets) - 2:
+            raise ValueError(f"Row count mismatch in {csv_path}: {len(offsets) - 2:,} records "
+                             f"by byte scan vs {len(flags):,} parsed rows (blank lines?)")
+        return cls(csv_path, offsets, flags, id_columns, stat.st_size, stat.st_mtime_ns, encoding)
+
+    def save(self, path=None):
+        path = path or index_path(self.csv_path)
+        meta = {'id_columns': self.id_columns, 'size': self.size,
+                'mtime_ns': self.mtime_ns, 'encoding': self.encoding}
+        with open(path, 'wb') as f:
+            np.savez(f, offsets=self.offsets, flags=self.flags, meta=np.array(json.dumps(meta)))
+        return path
+
+    @classmethod
+    def load(cls, csv_path, path=None):
+        with np.load(path or index_path(csv_path)) as data:
+            meta = json.loads(str(data['meta']))
+            return cls(csv_path, data['offsets'], data['flags'], meta['id_columns'],
+                       meta['size'], meta['mtime_ns'], meta['encoding'])
+
+    @classmethod
+    def open(cls, csv_path, id_columns=ID_COLUMNS, rebuild=False):
+        """Load the sidecar index, (re)building it if missing or stale"""
+        stat = os.stat(csv_path)
+        if not rebuild and os.path.exists(index_path(csv_path)):
+            index = cls.load(csv_path)
+            if (index.size, index.mtime_ns) == (stat.st_size, stat.st_mtime_ns) and index.id_columns == list(id_columns):
+                return index
+        print(f"   Building row index for {csv_path} (one pass)...")
+        index = cls.build(csv_path, id_columns)
+        print(f"   [OK] Indexed {len(index):,} rows -> {index.save()}")
+        return index
+
+    def mask(self, require=None):
+        """Boolean mask of rows where every column in `require` is populated"""
+        require = self.id_columns if require is None else require
+        bits = np.uint8(sum(1 << self.id_columns.index(c) for c in require))
+        return (self.flags & bits) == bits
+
+    def count(self, require=None):
+        return int(self.mask(require).sum())
+
+    def first_complete(self, n, require=None):
+        """Row numbers of the first n rows with all required IDs"""
+        return np.flatnonzero(self.mask(require))[:n]
+
+    def sample(self, n, require=None, seed=None):
+        """Uniform random row numbers (without replacement) among rows with all required IDs"""
+        candidates = np.flatnonzero(self.mask(require)) if require is not None else np.arange(len(self))
+        rng = np.random.default_rng(seed)
+        return np.sort(rng.choice(candidates, size=min(n, len(candidates)), replace=False))
+
+    def read_rows(self, rows, **read_csv_kwargs):
+        """Read the given rows by seeking to their offsets (result in the order given)"""
+        rows = np.asarray(rows, dtype=np.int64)
+        if len(rows) == 0:
+            return pd.read_csv(io.BytesIO(self.header), encoding=self.encoding, **read_csv_kwargs)
+        order = np.argsort(rows, kind='stable')
+        parts = [self.header]
+        with open(self.csv_path, 'rb') as f:
+            for row in rows[order]:
+                f.seek(int(self.offsets[row + 1]))
+                record = f.read(int(self.offsets[row + 2] - self.offsets[row + 1]))
+                parts.append(record if record.endswith(b'\n') else record + b'\n')
+        df = pd.read_csv(io.BytesIO(b''.join(parts)), encoding=self.encoding,
+                         low_memory=False, **read_csv_kwargs)
+        df.index = rows[order]
+        return df.loc[rows]
+
+    def row(self, row_number):
+        """A single row as a Series"""
+        return self.read_rows([row_number]).iloc[0]
+
+
+def reservoir_sample(csv_path, n, seed=None, chunksize=100_000, **read_csv_kwargs):
+    """
+    Uniform random sample of n rows in one pass and bounded memory.
+
+    Each row gets a random priority and the n smallest are kept (equivalent to
+    reservoir sampling), processed a chunk at a time.
+    """
+    rng = np.random.default_rng(seed)
+    reservoir = None
+    row_start = 0
+    for chunk in pd.read_csv(csv_path, chunksize=chunksize, low_memory=False, **read_csv_kwargs):
+        chunk.index = np.arange(row_start, row_start + len(chunk))
+        row_start += len(chunk)
+        chunk = chunk.assign(_priority=rng.random(len(chunk)))
+        reservoir = chunk if reservoir is None else pd.concat([reservoir, chunk])
+        reservoir = reservoir.nsmallest(n, '_priority')
+    if reservoir is None:
+        return pd.DataFrame()
+    return reservoir.drop(columns='_priority').sort_index()
+
+
+if __name__ == "__main__":
+    csv_file = sys.argv[1] if len(sys.argv) > 1 else r'G:\School\BOCCONI\1st semester\empirical\master_file.csv'
+    index = RowIndex.open(csv_file, rebuild='--rebuild' in sys.argv[2:])
+    print(f"\nRows: {len(index):,}")
+    for column in index.id_columns:
+        print(f"  {column + ':':<12} {index.count([column]):>12,} populated")
+    print(f"  All IDs:     {index.count():>12,}")
@@ -0,0 +1,309 @@
+"""
+Sharded Parallel Execution of Stages 2-6
+========================================
+
+Runs create_founder_vc_analysis -> filter -> clean -> categorize ->
+prepare_for_stata on N shards of the master file at once, one process per
+shard, and merges the shard outputs into the same files a serial run writes.
+
+Nearly every step of these stages works within one company (first/optimal
+VC deal per company, row filters, per-row cleaning and categorization, the
+collapse to one row per deal). The exception is stage 2's one row per
+founder: a serial founder keeps only the first of their companies in
+master file order. Rows are therefore partitioned by company group -
+companies linked through a shared PersonID, directly or via other
+companies - and the group's smallest CompanyID hash picks the shard. All
+rows of a group land in the same shard in serial order, so each shard's
+outputs are exactly the serial outputs restricted to its companies.
+
+Sharding copies raw records (quote-aware byte offsets, as in row_index.py)
+into shards/n<N>/shard_<k>/master_file.csv; the shards are reused until
+master_file.csv changes. Each shard then runs the stages in its own
+directory, one Python process per stage (as in benchmark.py), with the two
+manual Excel steps emulated between stages. Logs, run_log.jsonl and
+lineage/ stay in the shard directories.
+
+Merging is deterministic: the serial outputs are ordered by CompanyID
+(founder-level files) or DealID (deal-level files), and a shard preserves
+the serial order within its companies, so concatenating the shards and
+stable-sorting on that key reproduces the serial row order. Values are
+merged as text, so numbers and dates are written back unchanged.
+
+Usage:
+    python sharded_pipeline.py                          # current directory, one shard per CPU
+    python sharded_pipeline.py bench_data/x1 --shards=32
+    python sharded_pipeline.py . --shards=64 --workers=32 --reshard
+
+Author: Empirical Methods Project
+"""
+
+import os
+import sys
+import json
+import time
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+from row_index import record_offsets
+from streaming_profiler import read_chunks, hash_values
+from benchmark import run_stage, HANDOFFS
+from education_records import EducationRecords
+
+SHARD_KEY = 'CompanyID'
+# Companies sharing a value of this column go to the same shard
+LINK_KEY = 'PersonID'
+MASTER_FILE = 'master_file.csv'
+
+# Stages 2-6 in pipeline order: (stage name, script)
+SHARDED_STAGES = [
+    ('create_founder_vc_analysis', 'create_founder_vc_analysis.py'),
+    ('filter_founder_vc_final', 'filter_founder_vc_final.py'),
+    ('clean_founder_vc_final', 'clean_founder_vc_final.py'),
+    ('categorize_and_format', 'categorize_and_format.py'),
+    ('prepare_for_stata', 'prepare_for_stata.py'),
+]
+
+# Outputs merged into the work directory: (file, sort key, read/write options)
+MERGED_OUTPUTS = [
+    ('founder_vc_analysis.csv', 'CompanyID', {}),
+    ('founder_vc_final.csv', 'CompanyID', {'sep': ';', 'encoding': 'utf-8-sig'}),
+    ('founder_vc_cleaned.csv', 'CompanyID', {'encoding': 'utf-8-sig'}),
+    ('founder_vc_final_formatted.csv', 'CompanyID', {'encoding': 'utf-8-sig'}),
+    ('founder_vc_final_formatted_with_groups.csv', 'CompanyID', {}),
+    ('deal_level_analysis.csv', 'DealID', {}),
+]
+MERGED_STATA = ('deal_level_analysis.dta', 'DealID')
+# Per-founder education records (education_records.py), in the merged founder_vc_analysis.csv order
+MERGED_EDUCATION = ('founder_vc_education.npz', 'founder_vc_analysis.csv')
+
+
+def company_groups(company_hashes, link_companies, link_persons):
+    """
+    Representative of each company's group: companies linked by shared persons.
+
+    Parameters:
+    -----------
+    company_hashes : np.ndarray
+        CompanyID hash of every row
+    link_companies, link_persons : np.ndarray
+        CompanyID and PersonID hashes of the (company, person) pairs
+
+    Returns:
+    --------
+    np.ndarray with the smallest CompanyID hash of each row's group
+    """
+    companies, row_company = np.unique(company_hashes, return_inverse=True)
+    if len(link_companies) == 0:
+        return company_hashes
+    company = np.searchsorted(companies, link_companies)
+    person = np.unique(link_persons, return_inverse=True)[1]
+
+    # Min-label propagation company -> person -> company with pointer jumping;
+    # labels only decrease, and are stable once equal across every link
+    label = np.arange(len(companies))
+    while True:
+        person_label = np.full(person.max() + 1, len(companies))
+        np.minimum.at(person_label, person, label[company])
+        new_label = label.copy()
+        np.minimum.at(new_label, company, person_label[person])
+        new_label = new_label[new_label]
+        if np.array_equal(new_label, label):
+            break
+        label = new_label
+    return companies[label][row_company]
+
+
+def shard_numbers(csv_path, n_shards, chunksize=1_000_000):
+    """Shard of every row of the master file: hash of its company group modulo n_shards"""
+    company_hashes, link_companies, link_persons = [], [], []
+    for chunk in read_chunks(csv_path, chunksize=chunksize, usecols=[SHARD_KEY, LINK_KEY]):
+        hashes = hash_values(chunk[SHARD_KEY])
+        company_hashes.append(hashes)
+        linked = (chunk[SHARD_KEY].notna() & chunk[LINK_KEY].notna()).to_numpy()
+        links = pd.DataFrame({'company': hashes[linked],
+                              'person': hash_values(chunk.loc[linked, LINK_KEY])}).drop_duplicates()
+        link_companies.append(links['company'].to_numpy())
+        link_persons.append(links['person'].to_numpy())
+    if not company_hashes:
+        return np.zeros(0, dtype=np.int32)
+
+    groups = company_groups(np.concatenate(company_hashes), np.concatenate(link_companies),
+                            np.concatenate(link_persons))
+    return (groups % np.uint64(n_shards)).astype(np.int32)
+
+
+def shard_master(workdir, n_shards, reshard=False):
+    """
+    Split master_file.csv into n_shards by company group (reused while the master is unchanged).
+
+    Parameters:
+    -----------
+    workdir : Path
+        Directory with master_file.csv
+    n_shards : int
+        Number of shards
+    reshard : bool
+        Rebuild the shards even if they are up to date
+
+    Returns:
+    --------
+    List of shard directories
+    """
+    master = workdir / MASTER_FILE
+    shard_root = workdir / 'shards' / f'n{n_shards}'
+    shard_dirs = [shard_root / f'shard_{k:03d}' for k in range(n_shards)]
+    manifest = shard_root / 'manifest.json'
+    stat = master.stat()
+    source = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'key': f'{SHARD_KEY}+{LINK_KEY}'}
+    if not reshard and manifest.exists() and json.loads(manifest.read_text()) == source:
+        print(f"   [OK] Reusing {n_shards} shards in {shard_root}")
+        return shard_dirs
+
+    print(f"   Sharding {master} into {n_shards} shards by {SHARD_KEY} groups linked by {LINK_KEY}...")
+    start = time.perf_counter()
+    offsets = record_offsets(master)
+    shards = shard_numbers(master, n_shards)
+    if len(shards) != len(offsets) - 2:
+        raise ValueError(f"Row count mismatch in {master}: {len(offsets) - 2:,} records "
+                         f"by byte scan vs {len(shards):,} parsed rows (blank lines?)")
+
+    for shard_dir in shard_dirs:
+        shard_dir.mkdir(parents=True, exist_ok=True)
+    outputs = [open(shard_dir / MASTER_FILE, 'wb') for shard_dir in shard_dirs]
+    try:
+        with open(master, 'rb') as f:
+            header = f.read(int(offsets[1]))
+            for out in outputs:
+                out.write(header)
+            # Copy runs of consecutive rows that go to the same shard
+            changes = np.concatenate([[0], np.flatnonzero(np.diff(shards)) + 1, [len(shards)]])
+            for first, end in zip(changes[:-1], changes[1:]):
+                f.seek(int(offsets[first + 1]))
+                block = f.read(int(offsets[end + 1] - offsets[first + 1]))
+                outputs[shards[first]].write(block if block.endswith(b'\n') else block + b'\n')
+    finally:
+        for out in outputs:
+            out.close()
+
+    manifest.write_text(json.dumps(source))
+    print(f"   [OK] {len(shards):,} rows sharded in {time.perf_counter() - start:.1f}s")
+    return shard_dirs
+
+
+def run_shard(shard_dir, run_id):
+    """Run stages 2-6 in one shard directory; stops at the first failing stage"""
+    results = []
+    for name, script in SHARDED_STAGES:
+        if name in HANDOFFS:
+            HANDOFFS[name](shard_dir)
+        result = run_stage(name, script, [], shard_dir, run_id=run_id)
+        results.append({'shard': shard_dir.name, 'stage': name, **result})
+        if result['status'] != 'ok':
+            break
+    return results
+
+
+def merge_outputs(shard_dirs, workdir):
+    """Concatenate the shard outputs in shard order and stable-sort them on their key"""
+    for filename, key, options in MERGED_OUTPUTS:
+        parts = [pd.read_csv(d / filename, dtype=str, keep_default_na=False, **options)
+                 for d in shard_dirs if (d / filename).exists()]
+        if not parts:
+            # Intermediates written only as binary files (PIPELINE_INTERMEDIATES=arrow)
+            print(f"   [CHECK] {filename}: not written by the shards")
+            continue
+        merged = pd.concat(parts, ignore_index=True).sort_values(key, kind='stable')
+        merged.to_csv(workdir / filename, index=False, **options)
+        print(f"   [OK] {filename}: {len(merged):,} rows")
+
+    filename, key = MERGED_STATA
+    parts = [pd.read_stata(d / filename) for d in shard_dirs if (d / filename).exists()]
+    if parts:
+        merged = pd.concat(parts, ignore_index=True).sort_values(key, kind='stable')
+        merged.to_stata(workdir / filename, write_index=False, version=117)
+        print(f"   [OK] {filename}: {len(merged):,} rows")
+
+    filename, founders_file = MERGED_EDUCATION
+    parts = [EducationRecords.load(d / filename) for d in shard_dirs if (d / filename).exists()]
+    if parts and (workdir / founders_file).exists():
+        founders = pd.read_csv(workdir / founders_file, usecols=['PersonID'], dtype=str)['PersonID']
+        merged = EducationRecords.concat(parts).select(founders)
+        merged.save(workdir / filename)
+        print(f"   [OK] {filename}: {merged.n_records:,} records of {len(merged):,} founders")
+
+
+def run_sharded(workdir='.', n_shards=None, workers=None, reshard=False):
+    """
+    Shard the master file, run stages 2-6 on all shards in parallel and merge the outputs.
+
+    Parameters:
+    -----------
+    workdir : str or Path
+        Directory with master_file.csv; merged outputs are written here
+    n_shards : int or None
+        Number of shards (default: number of CPUs)
+    workers : int or None
+        Shards running at once (default: n_shards, capped at the number of CPUs)
+    reshard : bool
+        Rebuild the shards even if they are up to date
+
+    Returns:
+    --------
+    DataFrame with wall time, peak memory and status per shard and stage
+    """
+    workdir = Path(workdir).resolve()
+    n_shards = n_shards or os.cpu_count()
+    workers = workers or min(n_shards, os.cpu_count())
+    run_id = f"sharded-{pd.Timestamp.now().isoformat(timespec='seconds')}"
+
+    print("\nStep 1: Sharding master file")
+    print("-" * 80)
+    shard_dirs = shard_master(workdir, n_shards, reshard)
+
+    print(f"\nStep 2: Running stages 2-6 on {n_shards} shards ({workers} at a time)")
+    print("-" * 80)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = [r for shard in pool.map(lambda d: run_shard(d, run_id), shard_dirs) for r in shard]
+    results = pd.DataFrame(results)
+    print(f"   Wall time: {time.perf_counter() - start:.1f}s")
+    per_stage = results.groupby('stage', sort=False).agg(shards=('shard', 'size'), max_seconds=('seconds', 'max'),
+                                                         max_peak_mb=('peak_mb', 'max'))
+    print(per_stage.round(1).to_string())
+
+    failed = results[results['status'] != 'ok']
+    if len(failed) > 0:
+        print("\n[CHECK] Stages failed (see <shard>/.bench/<stage>.log):")
+        for _, row in failed.iterrows():
+            print(f"   {row['shard']} / {row['stage']}: {row['status']}")
+        return results
+
+    print("\nStep 3: Merging shard outputs")
+    print("-" * 80)
+    merge_outputs(shard_dirs, workdir)
+    return results
+
+
+if __name__ == "__main__":
+    args = [a for a in sys.argv[1:] if not a.startswith('--')]
+    workdir = args[0] if args else '.'
+    n_shards = workers = None
+    for arg in sys.argv[1:]:
+        if arg.startswith('--shards='):
+            n_shards = int(arg.split('=', 1)[1])
+        elif arg.startswith('--workers='):
+            workers = int(arg.split('=', 1)[1])
+
+    if not (Path(workdir) / MASTER_FILE).exists():
+        print(f"ERROR: {MASTER_FILE} not found in {workdir}")
+        exit(1)
+
+    print("=" * 80)
+    print("SHARDED PIPELINE (STAGES 2-6)")
+    print("=" * 80)
+    results = run_sharded(workdir, n_shards, workers, reshard='--reshard' in sys.argv)
+    if (results['status'] != 'ok').any():
+        exit(1)
+    print("\n[OK] Merged outputs written to", Path(workdir).resolve())
@@ -7,43 +7,107 @@ Quick insights into your research opportunities
 import pandas as pd
 import numpy as np
 from pathlib import Path
+from collections.abc import Mapping
+
+from table_cache import read_table
+from core_db import DEFAULT_DB_PATH, build_database, query as run_query
+
+KEY_FILES = {
+    'companies': 'Company.csv',
+    'deals': 'Deal.csv',
+    'investors': 'Investor.csv',
+    'people': 'Person.csv',
+    'funds': 'Fund.csv'
+}
+
+
+class LazyTables(Mapping):
+    """Dict-like view of the key tables; each CSV is read on first access only"""
+    
+    def __init__(self, data_dir, files=KEY_FILES):
+        self.data_dir = Path(data_dir)
+        self.paths = {name: self.data_dir / filename for name, filename in files.items()
+                      if (self.data_dir / filename).exists()}
+        self.frames = {}
+        self.projections = {}
+    
+    def __getitem__(self, name):
+        if name not in self.paths:
+            raise KeyError(name)
+        if name not in self.frames:
+            self.frames[name] = self._read(name)
+        return self.frames[name]
+    
+    def __contains__(self, name):
+        return name in self.paths
+    
+    def __iter__(self):
+        return iter(self.paths)
+    
+    def __len__(self):
+        return len(self.paths)
+    
+    def _read(self, name, columns=None):
+        df = read_table(self.paths[name], columns=columns)
+        label = f"{name} ({len(columns)} of {len(self.columns(name))} columns)" if columns else name
+        print(f"   ✅ Loaded {label}: {len(df):,} rows")
+        return df
+    
+    def columns(self, name):
+        """Column names from the header only"""
+        return list(pd.read_csv(self.paths[name], nrows=0).columns)
+    
+    def load(self, name, columns=None):
+        """Table with only the requested columns (reuses a full load if one exists)"""
+        if columns is None:
+            return self[name]
+        columns = list(columns)
+        if name in self.frames:
+            return self.frames[name][columns]
+        key = (name, tuple(sorted(columns)))
+        if key not in self.projections:
+            self.projections[key] = self._read(name, columns)
+        return self.projections[key][columns]
+    
+    @property
+    def loaded(self):
+        return list(self.frames) + [name for name, _ in self.projections]
+
 
 class SimpleExplorer:
     """Simple data explorer for research opportunities"""
     
     def __init__(self, data_dir="core_tables"):
         self.data_dir = Path(data_dir)
-        self.data = {}
-        print("🔄 Loading key tables...")
+        self.data = LazyTables(self.data_dir)
+        print("🔄 Finding key tables (loaded on first use)...")
         self.load_key_tables()
         
     def load_key_tables(self):
-        """Load the most important tables"""
-        key_files = {
-            'companies': 'Company.csv',
-            'deals': 'Deal.csv', 
-            'investors': 'Investor.csv',
-            'people': 'Person.csv',
-            'funds': 'Fund.csv'
-        }
-        
-        for name, filename in key_files.items():
-            file_path = self.data_dir / filename
-            if file_path.exists():
-                try:
-                    df = pd.read_csv(file_path)
-                    self.data[name] = df
-                    print(f"   ✅ {name}: {len(df):,} rows, {len(df.columns)} columns")
-                except Exception as e:
-                    print(f"   ❌ Error loading {filename}: {e}")
+        """Report which of the most important tables are available (nothing is read yet)"""
+        for name, filename in KEY_FILES.items():
+            if name in self.data:
+                size_mb = self.data.paths[name].stat().st_size / 1024**2
+                print(f"   ✅ {name}: {filename} ({size_mb:,.1f} MB)")
             else:
                 print(f"   ⚠️  {filename} not found - add your CSV files to {self.data_dir}/")
         
         if len(self.data) > 0:
-            print(f"\n🎯 Loaded {len(self.data)} core tables!")
+            print(f"\n🎯 Found {len(self.data)} core tables!")
         else:
             print(f"\n📁 No data files found. Please add your CSV files to the '{self.data_dir}' directory")
     
+    def table(self, table_name, columns=None):
+        """Load a table on demand, optionally only the given columns"""
+        return self.data.load(table_name, columns)
+    
+    def sql(self, query, params=(), db_path=DEFAULT_DB_PATH):
+        """Run SQL against the embedded database (built on first use, see core_db.py)"""
+        if not Path(db_path).exists():
+            print(f"🔄 Building {db_path} from {self.data_dir}/ (one-time)...")
+            build_database(db_path, self.data_dir)
+        return run_query(query, params, db_path)
+    
     def show_research_opportunities(self):
         """Show specific research opportunities based on your data"""
         print("\n" + "="*60)
@@ -120,14 +184,18 @@ class SimpleExplorer:
         
         return opportunities
     
-    def quick_data_check(self, table_name):
-        """Quick check of a specific table"""
+    def quick_data_check(self, table_name, columns=None):
+        """Quick check of a specific table (optionally only the given columns)"""
         if table_name not in self.data:
             print(f"❌ Table '{table_name}' not available!")
             print(f"Available tables: {list(self.data.keys())}")
             return
         
-        df = self.data[table_name]
+        try:
+            df = self.table(table_name, columns)
+        except Exception as e:
+            print(f"   ❌ Error loading {self.data.paths[table_name].name}: {e}")
+            return
         print(f"\n📊 QUICK CHECK: {table_name.upper()}")
         print("="*40)
         print(f"Rows: {len(df):,}")
@@ -169,6 +237,7 @@ def main():
     print(f"\n🚀 READY TO START?")
     print("1. Add your CSV files to the 'core_tables/' directory")
     print("2. Run: explorer.quick_data_check('deals')")
+    print("   or:  explorer.sql('SELECT DealType, COUNT(*) AS n FROM Deal GROUP BY DealType')")
     print("3. Pick your research question and start analyzing!")
     
     return explorer
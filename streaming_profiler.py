@@ -0,0 +1,598 @@
+"""
+Single-Pass Streaming Profiler
+==============================
+
+Profiles every column of a large CSV (e.g. master_file.csv, 4.97M rows x 60
+columns) in one chunked pass with bounded memory per column:
+
+- Null counts (exact)
+- Approximate distinct counts (HyperLogLog)
+- Approximate top-k values (Misra-Gries summary, exact while a column has
+  fewer distinct values than the summary capacity)
+- Min/max and numeric quantiles (t-digest)
+
+All sketches are mergeable, so profiles of separate chunks or files can be
+combined with merge(). profile_csv_parallel() splits a file into byte
+ranges on record boundaries, profiles each range in a process pool and
+merges the results, so profiling scales with the number of cores.
+
+Usage:
+    profiler = profile_csv('master_file.csv')
+    print(profiler.summary().to_string())
+
+    profiler = profile_csv_parallel('master_file.csv', workers=8)
+    write_frequency_report(profiler, 'column_frequency_analysis.md')
+
+Command line (regenerates the column frequency report):
+    python streaming_profiler.py master_file.csv column_frequency_analysis.md [workers]
+
+Author: Empirical Methods Project
+"""
+
+import io
+import os
+import numpy as np
+import pandas as pd
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+
+
+def _bit_length(values):
+    """Vectorized int.bit_length() for a uint64 array"""
+    values = values.copy()
+    length = np.zeros(len(values), dtype=np.int64)
+    for shift in (32, 16, 8, 4, 2, 1):
+        big = values >= (np.uint64(1) << np.uint64(shift))
+        length[big] += shift
+        values[big] >>= np.uint64(shift)
+    length += values > 0
+    return length
+
+
+def hash_values(series):
+    """Deterministic 64-bit hashes of a Series' values (same across processes and runs)"""
+    return pd.util.hash_pandas_object(series, index=False).to_numpy()
+
+
+class HyperLogLog:
+    """HyperLogLog distinct counter with 2**precision registers (relative error ~1.04/sqrt(m))"""
+
+    def __init__(self, precision=14):
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    def add_hashes(self, hashes):
+        """Add precomputed uint64 hashes"""
+        if len(hashes) == 0:
+            return
+        rest_bits = 64 - self.precision
+        index = (hashes >> np.uint64(rest_bits)).astype(np.int64)
+        rest = hashes & np.uint64((1 << rest_bits) - 1)
+        rank = (rest_bits - _bit_length(rest) + 1).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+
+    def add(self, series):
+        self.add_hashes(hash_values(series))
+
+    def merge(self, other):
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def estimate(self):
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(np.int64)))
+        zeros = np.count_nonzero(self.registers == 0)
+        if raw <= 2.5 * m and zeros > 0:
+            # Small-range correction (linear counting)
+            return m * np.log(m / zeros)
+        return raw
+
+
+class MisraGries:
+    """
+    Mergeable Misra-Gries heavy-hitter summary.
+
+    Keeps at most `capacity` counters. Reported counts are lower bounds;
+    the true count of any value is at most `error` higher.
+    """
+
+    def __init__(self, capacity=2000):
+        self.capacity = capacity
+        self.counters = pd.Series(dtype=np.int64)
+        self.error = 0
+
+    def add_counts(self, counts):
+        """Add exact counts of a batch (e.g. chunk.value_counts())"""
+        if len(counts) == 0:
+            return
+        if len(self.counters) == 0:
+            merged = counts.astype(np.int64)
+        else:
+            merged = self.counters.add(counts, fill_value=0).astype(np.int64)
+        if len(merged) > self.capacity:
+            threshold = merged.nlargest(self.capacity + 1).iloc[-1]
+            merged = merged[merged > threshold] - threshold
+            self.error += int(threshold)
+        self.counters = merged
+
+    def add(self, series):
+        self.add_counts(series.value_counts(sort=False))
+
+    def merge(self, other):
+        self.error += other.error
+        self.add_counts(other.counters)
+
+    @property
+    def exact(self):
+        return self.error == 0
+
+    def top(self, n=10):
+        """List of (value, count) for the n most frequent values"""
+        if len(self.counters) == 0:
+            return []
+        top = self.counters.sort_values(ascending=False, kind='mergesort').head(n)
+        return list(top.items())
+
+
+class TDigest:
+    """
+    Mergeable t-digest for quantiles (k1 scale function).
+
+    Centroids are rebuilt in a vectorized pass after every batch: sorted
+    centroids are bucketed by floor(k(q)), so each centroid covers at most
+    one unit of the scale function and the digest keeps ~compression/2
+    centroids with finer resolution in the tails.
+    """
+
+    def __init__(self, compression=200):
+        self.compression = compression
+        self.means = np.empty(0)
+        self.weights = np.empty(0)
+        self.min = np.inf
+        self.max = -np.inf
+
+    @property
+    def count(self):
+        return float(self.weights.sum())
+
+    def add(self, values, weights=None):
+        """Add values, each counted once or `weights` times (e.g. distinct values and their counts)"""
+        values = np.asarray(values, dtype=float)
+        weights = np.ones(len(values)) if weights is None else np.asarray(weights, dtype=float)
+        keep = ~np.isnan(values)
+        values, weights = values[keep], weights[keep]
+        if len(values) == 0:
+            return
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        self._compress(np.concatenate([self.means, values]),
+                       np.concatenate([self.weights, weights]))
+
+    def merge(self, other):
+        if len(other.means) == 0:
+            return
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress(np.concatenate([self.means, other.means]),
+                       np.concatenate([self.weights, other.weights]))
+
+    def _compress(self, means, weights):
+        order = np.argsort(means, kind='mergesort')
+        means = means[order]
+        weights = weights[order]
+        cumulative = np.cumsum(weights)
+        q_mid = (cumulative - weights / 2) / cumulative[-1]
+        k = self.compression / (2 * np.pi) * np.arcsin(np.clip(2 * q_mid - 1, -1, 1))
+        bucket = np.floor(k).astype(np.int64)
+        starts = np.flatnonzero(np.r_[True, bucket[1:] != bucket[:-1]])
+        self.weights = np.add.reduceat(weights, starts)
+        self.means = np.add.reduceat(means * weights, starts) / self.weights
+
+    def quantile(self, q):
+        """Approximate quantile(s) for q in [0, 1]"""
+        if len(self.means) == 0:
+            return np.full(np.shape(q), np.nan) if np.ndim(q) else np.nan
+        cumulative = np.cumsum(self.weights)
+        mids = (cumulative - self.weights / 2) / cumulative[-1]
+        return np.interp(q, np.r_[0.0, mids, 1.0], np.r_[self.min, self.means, self.max])
+
+
+class ColumnProfile:
+    """Bounded-memory profile of one column"""
+
+    def __init__(self, name, topk_capacity=2000, hll_precision=14, compression=200):
+        self.name = name
+        self.count = 0
+        self.nulls = 0
+        self.numeric_count = 0
+        self.text_min = None
+        self.text_max = None
+        self.distinct = HyperLogLog(hll_precision)
+        self.topk = MisraGries(topk_capacity)
+        self.digest = TDigest(compression)
+
+    def update(self, series):
+        self.count += len(series)
+        non_null = series.dropna()
+        self.nulls += len(series) - len(non_null)
+        if len(non_null) == 0:
+            return
+
+        # Everything below works on the chunk's distinct values, weighted by their counts
+        counts = non_null.value_counts(sort=False)
+        values = pd.Series(counts.index)
+        self.distinct.add(values)       # repeats do not change a HyperLogLog
+        self.topk.add_counts(counts)
+
+        numeric = pd.to_numeric(values, errors='coerce').to_numpy(dtype=float)
+        parsed = ~np.isnan(numeric)
+        weights = counts.to_numpy()[parsed]
+        self.numeric_count += int(weights.sum())
+        self.digest.add(numeric[parsed], weights)
+
+        text = values.astype(str)
+        self._update_text_range(text.min(), text.max())
+
+    def _update_text_range(self, low, high):
+        if low is None:
+            return
+        self.text_min = low if self.text_min is None else min(self.text_min, low)
+        self.text_max = high if self.text_max is None else max(self.text_max, high)
+
+    def merge(self, other):
+        self.count += other.count
+        self.nulls += other.nulls
+        self.numeric_count += other.numeric_count
+        self._update_text_range(other.text_min, other.text_max)
+        self.distinct.merge(other.distinct)
+        self.topk.merge(other.topk)
+        self.digest.merge(other.digest)
+
+    @property
+    def non_null(self):
+        return self.count - self.nulls
+
+    @property
+    def is_numeric(self):
+        return self.non_null > 0 and self.numeric_count == self.non_null
+
+    def distinct_estimate(self):
+        """Exact distinct count while the top-k summary never evicted, else HyperLogLog"""
+        if self.topk.exact:
+            return len(self.topk.counters)
+        return int(round(self.distinct.estimate()))
+
+    def summary(self, top_n=10, quantiles=(0.01, 0.25, 0.5, 0.75, 0.99)):
+        result = {
+            'column': self.name,
+            'rows': self.count,
+            'non_null': self.non_null,
+            'nulls': self.nulls,
+            'null_pct': self.nulls / self.count * 100 if self.count else 0.0,
+            'distinct': self.distinct_estimate(),
+            'distinct_exact': self.topk.exact,
+            'top_values': self.topk.top(top_n),
+            'top_error': self.topk.error,
+            'numeric_count': self.numeric_count,
+            'min': self.digest.min if self.is_numeric else self.text_min,
+            'max': self.digest.max if self.is_numeric else self.text_max
+        }
+        for q in quantiles:
+            result[f'p{int(round(q * 100))}'] = self.digest.quantile(q) if self.numeric_count else np.nan
+        return result
+
+
+class StreamingProfiler:
+    """Column profiles for a stream of DataFrame chunks"""
+
+    def __init__(self, topk_capacity=2000, hll_precision=14, compression=200):
+        self.topk_capacity = topk_capacity
+        self.hll_precision = hll_precision
+        self.compression = compression
+        self.rows = 0
+        self.profiles = {}
+
+    def _profile(self, column):
+        if column not in self.profiles:
+            self.profiles[column] = ColumnProfile(column, self.topk_capacity,
+                                                  self.hll_precision, self.compression)
+        return self.profiles[column]
+
+    def update(self, chunk):
+        self.rows += len(chunk)
+        for column in chunk.columns:
+            self._profile(column).update(chunk[column])
+
+    def merge(self, other):
+        self.rows += other.rows
+        for column, profile in other.profiles.items():
+            self._profile(column).merge(profile)
+
+    def summary(self, top_n=10):
+        """One row per column with counts, distinct estimate, top value and quantiles"""
+        rows = []
+        for profile in self.profiles.values():
+            stats = profile.summary(top_n=top_n)
+            top = stats.pop('top_values')
+            stats['top_value'] = top[0][0] if top else None
+            stats['top_count'] = top[0][1] if top else 0
+            rows.append(stats)
+        return pd.DataFrame(rows)
+
+
+def read_chunks(csv_path, chunksize=100_000, usecols=None, **read_csv_kwargs):
+    """Read a CSV in chunks with every column as text, exactly as written in the file"""
+    return pd.read_csv(csv_path, chunksize=chunksize, usecols=usecols, dtype=str,
+                       low_memory=False, **read_csv_kwargs)
+
+
+def profile_csv(csv_path, chunksize=100_000, usecols=None, **profiler_kwargs):
+    """Profile a CSV in a single chunked pass"""
+    profiler = StreamingProfiler(**profiler_kwargs)
+    for chunk in read_chunks(csv_path, chunksize=chunksize, usecols=usecols):
+        profiler.update(chunk)
+    return profiler
+
+
+# =============================================================================
+# Parallel profiling over byte ranges
+# =============================================================================
+
+def record_boundaries(csv_path, offsets, block_size=16 << 20):
+    """
+    Start of the first CSV record after each byte offset.
+
+    A newline ends a record only outside quoted fields (even number of
+    quotes before it), so multi-line quoted values such as biographies are
+    never split. This costs one sequential read of the file.
+    """
+    offsets = sorted(offsets)
+    boundaries = []
+    position = 0
+    in_quotes = np.uint8(0)
+    with open(csv_path, 'rb') as f:
+        while len(boundaries) < len(offsets):
+            block = f.read(block_size)
+            if not block:
+                break
+            data = np.frombuffer(block, dtype=np.uint8)
+            quoted = np.bitwise_xor.accumulate((data == ord('"')).astype(np.uint8)) ^ in_quotes
+            record_ends = np.flatnonzero((data == ord('\n')) & (quoted == 0))
+            while len(boundaries) < len(offsets) and offsets[len(boundaries)] < position + len(data):
+                index = np.searchsorted(record_ends, offsets[len(boundaries)] - position)
+                if index == len(record_ends):
+                    break
+                boundaries.append(position + int(record_ends[index]) + 1)
+            in_quotes = quoted[-1]
+            position += len(data)
+    file_size = os.path.getsize(csv_path)
+    return boundaries + [file_size] * (len(offsets) - len(boundaries))
+
+
+def split_byte_ranges(csv_path, parts):
+    """
+    Split a CSV into roughly equal byte ranges aligned to record boundaries.
+
+    Returns:
+    --------
+    header_end : int
+        Byte offset where the data rows start
+    ranges : list of (start, end)
+        Non-empty byte ranges covering all data rows
+    """
+    file_size = os.path.getsize(csv_path)
+    targets = [0] + [file_size * i // parts for i in range(1, parts)]
+    boundaries = record_boundaries(csv_path, targets)
+    header_end = boundaries[0]
+    starts = sorted(set(max(b, header_end) for b in boundaries))
+    ends = starts[1:] + [file_size]
+    ranges = [(start, end) for start, end in zip(starts, ends) if end > start]
+    return header_end, ranges
+
+
+class _ByteRangeReader(io.RawIOBase):
+    """Read-only file view limited to [start, end)"""
+
+    def __init__(self, path, start, end):
+        self._file = open(path, 'rb')
+        self._file.seek(start)
+        self._remaining = end - start
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        size = min(len(buffer), self._remaining)
+        if size <= 0:
+            return 0
+        data = self._file.read(size)
+        buffer[:len(data)] = data
+        self._remaining -= len(data)
+        return len(data)
+
+    def close(self):
+        self._file.close()
+        super().close()
+
+
+def read_header(csv_path, header_end, encoding='utf-8'):
+    """Column names from the first record"""
+    with open(csv_path, 'rb') as f:
+        header = f.read(header_end)
+    if encoding.lower().replace('_', '-') in ('utf-8', 'utf8'):
+        encoding = 'utf-8-sig'
+    return list(pd.read_csv(io.BytesIO(header), nrows=0, encoding=encoding).columns)
+
+
+def _profile_byte_range(task):
+    """Worker: profile one byte range of a CSV (runs in a child process)"""
+    csv_path, start, end, columns, usecols, chunksize, encoding, profiler_kwargs = task
+    profiler = StreamingProfiler(**profiler_kwargs)
+    with io.BufferedReader(_ByteRangeReader(csv_path, start, end)) as stream:
+        reader = pd.read_csv(stream, header=None, names=columns, usecols=usecols, dtype=str,
+                             chunksize=chunksize, low_memory=False, encoding=encoding)
+        for chunk in reader:
+            profiler.update(chunk)
+    return profiler
+
+
+def profile_csv_parallel(csv_path, workers=None, chunksize=100_000, usecols=None,
+                         encoding='utf-8', **profiler_kwargs):
+    """
+    Profile a CSV with one process per byte range and merge the sketches.
+
+    Parameters:
+    -----------
+    csv_path : str
+        CSV file to profile
+    workers : int or None
+        Number of worker processes (default: all cores)
+    chunksize : int
+        Rows per chunk inside each worker
+    usecols : list of str or None
+        Restrict profiling to these columns
+    encoding : str
+        File encoding
+    **profiler_kwargs
+        Sketch sizes passed to StreamingProfiler
+
+    Returns:
+    --------
+    StreamingProfiler with columns in file order
+    """
+    workers = workers or os.cpu_count() or 1
+    header_end, ranges = split_byte_ranges(csv_path, workers)
+    columns = read_header(csv_path, header_end, encoding)
+    if usecols is not None:
+        usecols = [c for c in columns if c in set(usecols)]
+
+    tasks = [(csv_path, start, end, columns, usecols, chunksize, encoding, profiler_kwargs)
+             for start, end in ranges]
+    merged = StreamingProfiler(**profiler_kwargs)
+    # Create profiles in file order so reports list columns as in the file
+    for column in (usecols or columns):
+        merged._profile(column)
+
+    # Merge in range order so the result does not depend on scheduling
+    if workers == 1 or len(tasks) <= 1:
+        for task in tasks:
+            merged.merge(_profile_byte_range(task))
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as executor:
+            for partial in executor.map(_profile_byte_range, tasks):
+                merged.merge(partial)
+    return merged
+
+
+# =============================================================================
+# Markdown report (column_frequency_analysis.md format)
+# =============================================================================
+
+COLUMN_GROUPS = [
+    ('Company Columns', lambda c: c in ('CompanyID', 'CompanyName') or c.startswith('Company_')),
+    ('Deal Columns', lambda c: c == 'DealID' or c.startswith('Deal_')),
+    ('Investor Columns', lambda c: c == 'InvestorID' or c.startswith('Investor_')),
+    ('Person Columns', lambda c: c in ('PersonID', 'PrimaryCompanyID') or c.startswith('Person_')),
+    ('Education Columns', lambda c: c.startswith('Education_')),
+]
+
+
+def _display_value(value, max_length):
+    text = str(value)
+    if len(text) > max_length:
+        text = f"{text[:max_length - 3]}..."
+    return text.replace('|', '\\|').replace('\n', ' ')
+
+
+def _format_unique(profile):
+    distinct = profile.distinct_estimate()
+    return f"{distinct:,}" if profile.topk.exact else f"~{distinct:,}"
+
+
+def write_frequency_report(profiler, output_md_path, top_n=10, title='Master File - Column Frequency Analysis'):
+    """
+    Write per-column frequency tables in the column_frequency_analysis.md format.
+
+    Columns are grouped by prefix (Company/Deal/Investor/Person/Education,
+    anything else under Other Columns). Unique counts marked ~ are
+    HyperLogLog estimates; when the top-k summary is approximate the
+    maximum undercount of the listed counts is stated.
+    """
+    total_rows = profiler.rows
+    groups = {name: [] for name, _ in COLUMN_GROUPS}
+    groups['Other Columns'] = []
+    for column in profiler.profiles:
+        group = next((name for name, matches in COLUMN_GROUPS if matches(column)), 'Other Columns')
+        groups[group].append(column)
+    groups = {name: columns for name, columns in groups.items() if columns}
+
+    lines = []
+    lines.append(f"# {title}\n")
+    lines.append(f"**Generated:** {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+    lines.append(f"**Total Rows Analyzed:** {total_rows:,}\n")
+    lines.append(f"**Total Columns:** {len(profiler.profiles)}\n")
+    lines.append("---\n")
+    lines.append("## Table of Contents\n")
+    for name in groups:
+        anchor = name.lower().replace(' ', '-')
+        lines.append(f"- [{name}](#{anchor})")
+    lines.append("\n---\n")
+
+    for name, columns in groups.items():
+        lines.append(f"## {name}\n")
+        for column in columns:
+            profile = profiler.profiles[column]
+            null_pct = profile.nulls / total_rows * 100 if total_rows else 0.0
+            lines.append(f"### {column}\n")
+            lines.append("**Statistics:**")
+            lines.append(f"- Total non-null values: {profile.non_null:,}")
+            lines.append(f"- Null/missing values: {profile.nulls:,} ({null_pct:.2f}%)")
+            lines.append(f"- Unique values: {_format_unique(profile)}")
+            if not profile.topk.exact:
+                lines.append(f"- Counts below may be low by up to {profile.topk.error:,}")
+            lines.append("")
+
+            top_values = profile.topk.top(top_n)
+            if top_values:
+                lines.append(f"**Top {top_n} Most Frequent Values:**\n")
+                lines.append("| Rank | Value | Count | Percentage |")
+                lines.append("|------|-------|-------|------------|")
+                for rank, (value, count) in enumerate(top_values, 1):
+                    lines.append(f"| {rank} | {_display_value(value, 100)} | {count:,} | {count / total_rows * 100:.2f}% |")
+            else:
+                lines.append("*No data available*")
+            lines.append("\n---\n")
+        lines.append("")
+
+    lines.append("## Summary Statistics\n")
+    lines.append("| Column | Unique Values | Most Common Value | Frequency |")
+    lines.append("|--------|---------------|-------------------|------------|")
+    for column, profile in profiler.profiles.items():
+        top = profile.topk.top(1)
+        value, count = top[0] if top else ('', 0)
+        lines.append(f"| {column} | {_format_unique(profile)} | {_display_value(value, 50)} | {count:,} |")
+    lines.append("")
+
+    with open(output_md_path, 'w', encoding='utf-8') as f:
+        f.write("\n".join(lines))
+    return output_md_path
+
+
+if __name__ == "__main__":
+    import sys
+    csv_file = sys.argv[1] if len(sys.argv) > 1 else 'master_file.csv'
+    if len(sys.argv) > 2:
+        # Full frequency report, profiled in parallel
+        output_file = sys.argv[2]
+        workers = int(sys.argv[3]) if len(sys.argv) > 3 else None
+        print(f"Profiling {csv_file} with {workers or os.cpu_count()} worker processes...")
+        profiler = profile_csv_parallel(csv_file, workers=workers, topk_capacity=10000)
+        write_frequency_report(profiler, output_file)
+        print(f"Rows: {profiler.rows:,}")
+        print(f"Report saved to: {output_file}")
+    else:
+        print(f"Profiling {csv_file}...")
+        profiler = profile_csv(csv_file)
+        print(f"Rows: {profiler.rows:,}")
+        columns = ['column', 'non_null', 'null_pct', 'distinct', 'top_value', 'top_count', 'min', 'max', 'p50']
+        print(profiler.summary()[columns].to_string(index=False))
@@ -0,0 +1,277 @@
+"""
+Integer Surrogate Keys for Entity IDs
+=====================================
+
+PitchBook IDs ("43104-88", "1000000-11T") are strings: every join, groupby
+and drop_duplicates on them hashes and compares Python strings, and each
+value costs 60+ bytes as an object. A key dictionary maps every natural ID
+of a data snapshot to a dense integer (int32 unless there are more than
+2^31 IDs), so tables are encoded at load time, processed at integer speed,
+and decoded back to natural IDs only when written out.
+
+The dictionary holds, per key space, the sorted natural IDs found in the
+core tables; an ID's surrogate is its rank. Because ranks follow the string
+order, sorting or grouping by the surrogate gives the same row order as
+sorting or grouping by the natural ID, so outputs are unchanged.
+
+    CompanyID    Company.CompanyID, Deal.CompanyID, Person.PrimaryCompanyID
+    DealID       Deal.DealID, DealInvestorRelation.DealID, Company.FirstFinancingDealID
+    PersonID     Person.PersonID, PersonEducationRelation.PersonID, PersonPositionRelation.PersonID
+    InvestorID   Investor.InvestorID, DealInvestorRelation.InvestorID
+
+The dictionary is built once per snapshot and cached in .key_dictionary/,
+keyed by the size and mtime of the source tables; changing a core table
+builds a new one. Missing IDs are encoded as <NA> (nullable integer
+columns), so groupby and dropna treat them as before. IDs that are not in
+the snapshot (e.g. a master file built before a table refresh) raise a
+KeyError; the stage then builds the dictionary from its own data.
+
+Usage:
+    from surrogate_keys import load_key_dictionary
+    keys = load_key_dictionary('core_tables')
+    df = keys.encode_frame(df)           # CompanyID, DealID, PersonID, InvestorID -> integers
+    ...                                  # joins, groupby, dedup on integers
+    df = keys.decode_frame(df)           # natural IDs again, before export
+
+    python surrogate_keys.py [core_tables_dir]     # build the dictionary and report sizes
+
+Author: Empirical Methods Project
+"""
+
+import os
+import sys
+import json
+import hashlib
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+DEFAULT_DICTIONARY_DIR = '.key_dictionary'
+
+# Key spaces and the core table columns their IDs are collected from
+KEY_SOURCES = {
+    'CompanyID': [('Company.csv', 'CompanyID'), ('Deal.csv', 'CompanyID'), ('Person.csv', 'PrimaryCompanyID')],
+    'DealID': [('Deal.csv', 'DealID'), ('DealInvestorRelation.csv', 'DealID'),
+               ('Company.csv', 'FirstFinancingDealID')],
+    'PersonID': [('Person.csv', 'PersonID'), ('PersonEducationRelation.csv', 'PersonID'),
+                 ('PersonPositionRelation.csv', 'PersonID')],
+    'InvestorID': [('Investor.csv', 'InvestorID'), ('DealInvestorRelation.csv', 'InvestorID')],
+}
+
+# Columns encoded by encode_frame(): column -> key space
+KEY_COLUMNS = {
+    'CompanyID': 'CompanyID',
+    'PrimaryCompanyID': 'CompanyID',
+    'DealID': 'DealID',
+    'FirstFinancingDealID': 'DealID',
+    'FirstVCDealID': 'DealID',
+    'OptimalVCDealID': 'DealID',
+    'PersonID': 'PersonID',
+    'InvestorID': 'InvestorID',
+}
+
+
+def _code_dtype(n_ids):
+    return np.dtype(np.int32) if n_ids < np.iinfo(np.int32).max else np.dtype(np.int64)
+
+
+def _sorted_ids(values):
+    """Sorted distinct natural IDs (as str) of an iterable of Series"""
+    uniques = pd.unique(pd.concat([pd.Series(v, dtype=object) for v in values], ignore_index=True).dropna())
+    return np.sort(np.asarray([str(u) for u in uniques], dtype=object))
+
+
+class KeyDictionary:
+    """
+    Natural ID <-> integer surrogate mapping for each key space.
+
+    Parameters:
+    -----------
+    ids : dict
+        Key space -> array of the distinct natural IDs in sorted order (surrogate = position)
+    """
+
+    def __init__(self, ids):
+        self.ids = {space: np.asarray(values, dtype=object) for space, values in ids.items()}
+        self._index = {}
+
+    @classmethod
+    def from_frame(cls, df):
+        """Dictionary of the IDs in one frame (when the core tables are not available)"""
+        ids = {}
+        for column, space in KEY_COLUMNS.items():
+            if column in df.columns:
+                ids.setdefault(space, []).append(df[column])
+        return cls({space: _sorted_ids(values) for space, values in ids.items()})
+
+    def __contains__(self, space):
+        return space in self.ids
+
+    def __len__(self):
+        return sum(len(v) for v in self.ids.values())
+
+    def _lookup(self, space):
+        if space not in self._index:
+            self._index[space] = pd.Index(self.ids[space])
+        return self._index[space]
+
+    def encode(self, values, column):
+        """
+        Surrogate keys of a column of natural IDs.
+
+        Parameters:
+        -----------
+        values : Series or array
+            Natural IDs (missing values allowed)
+        column : str
+            Column or key space name (see KEY_COLUMNS)
+
+        Returns:
+        --------
+        Integer array (nullable Int32/Int64 array if any value is missing)
+        """
+        space = KEY_COLUMNS.get(column, column)
+        # Hash each row once (factorize), then look up only the distinct IDs
+        codes, uniques = pd.factorize(values)
+        positions = self._lookup(space).get_indexer(np.asarray([str(u) for u in uniques], dtype=object))
+        if (positions < 0).any():
+            unknown = [str(u) for u in np.asarray(uniques, dtype=object)[positions < 0][:5]]
+            raise KeyError(f"{(positions < 0).sum():,} {column} values are not in the key dictionary "
+                           f"(e.g. {', '.join(unknown)}); rebuild it for this data snapshot")
+        dtype = _code_dtype(len(self.ids[space]))
+        surrogates = positions.astype(dtype)[codes]
+        missing = codes < 0
+        if missing.any():
+            return pd.arrays.IntegerArray(np.where(missing, 0, surrogates).astype(dtype), missing)
+        return surrogates
+
+    def decode(self, surrogates, column):
+        """Natural IDs of surrogate keys (object array; <NA> stays missing)"""
+        space = KEY_COLUMNS.get(column, column)
+        surrogates = pd.array(surrogates, dtype='Int64')
+        missing = np.asarray(surrogates.isna())
+        natural = self.ids[space][surrogates.to_numpy(dtype=np.int64, na_value=0)]
+        natural[missing] = np.nan
+        return natural
+
+    def encode_frame(self, df, columns=None):
+        """
+        Replace the ID columns of a frame (default: every KEY_COLUMNS column present) by surrogates.
+
+        All columns are encoded before any is replaced, so on a KeyError (an ID
+        not in the dictionary) the frame is left unchanged.
+        """
+        columns = [c for c in (columns or KEY_COLUMNS) if c in df.columns and KEY_COLUMNS.get(c, c) in self.ids]
+        encoded = {column: self.encode(df[column], column) for column in columns}
+        for column, surrogates in encoded.items():
+            df[column] = surrogates
+        return df
+
+    def decode_frame(self, df, columns=None):
+        """Restore natural IDs in every integer ID column of a frame"""
+        for column in (columns or KEY_COLUMNS):
+            if column in df.columns and pd.api.types.is_integer_dtype(df[column].dtype):
+                df[column] = self.decode(df[column], column)
+        return df
+
+    def save(self, path):
+        np.savez(path, **{space: values.astype(str) for space, values in self.ids.items()})
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as arrays:
+            return cls({space: arrays[space].astype(object) for space in arrays.files})
+
+
+def snapshot_id(core_tables_dir):
+    """Digest of the name, size and mtime of the source tables present in core_tables_dir"""
+    entries = []
+    for table in sorted({table for sources in KEY_SOURCES.values() for table, _ in sources}):
+        path = Path(core_tables_dir) / table
+        if path.exists():
+            stat = path.stat()
+            entries.append([table, stat.st_size, stat.st_mtime_ns])
+    return hashlib.sha1(json.dumps(entries).encode('utf-8')).hexdigest()[:16] if entries else None
+
+
+def build_key_dictionary(core_tables_dir):
+    """Collect and sort the natural IDs of every key space from the core tables"""
+    columns = {}
+    for space, sources in KEY_SOURCES.items():
+        for table, column in sources:
+            columns.setdefault(table, set()).add(column)
+
+    values = {space: [] for space in KEY_SOURCES}
+    for table, table_columns in columns.items():
+        path = Path(core_tables_dir) / table
+        if not path.exists():
+            continue
+        header = pd.read_csv(path, nrows=0).columns
+        usecols = [c for c in table_columns if c in header]
+        if not usecols:
+            continue
+        ids = pd.read_csv(path, usecols=usecols, dtype=str, keep_default_na=False, na_values=[''])
+        for space, sources in KEY_SOURCES.items():
+            values[space].extend(ids[column] for source, column in sources if source == table and column in ids)
+    return KeyDictionary({space: _sorted_ids(v) for space, v in values.items() if v})
+
+
+def load_key_dictionary(core_tables_dir='core_tables', dictionary_dir=DEFAULT_DICTIONARY_DIR, frame=None):
+    """
+    Key dictionary of the current core tables snapshot (built and cached on first use).
+
+    Parameters:
+    -----------
+    core_tables_dir : str
+        Directory with the core tables
+    dictionary_dir : str
+        Cache directory for dictionaries
+    frame : DataFrame or None
+        Used to build a dictionary of its own IDs when the core tables are not available
+
+    Returns:
+    --------
+    KeyDictionary
+    """
+    snapshot = snapshot_id(core_tables_dir)
+    if snapshot is None:
+        if frame is None:
+            raise FileNotFoundError(f"No core tables in {core_tables_dir} to build a key dictionary from")
+        print(f"   [CHECK] No core tables in {core_tables_dir}; surrogate keys built from the loaded data")
+        return KeyDictionary.from_frame(frame)
+
+    path = Path(dictionary_dir) / f'keys_{snapshot}.npz'
+    if path.exists():
+        return KeyDictionary.load(path)
+
+    keys = build_key_dictionary(core_tables_dir)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    keys.save(path)
+    # One dictionary per snapshot is enough; older ones belong to replaced tables
+    for old in path.parent.glob('keys_*.npz'):
+        if old != path:
+            old.unlink()
+    print(f"   [OK] Key dictionary for {core_tables_dir}: {len(keys):,} IDs -> {path}")
+    return keys
+
+
+if __name__ == "__main__":
+    import time
+
+    core_tables_dir = sys.argv[1] if len(sys.argv) > 1 else 'core_tables'
+    if not os.path.isdir(core_tables_dir):
+        print(f"ERROR: {core_tables_dir} not found")
+        exit(1)
+
+    print("=" * 80)
+    print("SURROGATE KEY DICTIONARY")
+    print("=" * 80)
+    start = time.perf_counter()
+    keys = load_key_dictionary(core_tables_dir)
+    print(f"Loaded in {time.perf_counter() - start:.2f}s\n")
+
+    print(f"   {'Key':<12} {'IDs':>12} {'Surrogate':>10} {'Natural MB':>11} {'Surrogate MB':>13}")
+    for space, ids in keys.ids.items():
+        dtype = _code_dtype(len(ids))
+        natural_mb = pd.Series(ids).memory_usage(deep=True, index=False) / 2**20
+        print(f"   {space:<12} {len(ids):>12,} {str(dtype):>10} {natural_mb:>11.1f} {len(ids) * dtype.itemsize / 2**20:>13.1f}")
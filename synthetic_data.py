@@ -0,0 +1,498 @@
+"""
+Synthetic Core Tables for Benchmarks
+====================================
+
+Deterministic generator for data shaped like the PE/VC export, so the
+pipeline can be benchmarked without the real data leaving our machines.
+
+Produces (under <outdir>):
+    core_tables/Company.csv, Deal.csv, Investor.csv, Person.csv,
+                PersonEducationRelation.csv, PersonPositionRelation.csv,
+                DealInvestorRelation.csv
+    other_tables/CompanyEmployeeHistoryRelation.csv
+    master_file.csv   (deal x investor x company person x education rows, 60 columns)
+
+Sizes scale with the README table sizes (scale=1, 10, 100). Cardinalities
+and fan-out follow the real data: heavy-tailed deals per company and
+investors per deal, ~10 people per company (1-3 founders), a heavy tail of
+people with positions at several companies (serial founders among them,
+under 1 extra position per 100 people), 0-3 education records per person, text fields with commas, quotes and line breaks, and
+dates in dd/mm/yyyy as in the master file.
+
+Generation is done in blocks of companies, each with its own seeded random
+stream, so output is identical for a given (scale, seed) and memory stays
+bounded at 100x.
+
+Usage:
+    python synthetic_data.py [scale] [outdir] [--no-master]
+    python synthetic_data.py 10 bench_data/x10
+
+Author: Empirical Methods Project
+"""
+
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+from master_join import MASTER_COLUMNS
+
+# README sizes at scale 1
+BASE_COMPANIES = 57_751
+BASE_INVESTORS = 58_736
+DEALS_PER_COMPANY_ZIPF = 2.3            # ~2.5 deals per company, heavy tail
+PEOPLE_PER_COMPANY = 9.7                # Person.csv / Company.csv
+EDUCATION_RECORDS = ([0, 1, 2, 3], [0.25, 0.45, 0.22, 0.08])
+# README: 561,080 positions for 557,995 people. Founders are likelier to found again;
+# the number of extra positions is Zipf-distributed (capped)
+EXTRA_POSITION_SHARE = {'founder': 0.015, 'other': 0.0015}
+EXTRA_POSITIONS_ZIPF = 2.5
+MAX_EXTRA_POSITIONS = 8
+HISTORY_POINTS_PER_COMPANY = 8
+
+BLOCK_COMPANIES = 20_000
+DEFAULT_SEED = 2024
+
+US_STATES = {
+    'California': 0.35, 'New York': 0.13, 'Massachusetts': 0.07, 'Texas': 0.04,
+    'Washington': 0.025, 'Illinois': 0.02, 'Colorado': 0.015, 'Florida': 0.015,
+    'Pennsylvania': 0.015, 'Georgia': 0.01, 'Utah': 0.01, 'New Jersey': 0.01,
+    'Virginia': 0.01, 'North Carolina': 0.01, 'Ohio': 0.008, 'Maryland': 0.008,
+    'Michigan': 0.007, 'Minnesota': 0.007, 'Oregon': 0.007, 'District of Columbia': 0.006,
+}
+NON_US_STATES = {'Ontario': 'Canada', 'England': 'United Kingdom', 'Bavaria': 'Germany',
+                 'Ile-de-France': 'France', 'Lombardy': 'Italy', 'Tel Aviv': 'Israel'}
+CITIES = ['San Francisco', 'New York', 'Boston', 'Los Angeles', 'Chicago', 'Cambridge',
+          'Austin', 'Palo Alto', 'Seattle', 'Denver', 'Toronto', 'London', 'Milan']
+SECTORS = {
+    'Information Technology': ['Software', 'IT Services', 'Communications and Networking'],
+    'Healthcare': ['Pharmaceuticals and Biotechnology', 'Healthcare Technology Systems',
+                   'Healthcare Devices and Supplies', 'Healthcare Services'],
+    'Consumer Products and Services (B2C)': ['Consumer Non-Durables', 'Services (Non-Financial)'],
+    'Business Products and Services (B2B)': ['Commercial Services', 'Commercial Products'],
+    'Financial Services': ['Capital Markets/Institutions', 'Insurance'],
+    'Materials and Resources': ['Chemicals and Gases'],
+    'Energy': ['Energy Equipment', 'Utilities'],
+}
+FINANCING_STATUS = ['Venture Capital-Backed', 'Formerly VC-backed', 'Private Equity-Backed',
+                    'Accelerator/Incubator Backed', 'Angel-Backed', None]
+DEAL_TYPES = {
+    'Early Stage VC': 0.28, 'Later Stage VC': 0.24, 'Seed Round': 0.19, 'Accelerator/Incubator': 0.05,
+    'Grant': 0.03, 'Equity Crowdfunding': 0.02, 'Angel (individual)': 0.05,
+    'PE Growth/Expansion': 0.04, 'Convertible Debt': 0.05, 'Corporate': 0.05,
+}
+DEAL_TYPE2 = ['Series A', 'Series B', 'Series C', 'Series D', 'Series A1', 'Series E', None, None]
+DEAL_CLASSES = {'Venture Capital': 0.78, 'Other': 0.10, 'Individual': 0.07, 'Corporate': 0.05}
+BUSINESS_STATUS = ['Generating Revenue', 'Startup', 'Profitable', 'Product Development',
+                   'Pre-Clinical Trials', None]
+INVESTOR_TYPES = ['Venture Capital', 'Angel (individual)', 'Corporate Venture Capital',
+                  'Accelerator/Incubator', 'PE/Buyout', 'Not-For-Profit Venture Capital']
+POSITION_LEVELS = {
+    'Founder': 0.0, 'Board Member': 0.22, 'Chief Executive Officer': 0.05, 'Vice President': 0.21,
+    'Executive': 0.2, 'Director': 0.17, 'Advisor': 0.08, 'Partner': 0.07,
+}
+FOUNDER_TITLES = ['Co-Founder & Chief Executive Officer', 'Co-Founder', 'Founder & Chief Executive Officer',
+                  'Co-Founder, Chief Executive Officer & Board Member', 'Co-Founder & Chief Technology Officer']
+OTHER_TITLES = ['Board Member', 'Chief Financial Officer', 'Chief Technology Officer',
+                'Chief Operating Officer', 'Advisor', 'Vice President, Sales', 'Director of Engineering']
+FIRST_NAMES = ['James', 'Mary', 'John', 'Patricia', 'Robert', 'Jennifer', 'Michael', 'Linda', 'David',
+               'Elizabeth', 'William', 'Barbara', 'Richard', 'Susan', 'Wei', 'Priya', 'Luca', 'Sofia']
+LAST_NAMES = ['Smith', 'Johnson', 'Williams', 'Brown', 'Jones', 'Garcia', 'Miller', 'Davis', 'Chen',
+              'Patel', 'Rossi', "O'Brien", 'Kim', 'Nguyen', 'Cohen', 'Schmidt', 'Lopez', 'Wilson']
+INSTITUTES = {
+    'Stanford University': 0.06, 'University of California, Berkeley': 0.04, 'Harvard University': 0.035,
+    'Harvard Business School': 0.03, 'University of Pennsylvania (Wharton)': 0.025,
+    'Massachusetts Institute of Technology (MIT)': 0.025, 'University of Pennsylvania': 0.02,
+    'Columbia University': 0.02, 'Yale University': 0.012, 'Princeton University': 0.01,
+    'Cornell University': 0.015, 'Brown University': 0.008, 'Dartmouth College': 0.006,
+    'University of Chicago': 0.012, 'Northwestern University': 0.012, 'Duke University': 0.01,
+    'California Institute of Technology': 0.005, 'New York University': 0.02,
+    'University of Michigan': 0.02, 'University of Texas at Austin': 0.02, 'Bocconi University': 0.005,
+}
+OTHER_INSTITUTES = 400
+DEGREES = {
+    'BS (Bachelor of Science)': 0.24, 'MBA (Master of Business Administration)': 0.19,
+    'BA (Bachelor of Arts)': 0.18, 'Degree': 0.13, 'MS (Master of Science)': 0.09,
+    'PhD (Doctor of Philosophy)': 0.06, 'JD (Juris Doctor)': 0.03, 'MD (Doctor of Medicine)': 0.02,
+    'Associate of Science': 0.01, 'Certificate': 0.05,
+}
+MAJORS = ['Computer Science', 'Economics', 'Finance', 'Electrical Engineering', 'Business Administration',
+          'Accounting', 'Mechanical Engineering', 'Law', 'Biology', 'Mathematics', 'Physics',
+          'Marketing', 'Political Science', 'Chemistry', 'Psychology', None]
+
+COMPANY_COLUMNS = 121
+DEAL_COLUMNS = 108
+INVESTOR_COLUMNS = 40
+PERSON_COLUMNS = 35
+
+DAY_2000 = 10_957   # days since epoch of 2000-01-01
+DAY_2023 = 19_358   # 2023-01-01
+
+
+def pitchbook_ids(numbers, suffix=''):
+    """IDs in the export's "12345-67" style, with an optional type suffix (e.g. 'T' for deals)"""
+    numbers = np.asarray(numbers, dtype=np.int64)
+    check = (numbers * 37 + 11) % 100
+    return pd.Series(numbers).astype(str).str.cat(pd.Series(check).astype(str).str.zfill(2), sep='-') + suffix
+
+
+def institute_numbers(names):
+    """Stable number per institute name, so the same institute gets the same ID in every block"""
+    hashes = pd.util.hash_pandas_object(pd.Series(names), index=False).to_numpy()
+    return (hashes % 1_000_000).astype(np.int64) + 9_000_000
+
+
+def choose(rng, options, size):
+    """Random draw from a list or a {value: weight} dict (weights normalised)"""
+    if isinstance(options, dict):
+        values = list(options.keys())
+        weights = np.array(list(options.values()), dtype=float)
+        return np.array(values, dtype=object)[rng.choice(len(values), size=size, p=weights / weights.sum())]
+    return np.array(options, dtype=object)[rng.integers(0, len(options), size)]
+
+
+def format_dates(days, fmt='%d/%m/%Y'):
+    return pd.to_datetime(pd.Series(days, dtype='int64'), unit='D').dt.strftime(fmt)
+
+
+def sparse(rng, values, missing):
+    """Blank out a share of values"""
+    values = pd.Series(values, dtype=object)
+    return values.where(rng.random(len(values)) >= missing)
+
+
+def filler_columns(rng, prefix, count, rows):
+    """Extra columns so row widths match the export (mostly empty, some short text/numbers)"""
+    columns = {}
+    for i in range(count):
+        if i % 3 == 0:
+            values = pd.Series(np.round(rng.lognormal(1, 1.5, rows), 2))
+        elif i % 3 == 1:
+            values = pd.Series(choose(rng, ['Yes', 'No', 'Unknown', 'Other'], rows))
+        else:
+            values = pd.Series(rng.integers(1, 10_000, rows)).astype(str)
+        columns[f"{prefix}{i + 1:03d}"] = sparse(rng, values, 0.7)
+    return columns
+
+
+def synopsis(rng, names, sizes):
+    """Deal synopsis text; some contain commas, quotes and line breaks like the real export"""
+    text = ('The company raised ' + sizes.fillna(0).round(2).astype(str) + ' million of venture funding, '
+            'led by ' + pd.Series(choose(rng, ['"Alpha Ventures"', 'Beta Capital', 'Gamma Partners, LLC'],
+                                             len(names))) + '.')
+    multiline = rng.random(len(names)) < 0.05
+    text[multiline] = text[multiline] + '\nThe funds will be used to expand ' + names[multiline] + '.'
+    return sparse(rng, text, 0.4)
+
+
+def make_investors(scale, seed):
+    rng = np.random.default_rng([seed, 0])
+    n = int(BASE_INVESTORS * scale)
+    ids = pitchbook_ids(np.arange(n) + 500_000)
+    investors = pd.DataFrame({
+        'InvestorID': ids,
+        'InvestorName': 'Investor ' + pd.Series(np.arange(n)).astype(str) + choose(rng, [' Ventures', ' Capital', ' Partners', ''], n),
+        'InvestorType': choose(rng, INVESTOR_TYPES, n),
+        'HQCountry': choose(rng, ['United States'] * 6 + ['United Kingdom', 'Germany', 'Israel', 'Canada'], n),
+        'HQLocation': choose(rng, CITIES, n),
+        'YearFounded': rng.integers(1970, 2022, n).astype(float),
+        'AUM': sparse(rng, np.round(rng.lognormal(5, 2, n), 2), 0.5),
+        'TotalInvestments': rng.zipf(1.8, n).clip(1, 5_000),
+    })
+    investors = pd.concat([investors, pd.DataFrame(filler_columns(rng, 'Investor_Field', INVESTOR_COLUMNS - investors.shape[1], n))], axis=1)
+    # Popularity for deal participation: a few investors appear in many deals
+    popularity = 1.0 / np.arange(1, n + 1) ** 0.9
+    popularity = rng.permutation(popularity)
+    return investors, popularity / popularity.sum()
+
+
+def make_block(block, first_company, n_companies, investors, investor_p, seed):
+    """All tables for one block of companies"""
+    rng = np.random.default_rng([seed, block + 1])
+    c = n_companies
+    company_numbers = np.arange(first_company, first_company + c)
+    company_ids = pitchbook_ids(company_numbers + 10_000)
+    company_names = 'Synthetic ' + pd.Series(company_numbers).astype(str) + choose(rng, [' Inc.', ' Labs', ', Inc.', ' Technologies'], c)
+
+    us = rng.random(c) < 0.85
+    states = np.where(us, choose(rng, US_STATES, c), choose(rng, list(NON_US_STATES), c))
+    countries = np.where(us, 'United States', pd.Series(states).map(NON_US_STATES).fillna('United States'))
+    sectors = choose(rng, {'Information Technology': 0.4, 'Healthcare': 0.22,
+                           'Consumer Products and Services (B2C)': 0.14, 'Business Products and Services (B2B)': 0.12,
+                           'Financial Services': 0.06, 'Materials and Resources': 0.03, 'Energy': 0.03}, c)
+    groups = np.array([SECTORS[s][i % len(SECTORS[s])] for s, i in zip(sectors, rng.integers(0, 12, c))], dtype=object)
+    founded = np.clip(np.round(rng.normal(2012, 6, c)), 1985, 2022)
+    employees = np.maximum(1, np.round(rng.lognormal(2.8, 1.3, c)))
+
+    # Deals: heavy-tailed count per company, dated after founding
+    deal_counts = np.minimum(rng.zipf(DEALS_PER_COMPANY_ZIPF, c), 200)
+    deal_company = np.repeat(np.arange(c), deal_counts)
+    n_deals = len(deal_company)
+    founded_day = ((founded - 1970) * 365.25).astype(np.int64)
+    start = np.maximum(founded_day[deal_company], DAY_2000 - 3_650)
+    deal_days = start + (rng.random(n_deals) * (DAY_2023 - start)).astype(np.int64)
+    order = np.lexsort((deal_days, deal_company))
+    deal_company, deal_days = deal_company[order], deal_days[order]
+    deal_no = np.arange(n_deals) - np.repeat(np.cumsum(deal_counts) - deal_counts, deal_counts) + 1
+    deal_ids = pitchbook_ids(np.arange(n_deals) + first_company * 3 + 1_000_000, 'T')
+    deal_sizes = pd.Series(np.round(rng.lognormal(1.2, 1.6, n_deals), 2)).where(rng.random(n_deals) > 0.3)
+    deal_types = choose(rng, DEAL_TYPES, n_deals)
+    deal_dates = format_dates(deal_days)
+
+    deals = pd.DataFrame({
+        'DealID': deal_ids,
+        'CompanyID': company_ids.to_numpy()[deal_company],
+        'DealNo': deal_no.astype(float),
+        'DealDate': deal_dates,
+        'DealSize': deal_sizes,
+        'DealStatus': choose(rng, {'Completed': 0.97, 'Failed/Cancelled': 0.02, 'Announced/In Progress': 0.01}, n_deals),
+        'VCRound': pd.Series(deal_no).map(lambda k: f"{k}{'st' if k == 1 else 'nd' if k == 2 else 'rd' if k == 3 else 'th'} Round"),
+        'DealType': deal_types,
+        'DealType2': choose(rng, DEAL_TYPE2, n_deals),
+        'DealClass': choose(rng, DEAL_CLASSES, n_deals),
+        'DealSynopsis': synopsis(rng, company_names.to_numpy()[deal_company], deal_sizes),
+        'Employees': sparse(rng, np.round(employees[deal_company] * rng.uniform(0.3, 1.0, n_deals)), 0.4),
+        'BusinessStatus': choose(rng, BUSINESS_STATUS, n_deals),
+        'FinancingStatus': choose(rng, FINANCING_STATUS, n_deals),
+        'SiteLocation': pd.Series(choose(rng, CITIES, n_deals)) + ', ' + pd.Series(states[deal_company]).str[:2].str.upper(),
+        'OriginalRegistrationDate': sparse(rng, deal_dates, 0.8),
+        'Revenue': sparse(rng, np.round(rng.lognormal(1, 2, n_deals), 2), 0.8),
+        'GrossProfit': sparse(rng, np.round(rng.lognormal(0, 2, n_deals), 2), 0.9),
+        'NetIncome': sparse(rng, np.round(rng.normal(0, 5, n_deals), 2), 0.9),
+    })
+    deals = pd.concat([deals, pd.DataFrame(filler_columns(rng, 'Deal_Field', DEAL_COLUMNS - deals.shape[1], n_deals))], axis=1)
+
+    first_deal = np.cumsum(deal_counts) - deal_counts
+    companies = pd.DataFrame({
+        'CompanyID': company_ids,
+        'CompanyName': company_names,
+        'CompanyFinancingStatus': choose(rng, FINANCING_STATUS, c),
+        'Employees': employees,
+        'YearFounded': founded,
+        'PrimaryIndustrySector': sectors,
+        'PrimaryIndustryGroup': groups,
+        'HQCity': choose(rng, CITIES, c),
+        'HQState_Province': states,
+        'HQCountry': countries,
+        'PrimaryContactPBId': sparse(rng, pitchbook_ids(company_numbers + 2_000_000, 'P'), 0.3),
+        'Revenue': sparse(rng, np.round(rng.lognormal(1, 2, c), 2), 0.6),
+        'NetIncome': sparse(rng, np.round(rng.normal(0, 5, c), 2), 0.8),
+        'FirstFinancingDealID': deal_ids.to_numpy()[first_deal],
+        'FirstFinancingDealType': deal_types[first_deal],
+        'FirstFinancingDealType2': choose(rng, DEAL_TYPE2, c),
+        'FirstFinancingDealType3': sparse(rng, choose(rng, DEAL_TYPE2, c), 0.7),
+        'FirstFinancingStatus': choose(rng, {'Completed': 0.98, 'Failed/Cancelled': 0.02}, c),
+    })
+    companies = pd.concat([companies, pd.DataFrame(filler_columns(rng, 'Company_Field', COMPANY_COLUMNS - companies.shape[1], c))], axis=1)
+
+    # Investors per deal: 1 + heavy tail, drawn by popularity; some deals have none
+    investor_counts = np.where(rng.random(n_deals) < 0.15, 0, 1 + np.minimum(rng.zipf(2.2, n_deals) - 1, 30))
+    relation_deal = np.repeat(np.arange(n_deals), investor_counts)
+    relation_investor = rng.choice(len(investors), size=len(relation_deal), p=investor_p)
+    relation = pd.DataFrame({
+        'DealID': deal_ids.to_numpy()[relation_deal],
+        'InvestorID': investors['InvestorID'].to_numpy()[relation_investor],
+        'DealType': pd.Series(deal_types[relation_deal]) + pd.Series(choose(rng, [' (Series A)', ' (Series B)', ' (Series C)', '', ''], len(relation_deal))),
+        'DealSize': sparse(rng, np.round(deal_sizes.to_numpy()[relation_deal] * rng.uniform(0.05, 0.6, len(relation_deal)), 2), 0.35),
+        'DealDate': deal_dates.to_numpy()[relation_deal],
+    }).drop_duplicates(['DealID', 'InvestorID'])
+
+    # People: ~10 per company, the first 1-3 are founders
+    people_counts = 1 + rng.negative_binomial(2, 2 / (2 + PEOPLE_PER_COMPANY - 1), c)
+    person_company = np.repeat(np.arange(c), people_counts)
+    n_people = len(person_company)
+    rank_in_company = np.arange(n_people) - np.repeat(np.cumsum(people_counts) - people_counts, people_counts)
+    founders_per_company = rng.integers(1, 4, c)
+    is_founder = rank_in_company < founders_per_company[person_company]
+    person_ids = pitchbook_ids(np.arange(n_people) + first_company * 12 + 3_000_000, 'P')
+    first = choose(rng, FIRST_NAMES, n_people)
+    last = choose(rng, LAST_NAMES, n_people)
+    middle = sparse(rng, choose(rng, ['A.', 'J.', 'M.', 'R.'], n_people), 0.8)
+    gender = choose(rng, {'Male': 0.78, 'Female': 0.21, None: 0.01}, n_people)
+    levels = np.where(is_founder, 'Founder', choose(rng, POSITION_LEVELS, n_people))
+    titles = np.where(is_founder, choose(rng, FOUNDER_TITLES, n_people), choose(rng, OTHER_TITLES, n_people))
+    bio = (pd.Series(first) + ' ' + pd.Series(last) + ' serves as ' + pd.Series(titles) + ' at '
+           + company_names.to_numpy()[person_company] + '.')
+    long_bio = rng.random(n_people) < 0.1
+    bio[long_bio] = bio[long_bio] + '\nPreviously, "' + pd.Series(last)[long_bio] + '" worked in consulting, banking and software.'
+    people = pd.DataFrame({
+        'PersonID': person_ids,
+        'FullName': pd.Series(first) + ' ' + pd.Series(middle).fillna('').add(' ').str.lstrip() + pd.Series(last),
+        'LastName': last,
+        'FirstName': first,
+        'MiddleName': middle,
+        'Gender': gender,
+        'Prefix': np.where(gender == 'Female', 'Ms.', np.where(rng.random(n_people) < 0.1, 'Dr.', 'Mr.')),
+        'University_Institution': sparse(rng, choose(rng, list(INSTITUTES), n_people), 0.5),
+        'PrimaryCompanyID': company_ids.to_numpy()[person_company],
+        'PrimaryCompany': company_names.to_numpy()[person_company],
+        'PrimaryCompanyType': 'Private Company',
+        'PrimaryPosition': titles,
+        'PrimaryPositionLevel': levels,
+        'Biography': sparse(rng, bio, 0.3),
+        'Location': pd.Series(choose(rng, CITIES, n_people)) + ', ' + pd.Series(states[person_company]),
+        'City': choose(rng, CITIES, n_people),
+    })
+    people = pd.concat([people, pd.DataFrame(filler_columns(rng, 'Person_Field', PERSON_COLUMNS - people.shape[1], n_people))], axis=1)
+
+    positions = pd.DataFrame({
+        'PersonID': person_ids,
+        'EntityID': company_ids.to_numpy()[person_company],
+        'EntityName': company_names.to_numpy()[person_company],
+        'EntityType': 'Company',
+        'FullTitle': titles,
+        'PositionLevel': levels,
+        'StartDate': format_dates(founded_day[person_company] + rng.integers(0, 2_000, n_people)),
+        'EndDate': sparse(rng, format_dates(DAY_2023 - rng.integers(0, 2_000, n_people)), 0.8),
+        'CurrentPosition': np.where(rng.random(n_people) < 0.8, 'Yes', 'No'),
+        'BoardSeat': np.where(levels == 'Board Member', 'Yes', 'No'),
+        'Founder': np.where(is_founder, 'Yes', 'No'),
+    })
+
+    # Education: 0-3 records per person
+    edu_counts = rng.choice(EDUCATION_RECORDS[0], size=n_people, p=EDUCATION_RECORDS[1])
+    edu_person = np.repeat(np.arange(n_people), edu_counts)
+    n_edu = len(edu_person)
+    named = rng.random(n_edu) < 0.5
+    institutes = np.where(named, choose(rng, INSTITUTES, n_edu),
+                          'University No. ' + pd.Series(rng.integers(1, OTHER_INSTITUTES, n_edu)).astype(str))
+    education = pd.DataFrame({
+        'PersonID': person_ids.to_numpy()[edu_person],
+        'InstituteID': pitchbook_ids(institute_numbers(institutes)),
+        'Institute': sparse(rng, institutes, 0.05),
+        'Degree': sparse(rng, choose(rng, DEGREES, n_edu), 0.15),
+        'Major_Concentration': choose(rng, MAJORS, n_edu),
+        'GraduatingYear': sparse(rng, np.clip(founded[person_company[edu_person]] - rng.integers(0, 20, n_edu), 1960, 2022), 0.3),
+    })
+
+    # Employee history: yearly-ish observations from founding to 2023
+    history_counts = 1 + rng.poisson(HISTORY_POINTS_PER_COMPANY - 1, c)
+    history_company = np.repeat(np.arange(c), history_counts)
+    h_start = np.maximum(founded_day[history_company], DAY_2000 - 3_650)
+    h_days = h_start + (rng.random(len(history_company)) * (DAY_2023 - h_start)).astype(np.int64)
+    growth = np.clip((h_days - founded_day[history_company]) / (DAY_2023 - founded_day[history_company]).clip(1), 0.02, 1)
+    history = pd.DataFrame({
+        'CompanyID': company_ids.to_numpy()[history_company],
+        'Date': format_dates(h_days, '%Y-%m-%d'),
+        'EmployeeCount': np.maximum(1, np.round(employees[history_company] * growth * rng.uniform(0.8, 1.2, len(h_days)))),
+    })
+
+    # Extra positions at other companies of the block (drawn last, so the tables above
+    # do not depend on them): serial founders found again, others join as non-founders
+    share = np.where(is_founder, EXTRA_POSITION_SHARE['founder'], EXTRA_POSITION_SHARE['other'])
+    extra_counts = np.where(rng.random(n_people) < share,
+                            np.minimum(rng.zipf(EXTRA_POSITIONS_ZIPF, n_people), MAX_EXTRA_POSITIONS), 0)
+    if c < 2:
+        extra_counts[:] = 0
+    extra_person = np.repeat(np.arange(n_people), extra_counts)
+    n_extra = len(extra_person)
+    extra_company = (person_company[extra_person] + rng.integers(1, max(c, 2), n_extra)) % c
+    extra_founder = is_founder[extra_person]
+    extra_levels = np.where(extra_founder, 'Founder', choose(rng, POSITION_LEVELS, n_extra))
+    extra_positions = pd.DataFrame({
+        'PersonID': person_ids.to_numpy()[extra_person],
+        'EntityID': company_ids.to_numpy()[extra_company],
+        'EntityName': company_names.to_numpy()[extra_company],
+        'EntityType': 'Company',
+        'FullTitle': np.where(extra_founder, choose(rng, FOUNDER_TITLES, n_extra), choose(rng, OTHER_TITLES, n_extra)),
+        'PositionLevel': extra_levels,
+        'StartDate': format_dates(founded_day[extra_company] + rng.integers(0, 2_000, n_extra)),
+        'EndDate': sparse(rng, format_dates(DAY_2023 - rng.integers(0, 2_000, n_extra)), 0.8),
+        'CurrentPosition': np.where(rng.random(n_extra) < 0.8, 'Yes', 'No'),
+        'BoardSeat': np.where(extra_levels == 'Board Member', 'Yes', 'No'),
+        'Founder': np.where(extra_founder, 'Yes', 'No'),
+    })
+    positions = (pd.concat([positions, extra_positions], ignore_index=True)
+                 .drop_duplicates(['PersonID', 'EntityID'], ignore_index=True))
+
+    return {
+        'Company': companies, 'Deal': deals, 'DealInvestorRelation': relation,
+        'Person': people, 'PersonPositionRelation': positions, 'PersonEducationRelation': education,
+        'CompanyEmployeeHistoryRelation': history,
+    }
+
+
+def master_rows(tables):
+    """Master file rows for one block: deal x investor x company person x education"""
+    company = tables['Company'].iloc[:, :18].add_prefix('Company_').rename(
+        columns={'Company_CompanyID': 'CompanyID', 'Company_CompanyName': 'CompanyName'})
+    deal = tables['Deal'].iloc[:, :19].add_prefix('Deal_').rename(
+        columns={'Deal_DealID': 'DealID', 'Deal_CompanyID': 'CompanyID'})
+    investor = tables['DealInvestorRelation'].rename(columns={
+        'DealType': 'Investor_DealType', 'DealSize': 'Investor_DealSize', 'DealDate': 'Investor_DealDate'})
+    person = tables['Person'].iloc[:, :16].add_prefix('Person_').rename(
+        columns={'Person_PersonID': 'PersonID', 'Person_PrimaryCompanyID': 'PrimaryCompanyID'})
+    education = tables['PersonEducationRelation'].drop(columns='InstituteID').add_prefix('Education_').rename(
+        columns={'Education_PersonID': 'PersonID', 'Education_Major_Concentration': 'Education_Major_Concentration'})
+    links = tables['PersonPositionRelation'][['PersonID', 'EntityID']].rename(columns={'EntityID': 'CompanyID'})
+
+    master = (deal.merge(company, on='CompanyID', how='left')
+                  .merge(investor, on='DealID', how='left')
+                  .merge(links, on='CompanyID', how='left')
+                  .merge(person, on='PersonID', how='left')
+                  .merge(education, on='PersonID', how='left'))
+    return master[MASTER_COLUMNS]
+
+
+def generate(scale=1, outdir='bench_data/x1', seed=DEFAULT_SEED, include_master=True):
+    """
+    Write the synthetic tables for a given scale.
+
+    Parameters:
+    -----------
+    scale : float
+        Multiple of the README table sizes (1, 10, 100)
+    outdir : str
+        Output directory (core_tables/, other_tables/, master_file.csv)
+    seed : int
+        Same seed and scale always produce the same files
+    include_master : bool
+        Also write master_file.csv (large: ~15-35 rows per deal)
+
+    Returns:
+    --------
+    dict of table name -> rows written
+    """
+    outdir = Path(outdir)
+    (outdir / 'core_tables').mkdir(parents=True, exist_ok=True)
+    (outdir / 'other_tables').mkdir(parents=True, exist_ok=True)
+    paths = {name: outdir / 'core_tables' / f"{name}.csv" for name in
+             ['Company', 'Deal', 'Person', 'PersonEducationRelation', 'PersonPositionRelation', 'DealInvestorRelation']}
+    paths['CompanyEmployeeHistoryRelation'] = outdir / 'other_tables' / 'CompanyEmployeeHistoryRelation.csv'
+    if include_master:
+        paths['master_file'] = outdir / 'master_file.csv'
+    for path in paths.values():
+        if path.exists():
+            path.unlink()
+
+    investors, investor_p = make_investors(scale, seed)
+    investors.to_csv(outdir / 'core_tables' / 'Investor.csv', index=False)
+    rows = {'Investor': len(investors)}
+
+    n_companies = int(BASE_COMPANIES * scale)
+    for block, first in enumerate(range(0, n_companies, BLOCK_COMPANIES)):
+        tables = make_block(block, first, min(BLOCK_COMPANIES, n_companies - first), investors, investor_p, seed)
+        if include_master:
+            tables['master_file'] = master_rows(tables)
+        for name, df in tables.items():
+            df.to_csv(paths[name], mode='a', header=not paths[name].exists(), index=False)
+            rows[name] = rows.get(name, 0) + len(df)
+        print(f"   Block {block + 1}: companies {first:,}-{first + min(BLOCK_COMPANIES, n_companies - first):,}")
+    return rows
+
+
+if __name__ == "__main__":
+    args = [a for a in sys.argv[1:] if not a.startswith('--')]
+    scale = float(args[0]) if len(args) > 0 else 1
+    outdir = args[1] if len(args) > 1 else f"bench_data/x{scale:g}"
+
+    print("=" * 80)
+    print(f"GENERATING SYNTHETIC DATA (scale {scale:g}x, seed {DEFAULT_SEED})")
+    print("=" * 80)
+    start = time.perf_counter()
+    rows = generate(scale, outdir, include_master='--no-master' not in sys.argv)
+    print(f"\nWritten to {outdir} in {time.perf_counter() - start:.1f}s:")
+    for name, count in rows.items():
+        print(f"  {name:<34} {count:>14,} rows")
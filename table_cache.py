@@ -0,0 +1,158 @@
+"""
+Persistent Binary Cache for Core Tables
+=======================================
+
+Parsing the raw core_tables CSVs dominates the startup time of the
+exploration scripts. read_table() parses a CSV once, stores the typed result
+as a Feather file and memory-maps that file on every later load, reading
+only the requested columns.
+
+Cache entries are keyed by the source path, size, mtime, a content hash and
+the read_csv options, so editing or replacing a CSV (or reading it with a
+different dtype) produces a fresh entry. The content hash covers the first,
+middle and last megabyte of the file, which catches in-place rewrites that
+keep size and mtime without rehashing gigabytes on every load. A new
+version of a CSV replaces the older entries of the same path and read
+options only; other read options and same-named CSVs elsewhere keep theirs.
+
+Feather needs pyarrow; without it the cache falls back to pickle files
+(still far faster than re-parsing, but not memory-mapped).
+
+Usage:
+    from table_cache import read_table
+    people = read_table('core_tables/Person.csv')
+    deals = read_table('core_tables/Deal.csv', columns=['DealID', 'CompanyID', 'DealDate'])
+
+    python table_cache.py [core_tables_dir]     # warm the cache for every CSV
+
+Author: Empirical Methods Project
+"""
+
+import os
+import sys
+import json
+import hashlib
+import pandas as pd
+from pathlib import Path
+
+try:
+    import pyarrow.feather as feather
+    FEATHER_AVAILABLE = True
+except ImportError:
+    FEATHER_AVAILABLE = False
+
+DEFAULT_CACHE_DIR = '.table_cache'
+HASH_BLOCK_BYTES = 1 << 20
+
+
+def content_hash(csv_path, block_bytes=HASH_BLOCK_BYTES):
+    """sha1 of the first, middle and last block of the file"""
+    size = os.path.getsize(csv_path)
+    digest = hashlib.sha1(str(size).encode('utf-8'))
+    with open(csv_path, 'rb') as f:
+        for offset in sorted({0, max(size // 2 - block_bytes // 2, 0), max(size - block_bytes, 0)}):
+            f.seek(offset)
+            digest.update(f.read(block_bytes))
+    return digest.hexdigest()
+
+
+def table_cache_path(csv_path, cache_dir=DEFAULT_CACHE_DIR, **read_kwargs):
+    """
+    Cache file name <stem>_<source>_<version>: source = path and read options,
+    version = size, mtime and content hash
+    """
+    stat = os.stat(csv_path)
+    source = '|'.join([os.path.abspath(csv_path), json.dumps(read_kwargs, sort_keys=True, default=str)])
+    version = '|'.join([str(stat.st_size), str(stat.st_mtime_ns), content_hash(csv_path)])
+    source_digest = hashlib.sha1(source.encode('utf-8')).hexdigest()[:16]
+    version_digest = hashlib.sha1(version.encode('utf-8')).hexdigest()[:16]
+    suffix = '.feather' if FEATHER_AVAILABLE else '.pkl'
+    return Path(cache_dir) / f"{Path(csv_path).stem}_{source_digest}_{version_digest}{suffix}"
+
+
+def _write(df, cache_path):
+    """Write a cache file; returns the path actually written"""
+    if cache_path.suffix == '.feather':
+        try:
+            feather.write_feather(df.reset_index(drop=True), cache_path)
+            return cache_path
+        except Exception as e:
+            # Mixed-type object columns cannot be stored as Arrow; keep a pickle instead
+            print(f"   [CHECK] Feather write failed for {cache_path.name} ({e}); using pickle")
+            cache_path = cache_path.with_suffix('.pkl')
+    df.to_pickle(cache_path)
+    return cache_path
+
+
+def _read(cache_path, columns=None):
+    if cache_path.suffix == '.feather':
+        return feather.read_table(cache_path, columns=columns, memory_map=True).to_pandas()
+    df = pd.read_pickle(cache_path)
+    return df[columns] if columns is not None else df
+
+
+def _remove_stale(cache_path):
+    """Drop older versions of the same entry (same source path and read options, other version)"""
+    source_prefix = cache_path.stem.rsplit('_', 1)[0]
+    for old in cache_path.parent.glob(f"{source_prefix}_*"):
+        if old.stem != cache_path.stem and old.stem.rsplit('_', 1)[0] == source_prefix:
+            old.unlink()
+
+
+def read_table(csv_path, columns=None, cache_dir=DEFAULT_CACHE_DIR, use_cache=True, **read_kwargs):
+    """
+    Read a CSV through the binary cache.
+
+    Parameters:
+    -----------
+    csv_path : str
+        Path to the source CSV
+    columns : list of str or None
+        Columns to return (only these are read from the cache file)
+    cache_dir : str
+        Directory for cache files
+    use_cache : bool
+        Set False to always parse the CSV (nothing is written)
+    **read_kwargs
+        Extra pd.read_csv options (part of the cache key, e.g. dtype=str)
+
+    Returns:
+    --------
+    DataFrame
+    """
+    columns = list(columns) if columns is not None else None
+    if not use_cache:
+        return pd.read_csv(csv_path, usecols=columns, low_memory=False, **read_kwargs)
+
+    cache_path = table_cache_path(csv_path, cache_dir, **read_kwargs)
+    for candidate in (cache_path, cache_path.with_suffix('.pkl')):
+        if candidate.exists():
+            return _read(candidate, columns)
+
+    # Cache the whole table so any later column projection is served from it
+    df = pd.read_csv(csv_path, low_memory=False, **read_kwargs)
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    written = _write(df, cache_path)
+    _remove_stale(written)
+    print(f"   [OK] Cached {Path(csv_path).name}: {written}")
+    return df[columns] if columns is not None else df
+
+
+if __name__ == "__main__":
+    import time
+
+    data_dir = Path(sys.argv[1] if len(sys.argv) > 1 else 'core_tables')
+
+    print("=" * 80)
+    print("WARMING TABLE CACHE")
+    print("=" * 80)
+    print(f"\nFormat: {'Feather (memory-mapped)' if FEATHER_AVAILABLE else 'pickle (pyarrow not installed)'}\n")
+
+    for csv_path in sorted(data_dir.glob('*.csv')):
+        start = time.perf_counter()
+        df = read_table(csv_path)
+        first = time.perf_counter() - start
+        start = time.perf_counter()
+        read_table(csv_path)
+        cached = time.perf_counter() - start
+        print(f"   {csv_path.name:<40} {len(df):>10,} rows  parse {first:>7.2f}s  cached {cached:>6.2f}s")